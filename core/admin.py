@@ -8,6 +8,27 @@ from .models import (
     Autor, PublicacionAutor
 )
 
+from . import nombres
+
+
+class BusquedaDifusaAdminMixin:
+    """
+    Suma a la busqueda estandar del admin los registros con nombres parecidos
+    (sin tildes y tolerando errores de tipeo), via core.nombres.
+    """
+    tipo_busqueda_difusa = None
+
+    def get_search_results(self, request, queryset, search_term):
+        # Los parecidos salen del queryset recibido: respetan filtros y permisos
+        original = queryset
+        queryset, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term and self.tipo_busqueda_difusa:
+            ids = nombres.buscar_ids(self.tipo_busqueda_difusa, search_term)
+            if ids:
+                queryset |= original.filter(pk__in=ids)
+        return queryset, may_have_duplicates
+
+
 # ===================== Catálogos =====================
 
 @admin.register(TemaInteres)
@@ -68,7 +89,8 @@ class ProfesionalidadInline(admin.TabularInline):
 
 
 @admin.register(Equipo)
-class EquipoAdmin(admin.ModelAdmin):
+class EquipoAdmin(BusquedaDifusaAdminMixin, admin.ModelAdmin):
+    tipo_busqueda_difusa = "equipo"
     list_display = ("nombre", "dni", "nivel", "color_perfil", "user")
     search_fields = (
         "nombre", "dni",
@@ -199,7 +221,8 @@ class EventoAdmin(admin.ModelAdmin):
 # ===================== Autor =====================
 
 @admin.register(Autor)
-class AutorAdmin(admin.ModelAdmin):
+class AutorAdmin(BusquedaDifusaAdminMixin, admin.ModelAdmin):
+    tipo_busqueda_difusa = "autor"
     list_display = ("__str__", "afiliacion", "user")
     search_fields = (
         "nombre", "afiliacion",
@@ -0,0 +1,119 @@
+# core/almacenamiento.py
+"""
+Storage de media deduplicado por contenido.
+
+``AlmacenamientoDeduplicado`` envuelve al storage configurado (disco o
+Cloudinary). Al guardar calcula el SHA-256 mientras lee el archivo por
+partes y lo guarda como ``blobs/ab/<sha256>.<ext>``: el mismo logo o PDF
+subido N veces ocupa un solo archivo y las filas apuntan todas a ese nombre.
+Los blobs conocidos se registran en ``BlobMedia``, asi que reconocer un
+duplicado es una consulta a la base y no una llamada al storage remoto.
+
+Como el nombre depende solo del contenido, la URL de un blob nunca cambia de
+contenido y se puede cachear para siempre. Por lo mismo un blob puede estar
+referenciado desde varias filas: ``delete`` no borra blobs; los que quedan
+sin referencias los borra ``manage.py limpiar_media --borrar``. Los archivos
+anteriores a este storage conservan su nombre y se siguen leyendo y
+borrando como antes.
+"""
+import hashlib
+import posixpath
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import Storage
+from django.db import IntegrityError, transaction
+from django.utils.deconstruct import deconstructible
+from django.utils.module_loading import import_string
+
+
+PREFIJO = "blobs/"
+
+# Hasta este tamaño el archivo se arma en memoria; despues, en disco
+MEMORIA_MAXIMA = 1024 * 1024
+
+
+def es_blob(nombre):
+    return (nombre or "").startswith(PREFIJO)
+
+
+def nombre_blob(sha256, nombre_original):
+    ext = posixpath.splitext(nombre_original or "")[1].lower()[:10]
+    return f"{PREFIJO}{sha256[:2]}/{sha256}{ext}"
+
+
+@deconstructible
+class AlmacenamientoDeduplicado(Storage):
+    def __init__(self, backend="django.core.files.storage.FileSystemStorage", options=None):
+        self.backend = backend
+        self.options = options or {}
+        self.interno = import_string(backend)(**self.options)
+
+    # --- escritura ---
+
+    def get_available_name(self, name, max_length=None):
+        # El nombre final sale del contenido (en _save): no hace falta
+        # preguntarle al storage si el nombre pedido esta libre.
+        return name
+
+    def _save(self, name, content):
+        from .models import BlobMedia
+
+        digest = hashlib.sha256()
+        tamano = 0
+        with tempfile.SpooledTemporaryFile(max_size=MEMORIA_MAXIMA) as copia:
+            for bloque in content.chunks():
+                digest.update(bloque)
+                copia.write(bloque)
+                tamano += len(bloque)
+            sha256 = digest.hexdigest()
+            destino = nombre_blob(sha256, name)
+
+            existente = BlobMedia.objects.filter(sha256=sha256).values_list("nombre", flat=True).first()
+            if existente:
+                return existente
+
+            copia.seek(0)
+            guardado = self.interno.save(destino, File(copia, name=destino))
+
+        try:
+            with transaction.atomic():
+                BlobMedia.objects.create(sha256=sha256, nombre=guardado, tamano=tamano)
+        except IntegrityError:
+            # Otra request guardo el mismo contenido en paralelo: se usa el suyo
+            return BlobMedia.objects.filter(sha256=sha256).values_list("nombre", flat=True).first() or guardado
+        return guardado
+
+    def delete(self, name):
+        if es_blob(name):
+            return
+        self.interno.delete(name)
+
+    # --- lectura: todo va al storage real ---
+
+    def _open(self, name, mode="rb"):
+        return self.interno.open(name, mode)
+
+    def exists(self, name):
+        return self.interno.exists(name)
+
+    def listdir(self, path):
+        return self.interno.listdir(path)
+
+    def size(self, name):
+        return self.interno.size(name)
+
+    def url(self, name):
+        return self.interno.url(name)
+
+    def path(self, name):
+        return self.interno.path(name)
+
+    def get_accessed_time(self, name):
+        return self.interno.get_accessed_time(name)
+
+    def get_created_time(self, name):
+        return self.interno.get_created_time(name)
+
+    def get_modified_time(self, name):
+        return self.interno.get_modified_time(name)
@@ -4,3 +4,8 @@ class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
 
+    def ready(self):
+        # Registra los receptores de señales (indices de busqueda, etc.)
+        from . import signals  # noqa: F401
+        # Chequeos de configuracion (manage.py check)
+        from . import checks  # noqa: F401
@@ -0,0 +1,289 @@
+# core/busqueda.py
+"""
+Busqueda de texto completo para Publicaciones y el directorio de Equipo.
+
+- Postgres (DATABASE_URL): indice GIN sobre una expresion ``tsvector`` por
+  tabla (ver migraciones 0023 y 0024). La expresion ``vector_pg`` de cada
+  ``Indice`` debe coincidir con la del indice para que el planner lo use.
+- SQLite (desarrollo local): tabla virtual FTS5 con ``rowid`` = id de la
+  fila, mantenida desde Python.
+- Otros motores: ``icontains`` como respaldo.
+
+Los datos de tablas relacionadas (nombres de autores, roles, intereses...)
+se desnormalizan en un campo de la propia fila para que el indice cubra
+una sola tabla y la busqueda sea un unico lookup.
+"""
+import re
+import threading
+
+from django.db import connection, transaction
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import (
+    Equipo, EquipoInteres, EquipoUniversidad, Profesionalidad,
+    Publicacion, PublicacionAutor, PublicacionIntegrante,
+)
+
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokens(q):
+    """Palabras de la consulta, sin sintaxis del motor (evita errores de MATCH)."""
+    return _TOKEN_RE.findall((q or "").lower())[:10]
+
+
+def _vector_pg(tabla, pesos):
+    partes = []
+    for peso, columnas in pesos:
+        texto = " || ' ' || ".join(f"coalesce(\"{tabla}\".\"{c}\", '')" for c in columnas)
+        partes.append(f"setweight(to_tsvector('spanish'::regconfig, {texto}), '{peso}')")
+    return "(" + " || ".join(partes) + ")"
+
+
+class Indice:
+    """
+    Describe un indice de texto completo sobre un modelo.
+
+    ``pesos_pg``: pares (peso, columnas) para el ``tsvector`` de Postgres.
+    ``columnas_fts``: pares (columna FTS5, atributo del modelo) en orden.
+    ``pesos_fts``: peso bm25 de cada columna FTS5.
+    """
+
+    def __init__(self, model, tabla_fts, pesos_pg, columnas_fts, pesos_fts, campos_respaldo):
+        self.model = model
+        self.tabla_fts = tabla_fts
+        self.vector_pg = _vector_pg(model._meta.db_table, pesos_pg)
+        self.columnas_fts = columnas_fts
+        self.pesos_fts = pesos_fts
+        self.campos_respaldo = campos_respaldo
+
+    def buscar(self, queryset, q, orden_pg=()):
+        """
+        Filtra ``queryset`` y lo ordena por relevancia. Devuelve algo paginable
+        (queryset o ``ResultadosFTS``). Cada palabra se busca como prefijo y
+        todas deben aparecer.
+        """
+        palabras = tokens(q)
+        if not palabras:
+            return queryset.none()
+
+        if connection.vendor == "postgresql":
+            tsquery = " & ".join(f"{p}:*" for p in palabras)
+            return (
+                queryset
+                .filter(RawSQL(
+                    f"{self.vector_pg} @@ to_tsquery('spanish'::regconfig, %s)",
+                    (tsquery,), output_field=BooleanField(),
+                ))
+                .annotate(rank=RawSQL(
+                    f"ts_rank({self.vector_pg}, to_tsquery('spanish'::regconfig, %s))",
+                    (tsquery,), output_field=FloatField(),
+                ))
+                .order_by("-rank", *orden_pg)
+            )
+
+        if connection.vendor == "sqlite":
+            return ResultadosFTS(self, queryset, " ".join(f'"{p}"*' for p in palabras))
+
+        filtro = Q()
+        for p in palabras:
+            alguna = Q()
+            for campo in self.campos_respaldo:
+                alguna |= Q(**{f"{campo}__icontains": p})
+            filtro &= alguna
+        return queryset.filter(filtro)
+
+    def escribir_fts(self, objetos, ids):
+        """Reemplaza las filas FTS5 de ``ids`` con los valores de ``objetos``."""
+        if connection.vendor != "sqlite":
+            return
+        columnas = ", ".join(c for c, _ in self.columnas_fts)
+        marcadores = ", ".join(["%s"] * (len(self.columnas_fts) + 1))
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {self.tabla_fts} WHERE rowid = %s", [(pk,) for pk in ids])
+            cursor.executemany(
+                f"INSERT INTO {self.tabla_fts} (rowid, {columnas}) VALUES ({marcadores})",
+                [(o.pk, *(getattr(o, attr) for _, attr in self.columnas_fts)) for o in objetos],
+            )
+
+    def quitar(self, ids):
+        if connection.vendor == "sqlite" and ids:
+            with connection.cursor() as cursor:
+                cursor.executemany(f"DELETE FROM {self.tabla_fts} WHERE rowid = %s", [(pk,) for pk in ids])
+
+
+class ResultadosFTS:
+    """
+    Resultado paginable de una consulta FTS5. El ``Paginator`` solo pide
+    ``count()`` y un slice, asi que cada pagina cuesta una consulta al indice
+    mas las del queryset base (acotado a los ids de la pagina).
+    """
+
+    def __init__(self, indice, queryset, match):
+        self.indice = indice
+        self.queryset = queryset
+        self.match = match
+        self._ids = None
+
+    def _ids_ordenados(self):
+        # Los filtros del queryset base (ej: año) se aplican despues;
+        # se resuelven aca para que count() y los slices sean coherentes.
+        if self._ids is None:
+            tabla = self.indice.tabla_fts
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT rowid FROM {tabla} WHERE {tabla} MATCH %s "
+                    f"ORDER BY bm25({tabla}, {', '.join(str(p) for p in self.indice.pesos_fts)})",
+                    [self.match],
+                )
+                ids = [row[0] for row in cursor.fetchall()]
+            permitidos = set(
+                self.queryset.prefetch_related(None).filter(pk__in=ids).values_list("pk", flat=True)
+            ) if ids else set()
+            self._ids = [pk for pk in ids if pk in permitidos]
+        return self._ids
+
+    def count(self):
+        return len(self._ids_ordenados())
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, item):
+        ids = self._ids_ordenados()[item]
+        if isinstance(item, int):
+            return self.queryset.get(pk=ids)
+        por_id = {obj.pk: obj for obj in self.queryset.filter(pk__in=ids)}
+        return [por_id[pk] for pk in ids if pk in por_id]
+
+
+INDICE_PUBLICACIONES = Indice(
+    Publicacion,
+    tabla_fts="cuerpo_publicacion_fts",
+    pesos_pg=(("A", ("titulo",)), ("B", ("autores", "nombres_busqueda")), ("C", ("resumen",))),
+    columnas_fts=(("titulo", "titulo"), ("autores", "autores"), ("nombres", "nombres_busqueda"), ("resumen", "resumen")),
+    pesos_fts=(10.0, 5.0, 5.0, 1.0),
+    campos_respaldo=("titulo", "autores", "resumen", "nombres_busqueda"),
+)
+
+INDICE_EQUIPO = Indice(
+    Equipo,
+    tabla_fts="cuerpo_equipo_fts",
+    pesos_pg=(("A", ("nombre",)), ("B", ("documento_busqueda",))),
+    columnas_fts=(("nombre", "nombre"), ("documento", "documento_busqueda")),
+    pesos_fts=(10.0, 3.0),
+    campos_respaldo=("nombre", "documento_busqueda"),
+)
+
+
+def buscar_publicaciones(queryset, q):
+    return INDICE_PUBLICACIONES.buscar(queryset, q, orden_pg=("-fecha", "-id"))
+
+
+def buscar_equipo(queryset, q):
+    """Busca por nombre, roles, temas de interes y universidades."""
+    return INDICE_EQUIPO.buscar(queryset, q, orden_pg=("nombre",))
+
+
+# ------------------ Documentos desnormalizados ------------------
+
+def _nombres_por_publicacion(ids):
+    nombres = {pk: [] for pk in ids}
+    autores = (
+        PublicacionAutor.objects
+        .filter(publicacion_id__in=ids)
+        .select_related("autor__user")
+        .order_by("orden", "id")
+    )
+    for pa in autores:
+        nombres[pa.publicacion_id].append(str(pa.autor))
+    integrantes = (
+        PublicacionIntegrante.objects
+        .filter(publicacion_id__in=ids)
+        .values_list("publicacion_id", "integrante__nombre")
+        .order_by("orden", "id")
+    )
+    for pub_id, nombre in integrantes:
+        nombres[pub_id].append(nombre)
+    return {pk: " ".join(n for n in lista if n) for pk, lista in nombres.items()}
+
+
+def _documentos_por_equipo(ids):
+    partes = {pk: [] for pk in ids}
+    roles = (
+        Profesionalidad.objects.filter(equipo_id__in=ids)
+        .values_list("equipo_id", "titulo").order_by("orden", "id")
+    )
+    intereses = (
+        EquipoInteres.objects.filter(equipo_id__in=ids)
+        .values_list("equipo_id", "tema_interes__descripcion_interes").order_by("orden", "id")
+    )
+    universidades = (
+        EquipoUniversidad.objects.filter(equipo_id__in=ids)
+        .values_list("equipo_id", "universidad__descripcion_universidad").order_by("orden", "id")
+    )
+    for filas in (roles, intereses, universidades):
+        for equipo_id, texto in filas:
+            partes[equipo_id].append(texto)
+    return {pk: " ".join(t for t in lista if t) for pk, lista in partes.items()}
+
+
+def _reindexar(indice, campo, calcular, ids):
+    ids = list(set(ids))
+    if not ids:
+        return
+    valores = calcular(ids)
+    atributos = {"id", campo, *(attr for _, attr in indice.columnas_fts)}
+    objetos = list(indice.model.objects.filter(pk__in=ids).only(*atributos))
+    cambiados = []
+    for obj in objetos:
+        nuevo = valores.get(obj.pk, "")
+        if getattr(obj, campo) != nuevo:
+            setattr(obj, campo, nuevo)
+            cambiados.append(obj)
+    if cambiados:
+        indice.model.objects.bulk_update(cambiados, [campo])
+    indice.escribir_fts(objetos, ids)
+
+
+def reindexar_publicaciones(ids):
+    """Recalcula ``nombres_busqueda`` y la fila FTS de las publicaciones dadas."""
+    _reindexar(INDICE_PUBLICACIONES, "nombres_busqueda", _nombres_por_publicacion, ids)
+
+
+def reindexar_equipo(ids):
+    """Recalcula ``documento_busqueda`` y la fila FTS de los integrantes dados."""
+    _reindexar(INDICE_EQUIPO, "documento_busqueda", _documentos_por_equipo, ids)
+
+
+_REINDEXADORES = {
+    "publicacion": reindexar_publicaciones,
+    "equipo": reindexar_equipo,
+}
+
+_pendientes = threading.local()
+
+
+def programar_reindex(tipo, pk):
+    """
+    Agrupa los reindex de una misma transaccion y los ejecuta al confirmarla
+    (en autocommit se ejecuta en el momento). El primer callback procesa todo
+    el lote; los siguientes encuentran el lote vacio y no hacen nada.
+    """
+    lote = getattr(_pendientes, "lote", None)
+    if lote is None:
+        lote = _pendientes.lote = {}
+    lote.setdefault(tipo, set()).add(pk)
+    transaction.on_commit(_ejecutar_pendientes)
+
+
+def _ejecutar_pendientes():
+    lote = getattr(_pendientes, "lote", None) or {}
+    _pendientes.lote = None
+    for tipo, ids in lote.items():
+        _REINDEXADORES[tipo](ids)
@@ -0,0 +1,22 @@
+# core/checks.py
+"""
+Chequeos de configuracion del sitio (``manage.py check``).
+"""
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+from core import paginas
+
+
+@register(Tags.caches)
+def cache_compartida(app_configs, **kwargs):
+    # La cache de paginas se invalida desde otros procesos (workers, comandos)
+    if paginas.compartida() or settings.PAGINAS_CACHE_LOCAL:
+        return []
+    return [
+        Warning(
+            "La cache por defecto es local a cada proceso: la cache de paginas queda apagada.",
+            hint="Configurar REDIS_URL para compartir la cache entre la web y los workers.",
+            id="core.W001",
+        )
+    ]
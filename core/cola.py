@@ -0,0 +1,285 @@
+# core/cola.py
+"""
+Cola de media del panel, guardada en la base (``TrabajoMedia``).
+
+Las vistas de alta/edicion ya no escriben los archivos en su lugar final
+dentro de la request: ``encolar`` copia cada archivo por bloques al storage
+de media bajo ``PREFIJO`` (sin cargarlo entero en memoria ni en la base),
+deja la ruta en la cola con un solo ``bulk_create`` y la vista responde
+enseguida. El worker (``manage.py procesar_media``) toma los trabajos de a
+uno con ``tomar``, crea la fila hija (``NoticiaImagen``,
+``PublicacionArchivo``, ...) con ``procesar`` y borra la copia.
+
+La copia va al storage de media y no al disco del proceso web: el worker
+corre en otro servicio (Procfile) y un reinicio o deploy vacia el disco local.
+
+No hace falta un broker: el reclamo de un trabajo es un UPDATE condicionado
+al estado, asi que varios workers pueden correr a la vez sin pisarse.
+
+La misma cola lleva los trabajos de ``core.derivadas`` (versiones reducidas
+de las imagenes), que no traen contenido: se generan desde el storage.
+"""
+import os
+import uuid
+from datetime import timedelta
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from . import derivadas
+from .almacenamiento import AlmacenamientoDeduplicado
+from .models import (
+    Evento, EventoArchivo, Investigacion, InvestigacionArchivo, InvestigacionFoto,
+    Noticia, NoticiaImagen, Publicacion, PublicacionArchivo, PublicacionImagen,
+    PublicacionVideo, TrabajoMedia,
+)
+
+
+# Reintentos antes de dejar un trabajo en ERROR
+MAX_INTENTOS = 3
+
+# Un trabajo en PROCESANDO por mas de esto se considera de un worker caido
+MINUTOS_COLGADO = 15
+
+# Carpeta del storage de media donde esperan los archivos encolados
+PREFIJO = "cola/"
+
+
+class Destino:
+    """Donde termina un archivo encolado: modelo hijo, FK al padre y campo de archivo."""
+
+    def __init__(self, padre, modelo, fk, campo, con_nombre=False):
+        self.padre = padre
+        self.modelo = modelo
+        self.fk = fk
+        self.campo = campo
+        self.con_nombre = con_nombre
+
+
+DESTINOS = {
+    "noticia_imagen": Destino(Noticia, NoticiaImagen, "noticia", "imagen"),
+    "investigacion_foto": Destino(Investigacion, InvestigacionFoto, "investigacion", "foto"),
+    "investigacion_archivo": Destino(Investigacion, InvestigacionArchivo, "investigacion", "archivo", con_nombre=True),
+    "publicacion_imagen": Destino(Publicacion, PublicacionImagen, "publicacion", "imagen"),
+    "publicacion_video": Destino(Publicacion, PublicacionVideo, "publicacion", "video"),
+    "publicacion_archivo": Destino(Publicacion, PublicacionArchivo, "publicacion", "archivo", con_nombre=True),
+    "evento_archivo": Destino(Evento, EventoArchivo, "evento", "archivo", con_nombre=True),
+}
+
+
+def _espera():
+    """Storage donde esperan los archivos encolados (bajo ``PREFIJO``)."""
+    # El deduplicado renombraria la copia por su hash y no la borraria
+    if isinstance(default_storage, AlmacenamientoDeduplicado):
+        return default_storage.interno
+    return default_storage
+
+
+def _descartar(rutas):
+    espera = _espera()
+    for ruta in rutas:
+        if ruta:
+            try:
+                espera.delete(ruta)
+            except OSError:
+                pass
+
+
+def encolar(destino, objeto, archivos, nombres=(), user=None, desde=1):
+    """
+    Deja en la cola los ``archivos`` subidos para ``objeto``. El orden es la
+    posicion en la lista contando desde ``desde`` (para agregar al final de
+    una galeria, ver core.galerias); ``nombres`` es la lista paralela de
+    nombres visibles para los destinos que lo usan.
+    Devuelve la cantidad de trabajos creados.
+    """
+    config = DESTINOS[destino]
+    espera = _espera()
+    trabajos = []
+    try:
+        for i, archivo in enumerate(archivos):
+            if not archivo:
+                continue
+            nombre = ""
+            if config.con_nombre:
+                nombre = nombres[i] if i < len(nombres) else archivo.name
+            # El storage copia por bloques (en disco, mueve el temporal de la subida)
+            extension = os.path.splitext(archivo.name)[1].lower()
+            ruta = espera.save(f"{PREFIJO}{destino}/{uuid.uuid4().hex}{extension}", archivo)
+            trabajos.append(TrabajoMedia(
+                destino=destino,
+                objeto_id=objeto.pk,
+                orden=desde + i,
+                nombre=nombre,
+                nombre_original=archivo.name,
+                ruta=ruta,
+                tamano=archivo.size,
+                user=user if user is not None and user.is_authenticated else None,
+            ))
+        TrabajoMedia.objects.bulk_create(trabajos)
+    except Exception:
+        _descartar([t.ruta for t in trabajos])
+        raise
+    return len(trabajos)
+
+
+def cancelar(destino, objeto):
+    """Descarta lo que quedaba pendiente para ``objeto`` (p. ej. al reemplazar la galeria)."""
+    pendientes = TrabajoMedia.objects.filter(
+        destino=destino, objeto_id=objeto.pk, estado=TrabajoMedia.PENDIENTE,
+    )
+    rutas = list(pendientes.values_list("ruta", flat=True))
+    borrados = pendientes.delete()[0]
+    _descartar(rutas)
+    return borrados
+
+
+def tomar():
+    """
+    Reclama el trabajo pendiente mas viejo y lo devuelve,
+    o None si la cola esta vacia. Si otro worker gana la carrera por un
+    trabajo se prueba con el siguiente.
+    """
+    candidatos = (
+        TrabajoMedia.objects
+        .filter(estado=TrabajoMedia.PENDIENTE)
+        .order_by("id")
+        .values_list("id", flat=True)[:10]
+    )
+    for pk in list(candidatos):
+        reclamado = TrabajoMedia.objects.filter(pk=pk, estado=TrabajoMedia.PENDIENTE).update(
+            estado=TrabajoMedia.PROCESANDO,
+            iniciado=timezone.now(),
+            intentos=F("intentos") + 1,
+        )
+        if reclamado:
+            return TrabajoMedia.objects.get(pk=pk)
+    return None
+
+
+def _crear_fila(trabajo, config):
+    fila = config.modelo(**{f"{config.fk}_id": trabajo.objeto_id, "orden": trabajo.orden})
+    if config.con_nombre:
+        fila.nombre = trabajo.nombre
+    with _espera().open(trabajo.ruta) as archivo:
+        # El storage lo lee por bloques
+        getattr(fila, config.campo).save(trabajo.nombre_original, File(archivo), save=False)
+    fila.save()
+
+
+def procesar(trabajo):
+    """
+    Escribe el archivo en el storage y crea la fila hija. Se guarda con
+    ``save()`` para que corran las signals (indice, portadas, derivadas,
+    marcas de actualizacion). Si falla vuelve a PENDIENTE hasta
+    ``MAX_INTENTOS``. Devuelve el estado final del trabajo.
+    """
+    if trabajo.destino == derivadas.DESTINO:
+        return _ejecutar(trabajo, lambda: derivadas.generar(trabajo.nombre, trabajo.objeto_id))
+
+    config = DESTINOS.get(trabajo.destino)
+    ahora = timezone.now()
+    if config is None or not config.padre.objects.filter(pk=trabajo.objeto_id).exists():
+        # El registro se borro mientras el archivo esperaba: no hay donde ponerlo
+        TrabajoMedia.objects.filter(pk=trabajo.pk).update(
+            estado=TrabajoMedia.ERROR, terminado=ahora, ruta="",
+            error="El registro de destino ya no existe.",
+        )
+        _descartar([trabajo.ruta])
+        return TrabajoMedia.ERROR
+    return _ejecutar(trabajo, lambda: _crear_fila(trabajo, config))
+
+
+def _ejecutar(trabajo, accion):
+    try:
+        with transaction.atomic():
+            accion()
+            TrabajoMedia.objects.filter(pk=trabajo.pk).update(
+                estado=TrabajoMedia.LISTO, terminado=timezone.now(), ruta="", error="",
+            )
+        # La copia en espera ya esta en el storage
+        _descartar([trabajo.ruta])
+        return TrabajoMedia.LISTO
+    except Exception as e:
+        estado = TrabajoMedia.PENDIENTE if trabajo.intentos < MAX_INTENTOS else TrabajoMedia.ERROR
+        TrabajoMedia.objects.filter(pk=trabajo.pk).update(
+            estado=estado,
+            error=str(e)[:1000],
+            terminado=timezone.now() if estado == TrabajoMedia.ERROR else None,
+        )
+        return estado
+
+
+def recuperar_colgados(minutos=MINUTOS_COLGADO):
+    """
+    Devuelve a la cola los trabajos que un worker reclamo y nunca termino.
+    Los que ya usaron ``MAX_INTENTOS`` pasan a ERROR: un archivo que tira
+    abajo al worker no se reintenta para siempre. Conservan la copia en
+    espera, asi que se pueden reintentar a mano (``reintentar``).
+    """
+    ahora = timezone.now()
+    colgados = TrabajoMedia.objects.filter(
+        estado=TrabajoMedia.PROCESANDO, iniciado__lt=ahora - timedelta(minutes=minutos),
+    )
+    agotados = colgados.filter(intentos__gte=MAX_INTENTOS).update(
+        estado=TrabajoMedia.ERROR, terminado=ahora,
+        error="El worker se cayó procesando este archivo en el último intento.",
+    )
+    return agotados + colgados.update(estado=TrabajoMedia.PENDIENTE)
+
+
+def reintentar(pk):
+    """
+    Vuelve a poner en la cola un trabajo en ERROR. Los de archivos subidos
+    solo si todavia tienen la copia en espera.
+    """
+    return TrabajoMedia.objects.filter(
+        Q(destino=derivadas.DESTINO) | ~Q(ruta=""),
+        pk=pk, estado=TrabajoMedia.ERROR,
+    ).update(estado=TrabajoMedia.PENDIENTE, intentos=0, error="")
+
+
+def purgar(dias):
+    """
+    Borra los trabajos terminados hace mas de ``dias`` dias y las copias en
+    espera de esa edad que ningun trabajo nombra (una request que fallo
+    despues de ``encolar``).
+    """
+    limite = timezone.now() - timedelta(days=dias)
+    borrados = TrabajoMedia.objects.filter(
+        estado=TrabajoMedia.LISTO, terminado__lt=limite,
+    ).delete()[0]
+    _descartar(_huerfanas(limite))
+    return borrados
+
+
+def _huerfanas(limite):
+    espera = _espera()
+    viejas = []
+    try:
+        for carpeta in espera.listdir(PREFIJO)[0]:
+            for nombre in espera.listdir(f"{PREFIJO}{carpeta}")[1]:
+                ruta = f"{PREFIJO}{carpeta}/{nombre}"
+                if espera.get_modified_time(ruta) < limite:
+                    viejas.append(ruta)
+    except (FileNotFoundError, NotImplementedError):
+        # Todavia no se encolo nada, o el storage no sabe listar/fechar
+        return []
+    usadas = set(TrabajoMedia.objects.filter(ruta__in=viejas).values_list("ruta", flat=True))
+    return [ruta for ruta in viejas if ruta not in usadas]
+
+
+def resumen():
+    """``{estado: cantidad}`` de toda la cola, en una consulta."""
+    conteos = {estado: 0 for estado, _ in TrabajoMedia.ESTADO_CHOICES}
+    for fila in TrabajoMedia.objects.values("estado").annotate(total=Count("id")).order_by():
+        conteos[fila["estado"]] = fila["total"]
+    return conteos
+
+
+def recientes(limite=100):
+    """Ultimos trabajos para el panel."""
+    return TrabajoMedia.objects.select_related("user").order_by("-id")[:limite]
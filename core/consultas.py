@@ -0,0 +1,187 @@
+# core/consultas.py
+"""
+Consultas reutilizables para las vistas publicas.
+
+Cada funcion devuelve querysets con los prefetch necesarios para que la
+plantilla no dispare consultas extra por fila (N+1).
+"""
+from django.core.paginator import Paginator
+from django.db.models import Count, Prefetch
+
+from .models import (
+    Autor, Investigacion, InvestigacionFoto, InvestigacionIntegrante,
+    Publicacion, PublicacionImagen, PublicacionIntegrante,
+)
+
+
+PUBLICACIONES_POR_PAGINA = 12
+
+# Cantidad de integrantes que muestra cada tarjeta del listado
+INTEGRANTES_POR_TARJETA = 3
+
+# Maximo de publicaciones que acepta una sola llamada a la API del modal
+PUBLICACIONES_POR_LOTE = 50
+
+
+def publicaciones_listado():
+    """
+    Publicaciones ordenadas por fecha con la primera imagen y los primeros
+    integrantes ya cargados. La cantidad de consultas es fija (1 + 2 prefetch)
+    sin importar cuantas filas haya.
+
+    En cada publicacion quedan disponibles:
+      - ``primera_imagen``: lista con 0 o 1 ``PublicacionImagen``
+      - ``integrantes_preview``: lista de ``PublicacionIntegrante`` con ``integrante``
+    """
+    return (
+        Publicacion.objects
+        .order_by("-fecha", "-id")
+        .prefetch_related(
+            Prefetch(
+                "imagenes",
+                queryset=PublicacionImagen.objects.order_by("orden", "id")[:1],
+                to_attr="primera_imagen",
+            ),
+            Prefetch(
+                "publicacionintegrante_set",
+                queryset=(
+                    PublicacionIntegrante.objects
+                    .select_related("integrante")
+                    .only("id", "publicacion_id", "orden", "rol", "integrante__id", "integrante__nombre")
+                    .order_by("orden", "id")[:INTEGRANTES_POR_TARJETA]
+                ),
+                to_attr="integrantes_preview",
+            ),
+        )
+    )
+
+
+def publicaciones_anios():
+    """Años con publicaciones (desc), resueltos con una sola consulta DISTINCT."""
+    return [d.year for d in Publicacion.objects.dates("fecha", "year", order="DESC")]
+
+
+def paginar(queryset, page, por_pagina=PUBLICACIONES_POR_PAGINA):
+    """Pagina un queryset; numeros de pagina invalidos caen en la primera/ultima."""
+    return Paginator(queryset, por_pagina).get_page(page)
+
+
+def publicacion_detalle():
+    """
+    Publicacion con imagenes, videos, archivos e integrantes (con su Equipo)
+    para la pagina de detalle y el formulario de edicion: 5 consultas fijas.
+    """
+    return (
+        Publicacion.objects
+        .prefetch_related(
+            "imagenes",
+            "videos",
+            "archivos",
+            Prefetch(
+                "publicacionintegrante_set",
+                queryset=PublicacionIntegrante.objects.select_related("integrante").order_by("orden", "id"),
+            ),
+        )
+    )
+
+
+def publicaciones_panel():
+    """Listado del panel: autores (con su User) y cantidad de archivos, 2 consultas."""
+    return (
+        Publicacion.objects
+        .order_by("-fecha")
+        .annotate(total_archivos=Count("archivos"))
+        .prefetch_related(
+            Prefetch("autores_detalle", queryset=Autor.objects.select_related("user")),
+        )
+    )
+
+
+def publicaciones_modal(ids):
+    """
+    Publicaciones pedidas por el modal, en 3 consultas sin importar cuantas
+    sean: la fila con los conteos de archivos/videos, la primera imagen y los
+    integrantes con su Equipo.
+    """
+    return (
+        Publicacion.objects
+        .filter(pk__in=ids)
+        .annotate(
+            total_archivos=Count("archivos", distinct=True),
+            total_videos=Count("videos", distinct=True),
+        )
+        .prefetch_related(
+            Prefetch(
+                "imagenes",
+                queryset=PublicacionImagen.objects.order_by("orden", "id")[:1],
+                to_attr="primera_imagen",
+            ),
+            Prefetch(
+                "publicacionintegrante_set",
+                queryset=(
+                    PublicacionIntegrante.objects
+                    .select_related("integrante")
+                    .only("id", "publicacion_id", "orden", "rol", "integrante__id", "integrante__nombre")
+                    .order_by("orden", "id")
+                ),
+                to_attr="integrantes_modal",
+            ),
+        )
+    )
+
+
+def publicacion_modal_json(publicacion):
+    """Payload compacto de una publicacion de ``publicaciones_modal``."""
+    imagen = publicacion.primera_imagen[0].imagen if publicacion.primera_imagen else None
+    return {
+        'id': publicacion.pk,
+        'titulo': publicacion.titulo,
+        'autores': publicacion.autores,
+        'resumen': publicacion.resumen,
+        'fecha': publicacion.fecha.strftime('%d %b %Y') if publicacion.fecha else 'Sin fecha',
+        'imagen': imagen.url if imagen else '',
+        'archivos': publicacion.total_archivos,
+        'videos': publicacion.total_videos,
+        'integrantes': [
+            {'id': integ.integrante_id, 'nombre': integ.integrante.nombre, 'rol': integ.rol}
+            for integ in publicacion.integrantes_modal
+        ],
+    }
+
+
+def investigaciones_listado():
+    """
+    Investigaciones con la primera foto y la cantidad de archivos, en 2
+    consultas. ``primera_foto`` es una lista con 0 o 1 ``InvestigacionFoto``.
+    """
+    return (
+        Investigacion.objects
+        .order_by("-fecha")
+        .annotate(total_archivos=Count("archivos"))
+        .prefetch_related(
+            Prefetch(
+                "fotos",
+                queryset=InvestigacionFoto.objects.order_by("orden", "id")[:1],
+                to_attr="primera_foto",
+            ),
+        )
+    )
+
+
+def investigacion_detalle():
+    """
+    Investigacion con responsable, fotos, integrantes (con su Equipo) y
+    archivos: 4 consultas en total, sin importar cuantas filas tenga.
+    """
+    return (
+        Investigacion.objects
+        .select_related("user")
+        .prefetch_related(
+            "fotos",
+            "archivos",
+            Prefetch(
+                "investigacionintegrante_set",
+                queryset=InvestigacionIntegrante.objects.select_related("integrante").order_by("orden", "id"),
+            ),
+        )
+    )
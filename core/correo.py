@@ -0,0 +1,181 @@
+# core/correo.py
+"""
+Bandeja de salida de correo, guardada en la base (``CorreoSaliente``).
+
+``send_mail`` dentro de la request dejaba al worker esperando al servidor
+SMTP (hasta ``EMAIL_TIMEOUT``, o para siempre sin el) y, si fallaba, el
+mensaje se perdia. Ahora la vista solo llama a ``encolar`` (un INSERT) y el
+worker (``manage.py enviar_correos``) hace el resto:
+
+- ``tomar`` reclama un lote de pendientes con un UPDATE condicionado al
+  estado y una marca propia, asi varios workers no mandan dos veces lo mismo;
+- ``enviar`` abre una sola conexion SMTP para todo el lote (si se corta a
+  mitad de camino se abre otra para lo que falta);
+- lo que falla vuelve a la cola con espera exponencial (``ESPERA_BASE``,
+  el doble en cada intento, hasta ``ESPERA_MAXIMA``) y queda en ERROR al
+  llegar a ``MAX_INTENTOS``.
+
+``resumen`` y ``en_espera`` dan la profundidad de la cola para el panel.
+"""
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import CorreoSaliente
+
+
+MAX_INTENTOS = 8
+LOTE = 50
+
+# Segundos antes del primer reintento; se duplica en cada uno
+ESPERA_BASE = 30
+ESPERA_MAXIMA = 6 * 60 * 60
+
+# Un lote en ENVIANDO por mas de esto se considera de un worker caido
+MINUTOS_COLGADO = 15
+
+
+def encolar(asunto, cuerpo, destinatarios, remitente=None, responder_a=""):
+    """Deja un mensaje en la bandeja de salida y lo devuelve."""
+    return CorreoSaliente.objects.create(
+        asunto=asunto[:255],
+        cuerpo=cuerpo,
+        remitente=remitente or settings.DEFAULT_FROM_EMAIL,
+        destinatarios=list(destinatarios),
+        responder_a=responder_a[:254],
+    )
+
+
+def tomar(limite=LOTE):
+    """
+    Reclama hasta ``limite`` mensajes listos para salir (los mas viejos) y
+    los devuelve. Lo que otro worker gano en el medio no se incluye.
+    """
+    ahora = timezone.now()
+    ids = list(
+        CorreoSaliente.objects
+        .filter(estado=CorreoSaliente.PENDIENTE, proximo_intento__lte=ahora)
+        .order_by("proximo_intento", "id")
+        .values_list("id", flat=True)[:limite]
+    )
+    if not ids:
+        return []
+    marca = uuid.uuid4().hex
+    CorreoSaliente.objects.filter(pk__in=ids, estado=CorreoSaliente.PENDIENTE).update(
+        estado=CorreoSaliente.ENVIANDO, reclamo=marca, iniciado=ahora, intentos=F("intentos") + 1,
+    )
+    return list(CorreoSaliente.objects.filter(pk__in=ids, reclamo=marca, estado=CorreoSaliente.ENVIANDO))
+
+
+def _mensaje(correo, conexion):
+    return EmailMessage(
+        subject=correo.asunto,
+        body=correo.cuerpo,
+        from_email=correo.remitente,
+        to=correo.destinatarios,
+        reply_to=[correo.responder_a] if correo.responder_a else None,
+        connection=conexion,
+    )
+
+
+def enviar(correos, conexion=None):
+    """
+    Manda ``correos`` (ya reclamados con ``tomar``) por una sola conexion.
+    Devuelve ``(enviados, fallidos)``.
+    """
+    conexion = conexion or get_connection(fail_silently=False)
+    enviados, fallidos = [], []
+    abierta = False
+    try:
+        for i, correo in enumerate(correos):
+            if not abierta:
+                try:
+                    conexion.open()
+                    abierta = True
+                except Exception as e:
+                    # Sin servidor no tiene sentido probar uno por uno
+                    fallidos.extend((c, e) for c in correos[i:])
+                    break
+            try:
+                conexion.send_messages([_mensaje(correo, conexion)])
+                enviados.append(correo.pk)
+            except Exception as e:
+                fallidos.append((correo, e))
+                # La conexion puede haber quedado inservible: el proximo abre otra
+                _cerrar(conexion)
+                abierta = False
+    finally:
+        if abierta:
+            _cerrar(conexion)
+
+    if enviados:
+        CorreoSaliente.objects.filter(pk__in=enviados).update(
+            estado=CorreoSaliente.ENVIADO, enviado=timezone.now(), error="", reclamo="",
+        )
+    for correo, error in fallidos:
+        _fallar(correo, error)
+    return len(enviados), len(fallidos)
+
+
+def _cerrar(conexion):
+    try:
+        conexion.close()
+    except Exception:
+        pass
+
+
+def espera(intentos):
+    """Segundos hasta el proximo intento despues de ``intentos`` fallidos."""
+    return min(ESPERA_BASE * 2 ** max(intentos - 1, 0), ESPERA_MAXIMA)
+
+
+def _fallar(correo, error):
+    ahora = timezone.now()
+    if correo.intentos >= MAX_INTENTOS:
+        cambios = {"estado": CorreoSaliente.ERROR}
+    else:
+        cambios = {
+            "estado": CorreoSaliente.PENDIENTE,
+            "proximo_intento": ahora + timedelta(seconds=espera(correo.intentos)),
+        }
+    CorreoSaliente.objects.filter(pk=correo.pk).update(error=str(error)[:1000], reclamo="", **cambios)
+
+
+def recuperar_colgados(minutos=MINUTOS_COLGADO):
+    """
+    Devuelve a la cola los mensajes que un worker reclamo y nunca termino.
+    Como en ``_fallar``, los que ya usaron ``MAX_INTENTOS`` pasan a ERROR:
+    un mensaje que tira abajo al worker no se reintenta para siempre.
+    """
+    limite = timezone.now() - timedelta(minutes=minutos)
+    colgados = CorreoSaliente.objects.filter(estado=CorreoSaliente.ENVIANDO, iniciado__lt=limite)
+    agotados = colgados.filter(intentos__gte=MAX_INTENTOS).update(
+        estado=CorreoSaliente.ERROR, reclamo="", error="El envío quedó colgado en el último intento.",
+    )
+    return agotados + colgados.update(estado=CorreoSaliente.PENDIENTE, reclamo="")
+
+
+def purgar(dias):
+    """Borra los mensajes enviados hace mas de ``dias`` dias."""
+    limite = timezone.now() - timedelta(days=dias)
+    return CorreoSaliente.objects.filter(
+        estado=CorreoSaliente.ENVIADO, enviado__lt=limite,
+    ).delete()[0]
+
+
+def resumen():
+    """``{estado: cantidad}`` de toda la bandeja, en una consulta."""
+    conteos = {estado: 0 for estado, _ in CorreoSaliente.ESTADO_CHOICES}
+    for fila in CorreoSaliente.objects.values("estado").annotate(total=Count("id")).order_by():
+        conteos[fila["estado"]] = fila["total"]
+    return conteos
+
+
+def en_espera(conteos=None):
+    """Mensajes que todavia no salieron (pendientes o en envio)."""
+    conteos = conteos or resumen()
+    return conteos[CorreoSaliente.PENDIENTE] + conteos[CorreoSaliente.ENVIANDO]
@@ -0,0 +1,200 @@
+# core/derivadas.py
+"""
+Versiones reducidas de las imagenes subidas (anchos fijos en WebP y JPEG).
+
+Cuando se guarda una fila con imagen nueva, la signal llama a ``programar``;
+al confirmar la transaccion se deja un trabajo en la cola de media y el
+worker (``manage.py procesar_media``) ejecuta ``generar``: abre el original
+con Pillow, escribe cada ancho en el storage y guarda el resultado en el
+campo ``derivadas`` de la fila:
+
+    {"origen": "noticias/foto.jpg", "ancho": 4032, "alto": 3024,
+     "webp": [[320, url], [640, url], ...], "jpeg": [[320, url], ...],
+     "rutas": ["derivadas/noticias/foto-320w.webp", ...]}
+
+Las URLs quedan resueltas (como ``Evento.descargas``) para que el tag
+``imagen_responsive`` arme el ``srcset`` sin tocar el storage. Si
+``origen`` no coincide con el archivo actual las derivadas se ignoran.
+"""
+import io
+import posixpath
+import threading
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from . import paginas, validadores
+from .models import (
+    Evento, Investigacion, InvestigacionFoto, Noticia, NoticiaImagen,
+    PublicacionImagen, TrabajoMedia,
+)
+
+
+ANCHOS = (320, 640, 1024, 1600)
+
+# (clave en ``derivadas``, formato de Pillow, opciones de guardado)
+FORMATOS = (
+    ("webp", "WEBP", {"quality": 80, "method": 4}),
+    ("jpeg", "JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+)
+
+CARPETA = "derivadas"
+
+# Valor de ``TrabajoMedia.destino`` para los trabajos de este modulo
+DESTINO = "derivadas"
+
+# clave: (modelo, campo de imagen)
+CAMPOS = {
+    "noticia": (Noticia, "imagen"),
+    "noticia_imagen": (NoticiaImagen, "imagen"),
+    "investigacion": (Investigacion, "imagen_portada"),
+    "investigacion_foto": (InvestigacionFoto, "foto"),
+    "publicacion_imagen": (PublicacionImagen, "imagen"),
+    "evento": (Evento, "imagen_portada"),
+}
+
+_CLAVES = {modelo: clave for clave, (modelo, _) in CAMPOS.items()}
+
+
+def campo_de(obj):
+    """Nombre del campo de imagen de ``obj`` (None si el modelo no tiene derivadas)."""
+    clave = _CLAVES.get(type(obj))
+    return CAMPOS[clave][1] if clave else None
+
+
+def vigentes(obj):
+    """Derivadas de ``obj`` si corresponden al archivo actual; si no, ``{}``."""
+    campo = campo_de(obj)
+    archivo = getattr(obj, campo, None) if campo else None
+    datos = getattr(obj, "derivadas", None) or {}
+    if archivo and datos.get("origen") == archivo.name:
+        return datos
+    return {}
+
+
+def desactualizadas(obj):
+    """True si hay que (re)generar o borrar las derivadas de ``obj``."""
+    archivo = getattr(obj, campo_de(obj))
+    datos = obj.derivadas or {}
+    if not archivo:
+        return bool(datos)
+    return datos.get("origen") != archivo.name
+
+
+def _escalar(img, ancho):
+    if ancho >= img.width:
+        return img
+    alto = max(1, round(img.height * ancho / img.width))
+    return img.resize((ancho, alto), Image.LANCZOS)
+
+
+def _para_jpeg(img):
+    # JPEG no tiene transparencia: se apoya sobre fondo blanco
+    if img.mode in ("RGBA", "LA", "P"):
+        img = img.convert("RGBA")
+        fondo = Image.new("RGB", img.size, (255, 255, 255))
+        fondo.paste(img, mask=img.getchannel("A"))
+        return fondo
+    return img if img.mode in ("RGB", "L") else img.convert("RGB")
+
+
+def _crear(archivo):
+    storage = archivo.storage
+    with archivo.open("rb") as f:
+        img = Image.open(f)
+        # Con JPEG grandes se decodifica directamente a menor escala (nunca
+        # por debajo del ancho mayor, en cualquier orientacion)
+        img.draft("RGB", (ANCHOS[-1], ANCHOS[-1]))
+        img.load()
+    img = ImageOps.exif_transpose(img)
+    anchos = [a for a in ANCHOS if a < img.width] or [img.width]
+    base = posixpath.splitext(archivo.name)[0]
+
+    datos = {"origen": archivo.name, "ancho": img.width, "alto": img.height, "rutas": []}
+    for clave, formato, opciones in FORMATOS:
+        if formato == "JPEG":
+            fuente = _para_jpeg(img)
+        elif img.mode in ("RGB", "RGBA"):
+            fuente = img
+        else:
+            fuente = img.convert("RGBA" if img.mode in ("LA", "P", "PA") else "RGB")
+        lista = []
+        for a in anchos:
+            buf = io.BytesIO()
+            _escalar(fuente, a).save(buf, formato, **opciones)
+            ruta = storage.save(f"{CARPETA}/{base}-{a}w.{clave}", ContentFile(buf.getvalue()))
+            datos["rutas"].append(ruta)
+            lista.append([a, storage.url(ruta)])
+        datos[clave] = lista
+    return datos
+
+
+def _borrar(storage, rutas):
+    for ruta in rutas:
+        try:
+            storage.delete(ruta)
+        except Exception:
+            pass
+
+
+def generar(clave, pk, forzar=False):
+    """
+    (Re)genera las derivadas de la fila ``pk`` del modelo ``clave``. Si la
+    imagen se quito, borra las anteriores. Devuelve el dict guardado.
+    """
+    modelo, campo = CAMPOS[clave]
+    obj = modelo.objects.filter(pk=pk).first()
+    if obj is None:
+        return {}
+    if not forzar and not desactualizadas(obj):
+        return obj.derivadas
+
+    archivo = getattr(obj, campo)
+    anteriores = (obj.derivadas or {}).get("rutas", [])
+    datos = _crear(archivo) if archivo else {}
+
+    cambios = {"derivadas": datos}
+    if modelo in (Noticia, Investigacion, Evento):
+        # fecha_actualizacion es el validador de ETag/Last-Modified (core.validadores)
+        cambios["fecha_actualizacion"] = timezone.now()
+    modelo.objects.filter(pk=pk).update(**cambios)
+    validadores.tocar_padres(obj)
+    # update() no dispara señales: el srcset nuevo tiene que llegar a las paginas cacheadas
+    paginas.invalidar_objeto(obj)
+
+    _borrar(getattr(obj, campo).storage, [r for r in anteriores if r not in datos.get("rutas", [])])
+    return datos
+
+
+_pendientes = threading.local()
+
+
+def programar(obj):
+    """
+    Pide derivadas nuevas para ``obj``. Como ``portadas.programar_resolucion``
+    junta lo pedido en la transaccion; al confirmar se encola en la cola de
+    media un trabajo por fila (si no habia uno pendiente).
+    """
+    lote = getattr(_pendientes, "lote", None)
+    if lote is None:
+        lote = _pendientes.lote = set()
+    lote.add((_CLAVES[type(obj)], obj.pk))
+    transaction.on_commit(_ejecutar_pendientes)
+
+
+def _ejecutar_pendientes():
+    lote = getattr(_pendientes, "lote", None) or set()
+    _pendientes.lote = None
+    if not lote:
+        return
+    ya_pendientes = set(
+        TrabajoMedia.objects
+        .filter(destino=DESTINO, estado=TrabajoMedia.PENDIENTE, objeto_id__in={pk for _, pk in lote})
+        .values_list("nombre", "objeto_id")
+    )
+    TrabajoMedia.objects.bulk_create([
+        TrabajoMedia(destino=DESTINO, objeto_id=pk, nombre=clave, nombre_original=f"{clave} #{pk}")
+        for clave, pk in sorted(lote - ya_pendientes)
+    ])
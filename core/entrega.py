@@ -0,0 +1,176 @@
+# core/entrega.py
+"""
+Entrega de la media guardada en disco (``FileSystemStorage``) en produccion.
+
+``django.conf.urls.static`` solo sirve ``MEDIA_URL`` con ``DEBUG`` y no
+entiende ``Range``, asi que un video no se podia adelantar. ``servir``:
+
+- responde 304 con ``If-None-Match``/``If-Modified-Since``;
+- responde 206 a un ``Range: bytes=...`` (un solo rango; si pide varios se
+  manda el archivo entero, que el RFC permite) y 416 si no se puede cumplir;
+- con ``MEDIA_ENVIO`` delega la transferencia al servidor web
+  (``X-Accel-Redirect`` de nginx o ``X-Sendfile`` de Apache/lighttpd), que
+  ya resuelve los rangos; si no, transmite el archivo con ``FileResponse``
+  por bloques, sin leerlo entero;
+- los blobs de ``core.almacenamiento`` se nombran por su SHA-256, su
+  contenido no cambia nunca y se cachean por un año como ``immutable``. El
+  resto se revalida en cada uso (un 304 es barato).
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+from .almacenamiento import es_blob
+
+
+BLOQUE = 64 * 1024
+UN_ANIO = 365 * 24 * 60 * 60
+
+_RANGO = re.compile(r"^bytes=(\d*)-(\d*)$")
+_SHA256 = re.compile(r"[0-9a-f]{64}")
+
+
+def _ruta(nombre):
+    try:
+        ruta = safe_join(settings.MEDIA_ROOT, nombre)
+    except Exception:
+        # Rutas que salen de MEDIA_ROOT (../)
+        raise Http404
+    if not os.path.isfile(ruta):
+        raise Http404
+    return ruta
+
+
+def _etag(nombre, estado):
+    if es_blob(nombre):
+        # El nombre ya es el hash del contenido
+        sha = _SHA256.search(posixpath.basename(nombre))
+        if sha:
+            return quote_etag(sha.group(0))
+    return quote_etag(f"{estado.st_mtime_ns:x}-{estado.st_size:x}")
+
+
+def rango(cabecera, tamano):
+    """
+    ``(inicio, fin)`` inclusivo pedido en ``cabecera``; ``None`` si no hay
+    rango usable (se manda todo) y ``False`` si no se puede cumplir (416).
+    """
+    if not cabecera:
+        return None
+    encontrado = _RANGO.match(cabecera.strip())
+    if not encontrado:
+        # Varios rangos o una unidad que no es bytes
+        return None
+    inicio, fin = encontrado.groups()
+    if not inicio and not fin:
+        return None
+    if inicio and fin and int(fin) < int(inicio):
+        # "bytes=500-10" no es un rango valido y se ignora (RFC 9110, 14.1.1)
+        return None
+    if tamano == 0:
+        # Un archivo vacio no tiene ningun byte que recortar
+        return False
+    if not inicio:
+        # "bytes=-500": los ultimos 500
+        largo = int(fin)
+        if largo == 0:
+            return False
+        return max(0, tamano - largo), tamano - 1
+    inicio = int(inicio)
+    fin = min(int(fin), tamano - 1) if fin else tamano - 1
+    if inicio >= tamano:
+        return False
+    return inicio, fin
+
+
+def _vigente(request, etag, modificado):
+    # If-Range: el rango solo vale si el cliente tiene la version actual
+    condicion = request.headers.get("If-Range")
+    if not condicion:
+        return True
+    if condicion.startswith(('"', 'W/"')):
+        return condicion == etag
+    fecha = parse_http_date_safe(condicion)
+    return fecha is not None and fecha >= int(modificado)
+
+
+class _Tramo:
+    """Lector de ``largo`` bytes desde ``inicio``, para el cuerpo de un 206."""
+
+    def __init__(self, archivo, inicio, largo):
+        self.archivo = archivo
+        self.restante = largo
+        archivo.seek(inicio)
+
+    def read(self, n=-1):
+        if self.restante <= 0:
+            return b""
+        n = self.restante if n is None or n < 0 else min(n, self.restante)
+        datos = self.archivo.read(n)
+        self.restante -= len(datos)
+        return datos
+
+    def close(self):
+        self.archivo.close()
+
+
+def _cachear(response, nombre):
+    if es_blob(nombre):
+        patch_cache_control(response, public=True, max_age=UN_ANIO, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+
+
+def servir(request, nombre):
+    ruta = _ruta(nombre)
+    estado = os.stat(ruta)
+    etag = _etag(nombre, estado)
+    modificado = estado.st_mtime
+
+    respuesta = get_conditional_response(request, etag=etag, last_modified=int(modificado))
+    if respuesta is None:
+        respuesta = _respuesta(request, nombre, ruta, estado.st_size, etag, modificado)
+    respuesta["ETag"] = etag
+    respuesta["Last-Modified"] = http_date(modificado)
+    respuesta["Accept-Ranges"] = "bytes"
+    _cachear(respuesta, nombre)
+    return respuesta
+
+
+def _respuesta(request, nombre, ruta, tamano, etag, modificado):
+    tipo = mimetypes.guess_type(ruta)[0] or "application/octet-stream"
+
+    envio = getattr(settings, "MEDIA_ENVIO", "")
+    if envio:
+        # El servidor web lee el archivo y atiende el Range por su cuenta
+        respuesta = HttpResponse(content_type=tipo)
+        if envio == "x-accel-redirect":
+            respuesta["X-Accel-Redirect"] = settings.MEDIA_ENVIO_PREFIJO + quote(nombre)
+        else:
+            respuesta["X-Sendfile"] = ruta
+        return respuesta
+
+    pedido = rango(request.headers.get("Range"), tamano) if _vigente(request, etag, modificado) else None
+    if pedido is False:
+        respuesta = HttpResponse(status=416)
+        respuesta["Content-Range"] = f"bytes */{tamano}"
+        return respuesta
+
+    archivo = open(ruta, "rb")
+    if pedido is None:
+        respuesta = FileResponse(archivo, content_type=tipo)
+    else:
+        inicio, fin = pedido
+        respuesta = FileResponse(_Tramo(archivo, inicio, fin - inicio + 1), content_type=tipo, status=206)
+        respuesta["Content-Length"] = fin - inicio + 1
+        respuesta["Content-Range"] = f"bytes {inicio}-{fin}/{tamano}"
+    respuesta.block_size = BLOQUE
+    return respuesta
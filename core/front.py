@@ -0,0 +1,368 @@
+# core/front.py
+"""
+Paquete del front: Bootstrap, AOS, animate.css, hover.css y bootstrap-icons
+en una sola hoja de estilos y un solo script servidos desde ``static/``.
+
+base.html pedia cada libreria entera a tres CDN distintos (un DNS/TLS mas
+por cada uno en la primera visita) y usamos una parte chica de cada una.
+``manage.py construir_front``:
+
+- descarga una vez las versiones fijadas en ``FUENTES`` a ``front/vendor/``.
+  No va en ``static/``: collectstatic publicaria las
+  librerias enteras, y sus ``sourceMappingURL`` apuntan a ``.map`` que no
+  estan, con lo que el storage con manifest fallaria;
+- ``purgar`` saca de las hojas de las librerias las reglas cuyas clases no
+  aparecen en las plantillas, el codigo Python ni los scripts (``usadas``);
+- concatena y minifica en ``static/front/giese.css`` (con
+  ``static/css/sitio.css`` al final) y ``static/front/giese.js``, y copia las
+  fuentes de los iconos a ``static/front/fonts/``.
+
+collectstatic (``CompressedManifestStaticFilesStorage``) le pone el hash del
+contenido al nombre y deja las versiones ``.gz`` y ``.br`` (``.br`` con el
+paquete Brotli instalado). WhiteNoise sirve los nombres con hash como
+``immutable`` por diez años: cualquier cambio sale con otro nombre.
+
+El paquete todavia no esta armado: de ``front/vendor/`` solo esta
+``bootstrap.min.css`` (lo usan las pruebas de ``purgar``) y no hay
+``static/front/``. Mientras no exista, base.html sigue pidiendo las librerias
+a los CDN (``armado``), que es lo que se sirve hoy. Para pasar al paquete hay
+que correr ``construir_front`` con acceso a los CDN y versionar
+``front/vendor/`` completo y ``static/front/``; despues, volver a armarlo al
+usar en una plantilla una clase de Bootstrap (o de las otras) que antes no se
+usaba.
+"""
+import base64
+import hashlib
+import re
+import shutil
+import urllib.request
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+
+
+VENDOR = Path(settings.BASE_DIR) / "front" / "vendor"
+SALIDA = Path(settings.BASE_DIR) / "static" / "front"
+SITIO_CSS = Path(settings.BASE_DIR) / "static" / "css" / "sitio.css"
+
+CSS = "front/giese.css"
+JS = "front/giese.js"
+
+# Archivo en front/vendor/ -> (URL con la version fijada, integridad SRI o "")
+FUENTES = {
+    "bootstrap.min.css": (
+        "https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css",
+        "sha384-T3c6CoIi6uLrA9TneNEoa7RxnatzjcDSCmG1MXxSR1GAsXEV/Dwwykc2MPK8M2HN",
+    ),
+    "aos.css": ("https://cdn.jsdelivr.net/npm/aos@2.3.4/dist/aos.css", ""),
+    "animate.min.css": ("https://cdnjs.cloudflare.com/ajax/libs/animate.css/4.1.1/animate.min.css", ""),
+    "hover-min.css": ("https://cdnjs.cloudflare.com/ajax/libs/hover.css/2.3.2/css/hover-min.css", ""),
+    "bootstrap-icons.css": ("https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.3/font/bootstrap-icons.css", ""),
+    "fonts/bootstrap-icons.woff2": (
+        "https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.3/font/fonts/bootstrap-icons.woff2", "",
+    ),
+    "fonts/bootstrap-icons.woff": (
+        "https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.3/font/fonts/bootstrap-icons.woff", "",
+    ),
+    "bootstrap.bundle.min.js": (
+        "https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/js/bootstrap.bundle.min.js",
+        "sha384-C6RzsynM9kWDrMNeT87bh95OGNyZPhcTNXj1NW7RuBCsyN/o0jlpcV8Qyq46cDfL",
+    ),
+    "aos.js": ("https://cdn.jsdelivr.net/npm/aos@2.3.4/dist/aos.js", ""),
+}
+
+# En el orden en que las cargaba base.html
+HOJAS = ["bootstrap.min.css", "aos.css", "animate.min.css", "bootstrap-icons.css", "hover-min.css"]
+SCRIPTS = ["bootstrap.bundle.min.js", "aos.js"]
+
+_TOKEN = re.compile(r"[A-Za-z0-9_-]+")
+# "alert-{{ message.tags }}": se conservan todas las clases con ese prefijo
+_PREFIJO = re.compile(r"([A-Za-z][\w-]*-)\{[{%]")
+_CADENA = r""""(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'"""
+_COMENTARIO = re.compile(rf"({_CADENA})|/\*(.*?)\*/", re.S)
+_ESPACIOS = re.compile(rf"({_CADENA})|\s+")
+_COMBINADOR = re.compile(rf"({_CADENA})|\s*([,>~+])\s*")
+_CLASE = re.compile(r"\.(-?[A-Za-z_][\w-]*)")
+_MAPA_JS = re.compile(r"^//# sourceMappingURL=.*$", re.M)
+_CHARSET = re.compile(r'^@charset "[^"]*";\n?', re.I)
+
+
+@lru_cache(maxsize=None)
+def armado():
+    """True si el paquete ya esta en static/ (si no, base.html usa los CDN)."""
+    return bool(finders.find(CSS) and finders.find(JS))
+
+
+# ------------------ Descarga ------------------
+
+def _integridad(datos, esperada):
+    algoritmo = esperada.split("-", 1)[0]
+    resumen = base64.b64encode(hashlib.new(algoritmo, datos).digest()).decode()
+    return f"{algoritmo}-{resumen}" == esperada
+
+
+def descargar(actualizar=False):
+    """Baja a ``VENDOR`` lo que falta de ``FUENTES`` (todo con ``actualizar``). Devuelve los nombres bajados."""
+    bajados = []
+    for nombre, (url, integridad) in FUENTES.items():
+        destino = VENDOR / nombre
+        if destino.exists() and not actualizar:
+            continue
+        with urllib.request.urlopen(url, timeout=30) as respuesta:
+            datos = respuesta.read()
+        if integridad and not _integridad(datos, integridad):
+            raise ValueError(f"{nombre}: la integridad no coincide con {integridad}")
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        destino.write_bytes(datos)
+        bajados.append(nombre)
+    return bajados
+
+
+# ------------------ Clases usadas ------------------
+
+def _contenido():
+    base = Path(settings.BASE_DIR)
+    rutas = list((base / "templates").rglob("*.html"))
+    # Sin las pruebas: nombran clases (para verificar que se purgan) que el sitio no usa
+    rutas += [p for p in (base / "core").rglob("*.py") if p.name != "tests.py"]
+    rutas += [p for p in (base / "static").rglob("*.js") if SALIDA not in p.parents]
+    # Las clases que agregan los scripts (show, collapsing, aos-animate, ...)
+    rutas += [VENDOR / nombre for nombre in SCRIPTS]
+    for ruta in rutas:
+        if not ruta.exists():
+            continue
+        yield ruta.suffix, ruta.read_text(encoding="utf-8", errors="ignore")
+
+
+def usadas():
+    """``(tokens, prefijos)``: toda palabra que podria ser una clase, y los prefijos armados en plantillas."""
+    tokens, prefijos = set(), set()
+    for sufijo, texto in _contenido():
+        tokens.update(_TOKEN.findall(texto))
+        if sufijo == ".html":
+            prefijos.update(_PREFIJO.findall(texto))
+    return tokens, tuple(sorted(prefijos))
+
+
+# ------------------ CSS ------------------
+
+def _fin_cadena(texto, i):
+    comilla = texto[i]
+    i += 1
+    while i < len(texto) and texto[i] != comilla:
+        i += 2 if texto[i] == "\\" else 1
+    return i + 1
+
+
+def _partir(texto, separador):
+    """Parte ``texto`` en ``separador`` fuera de cadenas, parentesis y corchetes."""
+    partes, nivel, inicio, i = [], 0, 0, 0
+    while i < len(texto):
+        c = texto[i]
+        if c in "\"'":
+            i = _fin_cadena(texto, i)
+            continue
+        if c in "([":
+            nivel += 1
+        elif c in ")]":
+            nivel -= 1
+        elif c == separador and nivel == 0:
+            partes.append(texto[inicio:i])
+            inicio = i + 1
+        i += 1
+    partes.append(texto[inicio:])
+    return partes
+
+
+def _arbol(css):
+    """
+    ``[(preludio, cuerpo)]``: ``cuerpo`` es None en sentencias (``@import``),
+    una lista de nodos en bloques con reglas (``@media``, ``@keyframes``) y
+    el texto de las declaraciones en el resto.
+    """
+    nodos, inicio, i = [], 0, 0
+    while i < len(css):
+        c = css[i]
+        if c in "\"'":
+            i = _fin_cadena(css, i)
+            continue
+        if c == ";":
+            if css[inicio:i].strip():
+                nodos.append((css[inicio:i].strip(), None))
+            inicio = i + 1
+        elif c == "{":
+            nivel, j = 1, i + 1
+            while nivel and j < len(css):
+                if css[j] in "\"'":
+                    j = _fin_cadena(css, j)
+                    continue
+                nivel += {"{": 1, "}": -1}.get(css[j], 0)
+                j += 1
+            cuerpo = css[i + 1:j - 1]
+            anidado = "{" in re.sub(_CADENA, "", cuerpo)
+            nodos.append((css[inicio:i].strip(), _arbol(cuerpo) if anidado else cuerpo))
+            inicio = i = j
+            continue
+        i += 1
+    return nodos
+
+
+def _clases(selector):
+    # Lo de :not(...)/:is(...) y los atributos no hace falta que este
+    while True:
+        limpio = re.sub(r"\([^()]*\)|\[[^\[\]]*\]", "", selector)
+        if limpio == selector:
+            return _CLASE.findall(limpio)
+        selector = limpio
+
+
+def _sirve(selector, tokens, prefijos):
+    if "\\" in selector:
+        # Clases escapadas: no se intenta entenderlas
+        return True
+    return all(clase in tokens or clase.startswith(prefijos) for clase in _clases(selector))
+
+
+def _podar(nodos, tokens, prefijos):
+    podados = []
+    for preludio, cuerpo in nodos:
+        if isinstance(cuerpo, list):
+            if not preludio.startswith("@"):
+                podados.append((preludio, cuerpo))
+                continue
+            hijos = cuerpo if "keyframes" in preludio else _podar(cuerpo, tokens, prefijos)
+            if hijos:
+                podados.append((preludio, hijos))
+        elif cuerpo is None or preludio.startswith("@"):
+            podados.append((preludio, cuerpo))
+        else:
+            selectores = [s for s in _partir(preludio, ",") if _sirve(s, tokens, prefijos)]
+            if selectores:
+                podados.append((",".join(selectores), cuerpo))
+    return podados
+
+
+def _declaraciones(nodos):
+    for preludio, cuerpo in nodos:
+        if isinstance(cuerpo, list):
+            if "keyframes" not in preludio:
+                yield from _declaraciones(cuerpo)
+        elif cuerpo:
+            yield cuerpo
+
+
+def _sin_animaciones_sueltas(nodos, nombres):
+    # animate.css trae ~100 @keyframes; quedan los que alguna regla nombra
+    resultado = []
+    for preludio, cuerpo in nodos:
+        if "keyframes" in preludio:
+            if preludio.split()[-1] not in nombres:
+                continue
+        elif isinstance(cuerpo, list):
+            cuerpo = _sin_animaciones_sueltas(cuerpo, nombres)
+            if not cuerpo:
+                continue
+        resultado.append((preludio, cuerpo))
+    return resultado
+
+
+def _espacios(texto):
+    return _ESPACIOS.sub(lambda m: m.group(1) or " ", texto).strip()
+
+
+def _escribir(nodos):
+    partes = []
+    for preludio, cuerpo in nodos:
+        preludio = _espacios(preludio)
+        if cuerpo is None:
+            partes.append(preludio + ";")
+            continue
+        if not preludio.startswith("@"):
+            preludio = _COMBINADOR.sub(lambda m: m.group(1) or m.group(2), preludio)
+        if isinstance(cuerpo, list):
+            partes.append(f"{preludio}{{{_escribir(cuerpo)}}}")
+        else:
+            declaraciones = []
+            for declaracion in _partir(cuerpo, ";"):
+                nombre, _, valor = declaracion.partition(":")
+                if nombre.strip():
+                    declaraciones.append(f"{nombre.strip()}:{_espacios(valor)}")
+            partes.append(f"{preludio}{{{';'.join(declaraciones)}}}")
+    return "".join(partes)
+
+
+def _comentarios(css):
+    """``(css sin comentarios, licencias)``: los ``/*! ... */`` se conservan aparte."""
+    licencias = []
+
+    def quitar(m):
+        if m.group(1):
+            return m.group(1)
+        if m.group(2).startswith("!"):
+            licencias.append(f"/*{m.group(2)}*/")
+        return ""
+
+    return _COMENTARIO.sub(quitar, css), licencias
+
+
+def _unir(licencias, nodos):
+    # @charset tiene que ser lo primero de la hoja, antes que las licencias
+    charset = [f"{_espacios(p)};" for p, c in nodos[:1] if c is None and p.lower().startswith("@charset")]
+    return "\n".join(charset + licencias + [_escribir(nodos[len(charset):])])
+
+
+def minificar(css):
+    sin_comentarios, licencias = _comentarios(css)
+    return _unir(licencias, _arbol(sin_comentarios))
+
+
+def purgar(css, tokens, prefijos=()):
+    """Minifica ``css`` sin las reglas que piden clases que no estan en ``tokens``."""
+    sin_comentarios, licencias = _comentarios(css)
+    nodos = _podar(_arbol(sin_comentarios), tokens, prefijos)
+    nombres = set(tokens)
+    for cuerpo in _declaraciones(nodos):
+        nombres.update(_TOKEN.findall(cuerpo))
+    nodos = _sin_animaciones_sueltas(nodos, nombres)
+    return _unir(licencias, nodos)
+
+
+# ------------------ Paquete ------------------
+
+def construir(purga=True):
+    """Arma ``CSS`` y ``JS`` en ``SALIDA`` desde ``VENDOR``. Devuelve ``{archivo: (bytes antes, bytes despues)}``."""
+    faltan = [nombre for nombre in FUENTES if not (VENDOR / nombre).exists()]
+    if faltan:
+        raise FileNotFoundError(f"Faltan en {VENDOR}: {', '.join(faltan)} (correr sin --sin-descarga)")
+
+    tokens, prefijos = usadas() if purga else (set(), ())
+    tamanos, hojas = {}, []
+    for nombre in HOJAS:
+        original = (VENDOR / nombre).read_text(encoding="utf-8")
+        hoja = purgar(original, tokens, prefijos) if purga else minificar(original)
+        if hojas:
+            # Solo vale el @charset del principio del paquete
+            hoja = _CHARSET.sub("", hoja)
+        tamanos[nombre] = (len(original.encode()), len(hoja.encode()))
+        hojas.append(hoja)
+    # Los estilos propios van al final, como antes en base.html, y no se purgan
+    sitio = SITIO_CSS.read_text(encoding="utf-8")
+    hojas.append(minificar(sitio))
+    tamanos[SITIO_CSS.name] = (len(sitio.encode()), len(hojas[-1].encode()))
+
+    # Ya vienen minificados; se quita el sourceMappingURL (el .map no se copia)
+    scripts = [_MAPA_JS.sub("", (VENDOR / nombre).read_text(encoding="utf-8")).strip() for nombre in SCRIPTS]
+
+    SALIDA.mkdir(parents=True, exist_ok=True)
+    # bootstrap-icons.css las pide en ./fonts/ relativo a la hoja
+    shutil.copytree(VENDOR / "fonts", SALIDA / "fonts", dirs_exist_ok=True)
+    css = "\n".join(filter(None, hojas)) + "\n"
+    js = "\n;\n".join(filter(None, scripts)) + "\n"
+    (SALIDA / Path(CSS).name).write_text(css, encoding="utf-8")
+    (SALIDA / Path(JS).name).write_text(js, encoding="utf-8")
+    tamanos[CSS] = (sum(a for a, _ in tamanos.values()), len(css.encode()))
+    tamanos[JS] = (sum(len((VENDOR / n).read_bytes()) for n in SCRIPTS), len(js.encode()))
+    armado.cache_clear()
+    return tamanos
@@ -0,0 +1,112 @@
+# core/galerias.py
+"""
+Edicion por item de las galerias (imagenes, fotos, videos y archivos).
+
+Antes, subir un solo archivo nuevo en la edicion borraba la galeria entera y
+habia que volver a subir todo. Ahora las altas se agregan al final
+(``agregar``), y quitar o reordenar (``quitar``, ``reordenar``) trabaja
+sobre las filas que ya estan, sin volver a transferir archivos. Los destinos
+son los mismos de ``core.cola``.
+"""
+from django.db import transaction
+from django.db.models import Max
+
+from . import cola, paginas, portadas, validadores
+from .models import Evento, TrabajoMedia
+
+
+class GaleriaError(Exception):
+    def __init__(self, mensaje, status=400):
+        super().__init__(mensaje)
+        self.status = status
+
+
+def destino(clave):
+    config = cola.DESTINOS.get(clave)
+    if config is None:
+        raise GaleriaError("Galería desconocida.", status=404)
+    return config
+
+
+def _filas(config, objeto):
+    return config.modelo.objects.filter(**{config.fk: objeto})
+
+
+def _item_json(config, fila):
+    archivo = getattr(fila, config.campo)
+    try:
+        url = archivo.url if archivo else ""
+    except Exception:
+        url = ""
+    return {
+        "id": fila.pk,
+        "orden": fila.orden,
+        "url": url,
+        "nombre": getattr(fila, "nombre", "") or (archivo.name.rsplit("/", 1)[-1] if archivo else ""),
+    }
+
+
+def listar(clave, objeto):
+    """Items de la galeria en orden, listos para JSON."""
+    config = destino(clave)
+    return [_item_json(config, f) for f in _filas(config, objeto).order_by("orden", "id")]
+
+
+def agregar(clave, objeto, archivos, nombres=(), user=None):
+    """
+    Encola ``archivos`` al final de la galeria: despues de las filas que ya
+    estan y de lo que todavia espera en la cola. Devuelve la cantidad encolada.
+    """
+    config = destino(clave)
+    ultimo = max(
+        _filas(config, objeto).aggregate(m=Max("orden"))["m"] or 0,
+        TrabajoMedia.objects.filter(
+            destino=clave, objeto_id=objeto.pk, estado__in=[TrabajoMedia.PENDIENTE, TrabajoMedia.PROCESANDO],
+        ).aggregate(m=Max("orden"))["m"] or 0,
+    )
+    return cola.encolar(clave, objeto, archivos, nombres, user=user, desde=ultimo + 1)
+
+
+def quitar(clave, objeto, ids):
+    """
+    Borra de la galeria los items ``ids``. Se borran con delete() del
+    queryset, que igual dispara las señales de cada fila. Devuelve cuantos se borraron.
+    """
+    config = destino(clave)
+    return _filas(config, objeto).filter(pk__in=ids).delete()[1].get(config.modelo._meta.label, 0)
+
+
+def reordenar(clave, objeto, ids):
+    """
+    Deja la galeria en el orden de ``ids`` (1, 2, ...). Los items que no
+    vienen en la lista quedan al final en su orden actual. Solo se escriben
+    las filas que cambian, con un unico ``bulk_update``. Un id que no es de
+    esta galeria (o repetido) rechaza todo el pedido.
+    """
+    config = destino(clave)
+    posicion = {pk: i for i, pk in enumerate(ids)}
+    filas = list(_filas(config, objeto).only("pk", "orden").order_by("orden", "id"))
+    if len(posicion) != len(ids) or not posicion.keys() <= {f.pk for f in filas}:
+        raise GaleriaError("La lista tiene items que no son de esta galería.")
+    filas.sort(key=lambda f: (f.pk not in posicion, posicion.get(f.pk, 0)))
+
+    cambiadas = []
+    for i, fila in enumerate(filas, start=1):
+        if fila.orden != i:
+            fila.orden = i
+            cambiadas.append(fila)
+    if cambiadas:
+        with transaction.atomic():
+            config.modelo.objects.bulk_update(cambiadas, ["orden"])
+            # bulk_update no dispara señales: se avisa a mano
+            _avisar(config, objeto)
+    return len(cambiadas)
+
+
+def _avisar(config, objeto):
+    paginas.invalidar_objeto(objeto)
+    # fecha_actualizacion es el validador de ETag/Last-Modified (core.validadores)
+    validadores.tocar(config.padre, pk=objeto.pk)
+    if config.padre is Evento:
+        # La portada es la primera imagen entre los archivos
+        portadas.programar_resolucion(objeto.pk)
@@ -0,0 +1,498 @@
+# core/importacion.py
+"""
+Importacion masiva de publicaciones desde BibTeX o CSV.
+
+Los archivos se leen de a una entrada (``entradas_bibtex``/``entradas_csv``
+son generadores), asi que el tamaño del archivo no importa. Cada entrada se
+convierte en un dict ``{"titulo", "autores", "fecha", "resumen", "archivo"}``.
+
+``importar`` escribe todo en una sola transaccion, de a ``LOTE`` entradas:
+un ``bulk_create`` de autores nuevos, uno de publicaciones y uno de
+``PublicacionAutor`` por lote. Con eso 10.000 entradas son unas pocas
+decenas de consultas.
+
+- Autores: se comparan por nombre normalizado (sin tildes, sin importar el
+  orden de las palabras, asi "Pérez, Juan" es "Juan Perez") contra los
+  ``Autor`` existentes y contra el nombre completo de los usuarios. Si el
+  nombre es el de un usuario sin ``Autor``, se le crea uno vinculado.
+- Publicaciones: se saltean las que ya existen (o se repiten en el archivo)
+  con el mismo titulo normalizado y el mismo año.
+
+Como ``bulk_create`` no dispara señales, ``nombres_busqueda`` y la fila
+FTS de cada publicacion se escriben aca mismo, y el indice de nombres de
+autores se invalida al confirmar.
+"""
+import csv
+import io
+import re
+import unicodedata
+from datetime import date
+from functools import lru_cache, partial
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from . import busqueda, nombres, paginas
+from .models import Autor, Publicacion, PublicacionAutor
+
+
+LOTE = 500
+
+# Errores que se guardan para mostrar (el resto solo se cuenta)
+MAX_ERRORES = 50
+
+_MESES = {
+    "jan": 1, "ene": 1, "feb": 2, "mar": 3, "apr": 4, "abr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "ago": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12, "dic": 12,
+}
+
+# Macros de mes predefinidas de BibTeX
+_MACROS = {m: str(n) for m, n in _MESES.items()}
+
+
+class ImportacionError(Exception):
+    pass
+
+
+class Resultado:
+    def __init__(self):
+        self.leidas = 0
+        self.creadas = 0
+        self.duplicadas = 0
+        self.autores_nuevos = 0
+        self.vinculos = 0
+        self.errores = []
+        self.total_errores = 0
+
+    def error(self, entrada, mensaje):
+        self.total_errores += 1
+        if len(self.errores) < MAX_ERRORES:
+            self.errores.append(f"Entrada {entrada}: {mensaje}")
+
+
+# ------------------ Normalizacion ------------------
+
+def _sin_tildes(texto):
+    texto = unicodedata.normalize("NFKD", texto or "")
+    return "".join(c for c in texto if not unicodedata.combining(c)).lower()
+
+
+def clave_titulo(titulo, anio):
+    palabras = re.findall(r"\w+", _sin_tildes(titulo))
+    return f"{' '.join(palabras)}|{anio or ''}"
+
+
+@lru_cache(maxsize=4096)
+def clave_autor(nombre):
+    # El orden de las palabras no importa: "perez juan" == "juan perez"
+    return " ".join(sorted(nombres.normalizar(nombre).split()))
+
+
+# ------------------ BibTeX ------------------
+
+_ACENTOS = {"'": "\u0301", "`": "\u0300", "^": "\u0302", '"': "\u0308", "~": "\u0303", "=": "\u0304", ".": "\u0307", "c": "\u0327", "v": "\u030c", "u": "\u0306", "H": "\u030b"}
+_ESPECIALES = {"ss": "ß", "o": "ø", "O": "Ø", "aa": "å", "AA": "Å", "ae": "æ", "AE": "Æ", "l": "ł", "L": "Ł", "i": "i", "j": "j"}
+_RE_ACENTO = re.compile(r"\\([`'^\"~=.]|[cvuH](?=[\s{]))\s*(?:\{\s*\\?([a-zA-Z])\s*\}|\\?([a-zA-Z]))")
+_RE_ESPECIAL = re.compile(r"\\(ss|aa|AA|ae|AE|[oOlLij])(?![a-zA-Z])\s*")
+_RE_COMANDO = re.compile(r"\\[a-zA-Z]+\*?\s*")
+_RE_LLAVE = re.compile(r"\\[{}]|[{}]")
+_RE_DELIMITADOR = re.compile(r'\\[{}"]|[{}"]')
+_RE_PALABRA = re.compile(r"[^\s,#}]+")
+_RE_NOMBRE_CAMPO = re.compile(r"\s*,?\s*([A-Za-z][\w\-:]*)\s*=")
+
+
+def texto_latex(valor):
+    """'{\\'A}lvarez y Mu{\\~n}oz \\& {GIESE}' -> 'Álvarez y Muñoz & GIESE'."""
+    valor = _RE_ACENTO.sub(lambda m: (m.group(2) or m.group(3)) + _ACENTOS[m.group(1)], valor)
+    valor = _RE_ESPECIAL.sub(lambda m: _ESPECIALES[m.group(1)], valor)
+    valor = re.sub(r"\\([&%$#_{}])", r"\1", valor)
+    valor = _RE_COMANDO.sub("", valor)  # \emph, \textit, ...: queda el contenido
+    valor = valor.replace("{", "").replace("}", "").replace("~", " ")
+    return unicodedata.normalize("NFC", " ".join(valor.split()))
+
+
+def _partir_nivel_cero(texto, separador):
+    """Divide ``texto`` en ``separador`` (regex) solo fuera de llaves."""
+    partes, profundidad, inicio = [], 0, 0
+    patron = re.compile(r"[{}]|" + separador, re.IGNORECASE)
+    for m in patron.finditer(texto):
+        if m.group() == "{":
+            profundidad += 1
+        elif m.group() == "}":
+            profundidad -= 1
+        elif profundidad == 0:
+            partes.append(texto[inicio:m.start()])
+            inicio = m.end()
+    partes.append(texto[inicio:])
+    return partes
+
+
+def autores_bibtex(valor):
+    """'Pérez, Juan and Ana {de la} Torre and others' -> ['Juan Pérez', 'Ana de la Torre']."""
+    lista = []
+    for parte in _partir_nivel_cero(valor, r"\s+and\s+"):
+        partes = [texto_latex(p) for p in _partir_nivel_cero(parte, ",")]
+        if len(partes) == 3:
+            # "Apellido, Jr, Nombre"
+            nombre = f"{partes[2]} {partes[0]} {partes[1]}"
+        elif len(partes) == 2:
+            nombre = f"{partes[1]} {partes[0]}"
+        else:
+            nombre = partes[0]
+        nombre = " ".join(nombre.split())
+        if nombre and nombre.lower() != "others":
+            lista.append(nombre)
+    return lista
+
+
+def _textos_de_entrada(lineas):
+    """Genera ``(numero de entrada, texto)`` de cada ``@tipo{...}`` leyendo linea por linea."""
+    buf, profundidad, numero = None, 0, 0
+    for linea in lineas:
+        pos = 0
+        while pos < len(linea):
+            if buf is None:
+                inicio = linea.find("@", pos)
+                if inicio < 0:
+                    break
+                buf, profundidad, abierta, pos = [], 0, False, inicio
+            segmento_desde = pos
+            cerrada = None
+            for m in _RE_LLAVE.finditer(linea, pos):
+                if m.group() == "{":
+                    profundidad += 1
+                    abierta = True
+                elif m.group() == "}":
+                    profundidad -= 1
+                    if abierta and profundidad == 0:
+                        cerrada = m.end()
+                        break
+            if cerrada is None:
+                buf.append(linea[segmento_desde:])
+                break
+            buf.append(linea[segmento_desde:cerrada])
+            numero += 1
+            yield numero, "".join(buf)
+            buf, pos = None, cerrada
+
+
+def _cierre(cuerpo, i):
+    """Posicion de la llave o comilla que cierra la que abre en ``i``."""
+    comilla = cuerpo[i] == '"'
+    profundidad = 0 if comilla else 1
+    for m in _RE_DELIMITADOR.finditer(cuerpo, i + 1):
+        marca = m.group()
+        if marca == "{":
+            profundidad += 1
+        elif marca == "}":
+            profundidad -= 1
+            if profundidad == 0 and not comilla:
+                return m.start()
+        elif marca == '"' and comilla and profundidad == 0:
+            return m.start()
+    return len(cuerpo)
+
+
+def _valor(cuerpo, i, macros):
+    """Lee un valor (``{...}``, ``"..."``, numero o macro, concatenados con #) desde ``i``."""
+    partes = []
+    while True:
+        while i < len(cuerpo) and cuerpo[i].isspace():
+            i += 1
+        if i >= len(cuerpo):
+            break
+        c = cuerpo[i]
+        if c in '{"':
+            j = _cierre(cuerpo, i)
+            partes.append(cuerpo[i + 1:j])
+            i = j + 1
+        else:
+            m = _RE_PALABRA.match(cuerpo, i)
+            if not m:
+                break
+            palabra = m.group()
+            partes.append(palabra if palabra.isdigit() else macros.get(palabra.lower(), palabra))
+            i = m.end()
+        while i < len(cuerpo) and cuerpo[i].isspace():
+            i += 1
+        if i < len(cuerpo) and cuerpo[i] == "#":
+            i += 1
+            continue
+        break
+    return "".join(partes), i
+
+
+def _campos(cuerpo, macros):
+    campos, i = {}, 0
+    while True:
+        m = _RE_NOMBRE_CAMPO.match(cuerpo, i)
+        if not m:
+            break
+        valor, i = _valor(cuerpo, m.end(), macros)
+        campos[m.group(1).lower()] = valor
+    return campos
+
+
+def entradas_bibtex(lineas):
+    """
+    Genera las entradas de un archivo BibTeX (iterable de lineas). Respeta
+    ``@string``; ignora ``@comment`` y ``@preamble``.
+    """
+    macros = dict(_MACROS)
+    for numero, texto in _textos_de_entrada(lineas):
+        m = re.match(r"@\s*(\w+)\s*\{", texto)
+        if not m:
+            continue
+        tipo = m.group(1).lower()
+        cuerpo = texto[m.end():-1]
+        if tipo in ("comment", "preamble"):
+            continue
+        if tipo == "string":
+            macros.update(_campos(cuerpo, macros))
+            continue
+        # Lo que va antes de la primera coma es la clave de cita
+        coma = cuerpo.find(",")
+        campos = _campos(cuerpo[coma + 1:] if coma >= 0 else "", macros)
+        yield numero, {
+            "titulo": texto_latex(campos.get("title", "")),
+            "autores": autores_bibtex(campos.get("author") or campos.get("editor") or ""),
+            "fecha": _fecha(campos.get("year", ""), campos.get("month", "")),
+            "resumen": texto_latex(campos.get("abstract", "")),
+            "archivo": _enlace(campos.get("url", ""), campos.get("doi", "")),
+        }
+
+
+# ------------------ CSV ------------------
+
+_COLUMNAS = {
+    "titulo": ("titulo", "título", "title"),
+    "autores": ("autores", "author", "authors", "autor"),
+    "anio": ("anio", "año", "year"),
+    "mes": ("mes", "month"),
+    "fecha": ("fecha", "date"),
+    "resumen": ("resumen", "abstract"),
+    "url": ("url", "archivo", "enlace", "link"),
+    "doi": ("doi",),
+}
+
+
+def entradas_csv(lineas):
+    """
+    Genera las entradas de un CSV con encabezado (``,`` o ``;``). Los
+    autores van separados por ``;`` o por " and ".
+    """
+    lineas = iter(lineas)
+    encabezado = next(lineas, "")
+    dialecto = csv.excel_tab if "\t" in encabezado else (
+        "excel" if encabezado.count(",") >= encabezado.count(";") else _PuntoYComa
+    )
+    lector = csv.reader(_con_primera(encabezado, lineas), dialecto)
+    columnas = [c.strip().lower() for c in next(lector, [])]
+    indices = {
+        campo: next((columnas.index(a) for a in alias if a in columnas), None)
+        for campo, alias in _COLUMNAS.items()
+    }
+    if indices["titulo"] is None:
+        raise ImportacionError("El CSV no tiene una columna 'titulo' (o 'title').")
+
+    for numero, fila in enumerate(lector, 1):
+        def col(campo):
+            i = indices[campo]
+            return fila[i].strip() if i is not None and i < len(fila) else ""
+
+        autores = col("autores")
+        separador = ";" if ";" in autores else r"\s+and\s+"
+        yield numero, {
+            "titulo": col("titulo"),
+            "autores": [a.strip() for a in re.split(separador, autores) if a.strip()],
+            "fecha": _fecha_iso(col("fecha")) or _fecha(col("anio"), col("mes")),
+            "resumen": col("resumen"),
+            "archivo": _enlace(col("url"), col("doi")),
+        }
+
+
+class _PuntoYComa(csv.excel):
+    delimiter = ";"
+
+
+def _con_primera(primera, resto):
+    yield primera
+    yield from resto
+
+
+# ------------------ Campos comunes ------------------
+
+def _fecha(anio, mes=""):
+    m = re.search(r"\d{4}", anio or "")
+    if not m:
+        return None
+    mes = (mes or "").strip().lower()
+    numero = int(mes) if mes.isdigit() else _MESES.get(mes[:3], 1)
+    return date(int(m.group()), numero if 1 <= numero <= 12 else 1, 1)
+
+
+def _fecha_iso(texto):
+    try:
+        return date.fromisoformat(texto[:10]) if texto else None
+    except ValueError:
+        return None
+
+
+def _enlace(url, doi):
+    url = (url or "").strip()
+    doi = (doi or "").strip()
+    if not url and doi:
+        url = doi if doi.startswith("http") else f"https://doi.org/{doi}"
+    # Publicacion.archivo es un CharField(100): un enlace cortado no sirve
+    return url if len(url) <= 100 else ""
+
+
+def detectar_formato(nombre, primera_linea=""):
+    """'bibtex' o 'csv', por la extension o, si no la dice, por el contenido."""
+    nombre = (nombre or "").lower()
+    if nombre.endswith((".bib", ".bibtex")):
+        return "bibtex"
+    if nombre.endswith((".csv", ".tsv")):
+        return "csv"
+    return "bibtex" if primera_linea.lstrip().startswith(("@", "%")) else "csv"
+
+
+def entradas(archivo, nombre=""):
+    """Entradas de un archivo binario (subido o abierto), leido en streaming."""
+    texto = io.TextIOWrapper(archivo, encoding="utf-8-sig", errors="replace", newline="")
+    primera = texto.readline()
+    lineas = _con_primera(primera, texto)
+    if detectar_formato(nombre, primera) == "bibtex":
+        return entradas_bibtex(lineas)
+    return entradas_csv(lineas)
+
+
+# ------------------ Escritura ------------------
+
+def _indice_autores():
+    """
+    ``{clave: id de Autor}``, ``{clave: (id de User sin Autor, nombre)}`` y
+    ``{id de Autor: nombre}`` (el mismo texto que ``str(autor)``).
+    """
+    autores, textos = {}, {}
+    for pk, nombre, first, last, username in Autor.objects.values_list(
+        "id", "nombre", "user__first_name", "user__last_name", "user__username",
+    ).order_by("id").iterator():
+        completo = f"{first or ''} {last or ''}".strip()
+        textos[pk] = (completo or username) if username else (nombre or "(Autor)")
+        for texto in (nombre, completo):
+            clave = clave_autor(texto)
+            if clave:
+                autores.setdefault(clave, pk)
+
+    usuarios = {}
+    sin_autor = get_user_model().objects.filter(autores_perfil__isnull=True)
+    for pk, first, last in sin_autor.values_list("id", "first_name", "last_name").order_by("id").iterator():
+        completo = f"{first} {last}".strip()
+        clave = clave_autor(completo)
+        if clave and clave not in autores:
+            usuarios.setdefault(clave, (pk, completo))
+    return autores, usuarios, textos
+
+
+def _lotes(iterable, n=LOTE):
+    it = iter(iterable)
+    while lote := list(islice(it, n)):
+        yield lote
+
+
+@transaction.atomic
+def importar(entradas, user=None, simular=False):
+    """
+    Crea las publicaciones de ``entradas`` (pares ``(numero, dict)``) y
+    devuelve un ``Resultado``. Con ``simular`` hace todo y despues lo deshace.
+    """
+    resultado = Resultado()
+    existentes = {
+        clave_titulo(titulo, fecha.year if fecha else None)
+        for titulo, fecha in Publicacion.objects.values_list("titulo", "fecha").iterator()
+    }
+    autores, usuarios, textos = _indice_autores()
+    user_id = user.pk if user is not None and user.is_authenticated else None
+
+    for lote in _lotes(entradas):
+        nuevas = []
+        for numero, datos in lote:
+            resultado.leidas += 1
+            titulo = " ".join((datos.get("titulo") or "").split())
+            if not titulo:
+                resultado.error(numero, "no tiene título.")
+                continue
+            if len(titulo) > 200:
+                resultado.error(numero, "el título tiene más de 200 caracteres.")
+                continue
+            clave = clave_titulo(titulo, datos["fecha"].year if datos.get("fecha") else None)
+            if clave in existentes:
+                resultado.duplicadas += 1
+                continue
+            existentes.add(clave)
+            nombres_autores = datos.get("autores") or []
+            nuevas.append((Publicacion(
+                titulo=titulo,
+                autores=", ".join(nombres_autores)[:200],
+                resumen=datos.get("resumen") or "",
+                archivo=datos.get("archivo") or "",
+                fecha=datos.get("fecha"),
+                user_id=user_id,
+            ), nombres_autores))
+        if not nuevas:
+            continue
+
+        # Autores que faltan: uno por clave, vinculado al usuario si coincide
+        faltantes = {}
+        for _, nombres_autores in nuevas:
+            for nombre in nombres_autores:
+                clave = clave_autor(nombre)
+                if not clave or clave in autores or clave in faltantes:
+                    continue
+                if clave in usuarios:
+                    user_pk, texto = usuarios.pop(clave)
+                    faltantes[clave] = (Autor(user_id=user_pk), texto)
+                else:
+                    faltantes[clave] = (Autor(nombre=nombre[:150]), nombre[:150])
+        if faltantes:
+            Autor.objects.bulk_create([a for a, _ in faltantes.values()])
+            for clave, (autor, texto) in faltantes.items():
+                autores[clave] = autor.pk
+                textos[autor.pk] = texto
+            resultado.autores_nuevos += len(faltantes)
+
+        # Autores de cada publicacion, sin repetir. ``nombres_busqueda`` sale
+        # ya calculado: el reindex de abajo no tiene que volver a escribirlo.
+        ids_autores = []
+        for publicacion, nombres_autores in nuevas:
+            ids = list(dict.fromkeys(
+                autores[clave] for clave in map(clave_autor, nombres_autores) if clave in autores
+            ))
+            publicacion.nombres_busqueda = " ".join(textos[pk] for pk in ids if textos[pk])
+            ids_autores.append(ids)
+
+        Publicacion.objects.bulk_create([p for p, _ in nuevas])
+        vinculos = [
+            PublicacionAutor(publicacion_id=publicacion.pk, autor_id=autor_id, orden=orden, rol="autor")
+            for (publicacion, _), ids in zip(nuevas, ids_autores)
+            for orden, autor_id in enumerate(ids, start=1)
+        ]
+        PublicacionAutor.objects.bulk_create(vinculos)
+        resultado.vinculos += len(vinculos)
+        resultado.creadas += len(nuevas)
+
+        # bulk_create no dispara las señales del indice de busqueda y
+        # ``nombres_busqueda`` ya esta: solo falta la fila FTS (SQLite). Se
+        # escribe aca, dentro de la transaccion, para confirmarlas juntas.
+        publicaciones = [p for p, _ in nuevas]
+        busqueda.INDICE_PUBLICACIONES.escribir_fts(publicaciones, [p.pk for p in publicaciones])
+
+    if resultado.autores_nuevos:
+        transaction.on_commit(partial(nombres.invalidar, "autor"))
+    if resultado.creadas:
+        paginas.invalidar("publicacion", "autor")
+    if simular:
+        transaction.set_rollback(True)
+    return resultado
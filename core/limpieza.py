@@ -0,0 +1,296 @@
+# core/limpieza.py
+"""
+Media huerfana y chequeo de integridad entre el storage y la base.
+
+Borrar una noticia, investigacion, publicacion o evento borra sus filas en
+cascada pero deja los archivos en el storage, y los blobs de
+``core.almacenamiento`` nunca se borran al borrar una fila. ``escanear``
+cruza dos listados:
+
+- los archivos del storage, recorridos carpeta por carpeta con ``listdir``;
+- las referencias de la base: cada ``FileField``/``ImageField`` de core,
+  ``Equipo.foto`` (ruta o URL), las ``rutas`` de las derivadas y las
+  copias que esperan en la cola de media (``TrabajoMedia.ruta``).
+
+Ninguno de los dos se arma en memoria: se vuelcan por lotes a una base
+SQLite temporal en disco y la comparacion la hace SQLite con indices. Asi
+la memoria es la misma con cien archivos o con un millon.
+
+Los ``size``/``get_modified_time``/``delete`` contra el storage (llamadas
+HTTP con Cloudinary) se hacen en paralelo con un pool de hilos, de a un
+lote por vez. Los archivos modificados hace menos de ``HORAS_GRACIA`` no
+se tocan: pueden ser de un trabajo de la cola que todavia no guardo su fila.
+
+Antes de borrar un lote se saca su fila de ``BlobMedia`` (asi ninguna
+subida nueva lo reutiliza) y se vuelve a consultar la base por si algo
+empezo a usarlo despues del escaneo; esos se conservan.
+"""
+import posixpath
+import sqlite3
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from itertools import islice
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.db import models
+from django.utils import timezone
+
+from . import derivadas
+from .almacenamiento import AlmacenamientoDeduplicado, es_blob
+from .models import BlobMedia, Equipo, TrabajoMedia
+
+
+LOTE = 500
+HILOS = 8
+HORAS_GRACIA = 24
+
+# Cuantos nombres de cada tipo se guardan para mostrar en el informe
+MUESTRA = 50
+
+
+def _lotes(iterable, n=LOTE):
+    it = iter(iterable)
+    while lote := list(islice(it, n)):
+        yield lote
+
+
+def campos_de_archivo():
+    """``(modelo, campo)`` de cada FileField/ImageField de la app."""
+    for modelo in apps.get_app_config("core").get_models():
+        for campo in modelo._meta.get_fields():
+            if isinstance(campo, models.FileField):
+                yield modelo, campo.name
+
+
+def referencias():
+    """
+    Genera ``(nombre, origen)`` por cada archivo que la base referencia. En
+    ``Equipo.foto`` puede venir una URL absoluta (Cloudinary) en vez del nombre.
+    """
+    for modelo, campo in campos_de_archivo():
+        filas = (
+            modelo.objects.exclude(**{f"{campo}__isnull": True}).exclude(**{campo: ""})
+            .order_by().values_list("pk", campo).iterator(chunk_size=LOTE)
+        )
+        for pk, nombre in filas:
+            yield nombre, f"{modelo._meta.label}.{campo}#{pk}"
+
+    for modelo in {modelo for modelo, _ in derivadas.CAMPOS.values()}:
+        filas = modelo.objects.exclude(derivadas={}).order_by().values_list("pk", "derivadas").iterator(chunk_size=LOTE)
+        for pk, datos in filas:
+            for ruta in (datos or {}).get("rutas", []):
+                yield ruta, f"{modelo._meta.label}.derivadas#{pk}"
+
+    for pk, foto in Equipo.objects.exclude(foto="").order_by().values_list("pk", "foto").iterator(chunk_size=LOTE):
+        yield foto, f"core.Equipo.foto#{pk}"
+
+    for pk, ruta in TrabajoMedia.objects.exclude(ruta="").order_by().values_list("pk", "ruta").iterator(chunk_size=LOTE):
+        yield ruta, f"core.TrabajoMedia.ruta#{pk}"
+
+
+def listado(storage, carpeta=""):
+    """Genera el nombre de cada archivo del storage bajo ``carpeta``."""
+    pendientes = [carpeta]
+    while pendientes:
+        actual = pendientes.pop()
+        try:
+            carpetas, archivos = storage.listdir(actual)
+        except FileNotFoundError:
+            continue
+        pendientes.extend(posixpath.join(actual, c) for c in carpetas)
+        for archivo in archivos:
+            yield posixpath.join(actual, archivo)
+
+
+def _en_uso(nombres):
+    """Los de ``nombres`` que la base referencia ahora mismo (sin contar derivadas)."""
+    usados = set()
+    for modelo, campo in campos_de_archivo():
+        usados.update(modelo.objects.filter(**{f"{campo}__in": nombres}).values_list(campo, flat=True))
+    usados.update(Equipo.objects.filter(foto__in=nombres).values_list("foto", flat=True))
+    usados.update(TrabajoMedia.objects.filter(ruta__in=nombres).values_list("ruta", flat=True))
+    return usados
+
+
+class Informe:
+    def __init__(self):
+        self.archivos = 0
+        self.referencias = 0
+        self.huerfanos = 0
+        self.bytes_huerfanos = 0
+        self.recientes = 0
+        self.borrados = 0
+        self.bytes_borrados = 0
+        self.errores = 0
+        self.colgadas = 0
+        self.indice_roto = 0
+        self.muestra_huerfanos = []
+        self.muestra_colgadas = []
+
+
+class _Indice:
+    """Base SQLite temporal con los dos listados, para compararlos en disco."""
+
+    def __init__(self):
+        self.archivo = tempfile.NamedTemporaryFile(suffix=".sqlite3")
+        self.db = sqlite3.connect(self.archivo.name)
+        self.db.executescript("""
+            PRAGMA journal_mode = OFF;
+            PRAGMA synchronous = OFF;
+            CREATE TABLE archivos (nombre TEXT PRIMARY KEY);
+            CREATE TABLE refs (nombre TEXT NOT NULL, origen TEXT NOT NULL);
+            CREATE TABLE urls (url TEXT PRIMARY KEY);
+            CREATE TABLE blobs (nombre TEXT PRIMARY KEY);
+        """)
+
+    def cargar(self, sql, filas):
+        total = 0
+        for lote in _lotes(filas):
+            self.db.executemany(sql, lote)
+            total += len(lote)
+        self.db.commit()
+        return total
+
+    def consulta(self, sql, params=()):
+        cursor = self.db.execute(sql, params)
+        while filas := cursor.fetchmany(LOTE):
+            yield from filas
+
+    def cerrar(self):
+        self.db.close()
+        self.archivo.close()
+
+
+def _cargar(indice, storage, carpeta, informe):
+    informe.archivos = indice.cargar(
+        "INSERT OR IGNORE INTO archivos VALUES (?)", ((n,) for n in listado(storage, carpeta)),
+    )
+    refs = urls = 0
+    for lote in _lotes(referencias()):
+        locales, absolutas = [], []
+        for nombre, origen in lote:
+            if nombre.startswith(("http://", "https://")):
+                absolutas.append((nombre,))
+            else:
+                locales.append((nombre, origen))
+        refs += indice.cargar("INSERT INTO refs VALUES (?, ?)", locales)
+        urls += indice.cargar("INSERT OR IGNORE INTO urls VALUES (?)", absolutas)
+    indice.db.execute("CREATE INDEX refs_nombre ON refs (nombre)")
+    informe.referencias = refs + urls
+    indice.cargar(
+        "INSERT OR IGNORE INTO blobs VALUES (?)",
+        ((n,) for n in BlobMedia.objects.order_by().values_list("nombre", flat=True).iterator(chunk_size=LOTE)),
+    )
+    return urls
+
+
+def escanear(storage=None, carpeta="", horas=HORAS_GRACIA, hilos=HILOS, reclamar=False):
+    """
+    Compara storage y base y devuelve un ``Informe``. Con ``reclamar`` borra
+    los archivos huerfanos (y su fila de ``BlobMedia``) y las filas de
+    ``BlobMedia`` cuyo archivo ya no existe. Las referencias colgadas (filas
+    que apuntan a un archivo que no esta) solo se informan.
+    """
+    storage = storage or default_storage
+    # El storage deduplicado no borra blobs: se borran en el storage real
+    borrar = storage.interno.delete if isinstance(storage, AlmacenamientoDeduplicado) else storage.delete
+    limite = timezone.now() - timedelta(hours=horas)
+    informe = Informe()
+    indice = _Indice()
+    try:
+        hay_urls = _cargar(indice, storage, carpeta, informe)
+        with ThreadPoolExecutor(max_workers=hilos) as pool:
+            huerfanos = indice.consulta("""
+                SELECT nombre FROM archivos a
+                WHERE NOT EXISTS (SELECT 1 FROM refs r WHERE r.nombre = a.nombre)
+                ORDER BY nombre
+            """)
+            for lote in _lotes(n for (n,) in huerfanos):
+                datos = list(pool.map(lambda n: _datos(storage, n, hay_urls), lote))
+                urls = [d[3] for d in datos if d[3]]
+                if urls:
+                    # Fotos de Equipo guardadas como URL absoluta
+                    marcas = ",".join("?" * len(urls))
+                    usadas = {u for (u,) in indice.db.execute(f"SELECT url FROM urls WHERE url IN ({marcas})", urls)}
+                    datos = [d for d in datos if d[3] not in usadas]
+                candidatos = []
+                for nombre, tamano, modificado, _ in datos:
+                    if modificado is None or modificado > limite:
+                        informe.recientes += 1
+                        continue
+                    informe.huerfanos += 1
+                    informe.bytes_huerfanos += tamano or 0
+                    if len(informe.muestra_huerfanos) < MUESTRA:
+                        informe.muestra_huerfanos.append((nombre, tamano))
+                    candidatos.append((nombre, tamano))
+                if reclamar and candidatos:
+                    _reclamar(pool, borrar, candidatos, informe)
+
+            colgadas = indice.consulta("""
+                SELECT nombre, origen FROM refs r
+                WHERE NOT EXISTS (SELECT 1 FROM archivos a WHERE a.nombre = r.nombre)
+                ORDER BY nombre
+            """)
+            for nombre, origen in colgadas:
+                informe.colgadas += 1
+                if len(informe.muestra_colgadas) < MUESTRA:
+                    informe.muestra_colgadas.append((nombre, origen))
+
+            # BlobMedia que apunta a un archivo que no esta: la proxima subida
+            # igual devolveria ese nombre. Sin la fila, el archivo se vuelve a escribir.
+            rotos = indice.consulta("""
+                SELECT nombre FROM blobs b
+                WHERE NOT EXISTS (SELECT 1 FROM archivos a WHERE a.nombre = b.nombre)
+            """)
+            for lote in _lotes(n for (n,) in rotos):
+                informe.indice_roto += len(lote)
+                if reclamar:
+                    BlobMedia.objects.filter(nombre__in=lote).delete()
+    finally:
+        indice.cerrar()
+    return informe
+
+
+def _datos(storage, nombre, con_url):
+    # Algunos storages remotos no saben la fecha: sin fecha no se borra
+    try:
+        tamano = storage.size(nombre)
+    except Exception:
+        tamano = None
+    try:
+        modificado = storage.get_modified_time(nombre)
+    except Exception:
+        modificado = None
+    url = None
+    if con_url:
+        try:
+            url = storage.url(nombre)
+        except Exception:
+            pass
+    return nombre, tamano, modificado, url
+
+
+def _reclamar(pool, borrar, candidatos, informe):
+    nombres = [n for n, _ in candidatos]
+    blobs = list(BlobMedia.objects.filter(nombre__in=[n for n in nombres if es_blob(n)]))
+    BlobMedia.objects.filter(pk__in=[b.pk for b in blobs]).delete()
+    usados = _en_uso(nombres)
+    if usados:
+        BlobMedia.objects.bulk_create([b for b in blobs if b.nombre in usados], ignore_conflicts=True)
+
+    def borrar_uno(nombre):
+        try:
+            borrar(nombre)
+            return True
+        except Exception:
+            return False
+
+    libres = [(n, t) for n, t in candidatos if n not in usados]
+    for (nombre, tamano), ok in zip(libres, pool.map(borrar_uno, [n for n, _ in libres])):
+        if ok:
+            informe.borrados += 1
+            informe.bytes_borrados += tamano or 0
+        else:
+            informe.errores += 1
@@ -0,0 +1,93 @@
+# core/management/commands/cache_paginas.py
+"""
+Inspecciona e invalida la cache de paginas publicas (ver core.paginas).
+
+    python manage.py cache_paginas                          # version de cada etiqueta de tipo
+    python manage.py cache_paginas publicacion:12 equipo    # version de esas etiquetas
+    python manage.py cache_paginas --url https://sitio/publicaciones/?page=2
+    python manage.py cache_paginas publicacion --purgar     # invalida las paginas con esas etiquetas
+    python manage.py cache_paginas --todo                   # invalida todas las paginas
+    python manage.py cache_paginas --contadores             # hit/miss/stale/regeneracion
+    python manage.py cache_paginas --contadores --reiniciar
+
+La etiqueta de un tipo (``publicacion``) la llevan los listados; la de un
+objeto (``publicacion:12``), su detalle. Invalidar no borra claves: sube la
+version de la etiqueta y las paginas que la llevan dejan de servirse.
+
+Los contadores sirven para ajustar ``PAGINAS_VENTANA_STALE`` y
+``PAGINAS_ESPERA``: muchos ``stale`` o ``miss`` frente a pocas
+``regeneracion`` indican paginas que tardan en armarse o que se invalidan
+seguido.
+
+Solo corre con una cache compartida (``REDIS_URL``): con la cache local de
+cada proceso lo que invalide este comando no llega a la web.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core import paginas
+
+
+class Command(BaseCommand):
+    help = "Muestra e invalida etiquetas de la cache de paginas publicas."
+
+    def add_arguments(self, parser):
+        parser.add_argument("etiquetas", nargs="*", help="Etiquetas (publicacion, publicacion:12, ...).")
+        parser.add_argument("--purgar", action="store_true", help="Invalida las etiquetas dadas.")
+        parser.add_argument("--todo", action="store_true", help="Invalida todas las paginas.")
+        parser.add_argument("--url", help="URL absoluta: muestra si esta guardada, sus etiquetas y si sigue vigente.")
+        parser.add_argument("--contadores", action="store_true", help="Muestra los contadores de la cache.")
+        parser.add_argument("--reiniciar", action="store_true", help="Con --contadores, los pone en cero despues de mostrarlos.")
+
+    def handle(self, *args, **opts):
+        if not paginas.compartida():
+            raise CommandError(
+                "La cache por defecto es local a cada proceso: lo que haga este comando no llega a la web. "
+                "Configurar una cache compartida (REDIS_URL)."
+            )
+
+        if opts["url"]:
+            self._url(opts["url"])
+            return
+
+        if opts["contadores"]:
+            self._contadores(opts["reiniciar"])
+            return
+
+        if opts["todo"]:
+            paginas.invalidar(paginas.TODAS)
+            self.stdout.write(self.style.SUCCESS("Todas las paginas invalidadas."))
+            return
+
+        etiquetas = opts["etiquetas"]
+        if opts["purgar"]:
+            if not etiquetas:
+                raise CommandError("Indicar las etiquetas a purgar (o --todo).")
+            paginas.invalidar(*etiquetas)
+            self.stdout.write(self.style.SUCCESS(f"Invalidadas: {', '.join(etiquetas)}."))
+            return
+
+        if not etiquetas:
+            tipos = {e for deps in paginas.DEPENDENCIAS.values() for e, _ in deps}
+            etiquetas = [paginas.TODAS] + sorted(tipos)
+        for etiqueta, version in paginas.versiones(etiquetas).items():
+            self.stdout.write(f"{etiqueta}: {version}")
+
+    def _contadores(self, reiniciar):
+        conteos = paginas.contadores()
+        for nombre in paginas.CONTADORES:
+            self.stdout.write(f"{nombre}: {conteos[nombre]}")
+        if reiniciar:
+            paginas.reiniciar_contadores()
+            self.stdout.write(self.style.SUCCESS("Contadores reiniciados."))
+
+    def _url(self, url):
+        guardada = paginas.entrada(url)
+        if guardada is None:
+            self.stdout.write("No esta en la cache.")
+            return
+        estado = "vigente" if paginas.vigente(guardada) else "vencida (se renueva en la proxima visita)"
+        self.stdout.write(f"Guardada, {estado}. {len(guardada['respuesta'].content)} bytes.")
+        actuales = paginas.versiones(guardada["versiones"])
+        for etiqueta, version in guardada["versiones"].items():
+            marca = "" if actuales[etiqueta] == version else f"  (actual: {actuales[etiqueta]})"
+            self.stdout.write(f"  {etiqueta}: {version}{marca}")
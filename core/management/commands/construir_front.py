@@ -0,0 +1,46 @@
+# core/management/commands/construir_front.py
+"""
+Arma el paquete del front (core.front): una hoja y un script en static/front/.
+
+    python manage.py construir_front                  # baja lo que falta a front/vendor/ y arma
+    python manage.py construir_front --sin-descarga   # arma solo con lo que ya esta en front/vendor/
+    python manage.py construir_front --actualizar     # vuelve a bajar todo (p. ej. al cambiar una version)
+    python manage.py construir_front --sin-purgar     # no saca reglas (para descartar que falte una clase)
+
+Todavia no esta corrido: en el repositorio solo esta
+front/vendor/bootstrap.min.css y no hay static/front/, asi que base.html sigue
+pidiendo las librerias a los CDN. Para pasar al paquete hay que correrlo con
+acceso a los CDN, antes de collectstatic, y versionar front/vendor/ completo y
+static/front/. Despues se repite al usar una clase nueva de las librerias.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core import front
+
+
+class Command(BaseCommand):
+    help = "Descarga, purga, concatena y minifica Bootstrap, AOS, animate.css, hover.css y bootstrap-icons."
+
+    def add_arguments(self, parser):
+        descarga = parser.add_mutually_exclusive_group()
+        descarga.add_argument("--sin-descarga", action="store_true", help="No baja nada; usa front/vendor/.")
+        descarga.add_argument("--actualizar", action="store_true", help="Vuelve a bajar todas las fuentes.")
+        parser.add_argument("--sin-purgar", action="store_true", help="Solo concatena y minifica.")
+
+    def handle(self, *args, **opts):
+        if not opts["sin_descarga"]:
+            try:
+                bajados = front.descargar(actualizar=opts["actualizar"])
+            except (OSError, ValueError) as e:
+                raise CommandError(f"No se pudo descargar: {e}")
+            for nombre in bajados:
+                self.stdout.write(f"Descargado {nombre}")
+
+        try:
+            tamanos = front.construir(purga=not opts["sin_purgar"])
+        except FileNotFoundError as e:
+            raise CommandError(str(e))
+
+        for nombre, (antes, despues) in tamanos.items():
+            self.stdout.write(f"{nombre}: {antes / 1024:.1f} KB -> {despues / 1024:.1f} KB")
+        self.stdout.write(self.style.SUCCESS(f"Listo: static/{front.CSS} y static/{front.JS}."))
@@ -0,0 +1,80 @@
+# core/management/commands/enviar_correos.py
+"""
+Worker de la bandeja de salida de correo (ver core.correo).
+
+    python manage.py enviar_correos               # corre hasta recibir SIGTERM/SIGINT
+    python manage.py enviar_correos --una-vez     # manda lo que ya se puede y termina
+    python manage.py enviar_correos --estado      # solo muestra la cola
+
+Toma los mensajes de a lotes y manda cada lote por una sola conexion SMTP.
+Lo que falla se reintenta mas tarde, cada vez esperando el doble. Con la
+cola vacia espera ``--intervalo`` segundos. Se pueden correr varios a la vez.
+"""
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core import correo
+
+
+# Cada cuantas vueltas sin trabajo se hace el mantenimiento
+VUELTAS_MANTENIMIENTO = 30
+
+
+class Command(BaseCommand):
+    help = "Envia los correos que esperan en la bandeja de salida."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--una-vez", action="store_true", help="Envia lo pendiente y termina.")
+        parser.add_argument("--estado", action="store_true", help="Muestra la cantidad por estado y termina.")
+        parser.add_argument("--lote", type=int, default=correo.LOTE, help="Mensajes por conexion SMTP.")
+        parser.add_argument("--intervalo", type=float, default=5.0, help="Segundos de espera con la cola vacia.")
+        parser.add_argument("--retener-dias", type=int, default=30, help="Dias que se guardan los enviados.")
+
+    def handle(self, *args, **opts):
+        if opts["estado"]:
+            conteos = correo.resumen()
+            self.stdout.write(" ".join(f"{estado}={n}" for estado, n in conteos.items()))
+            self.stdout.write(f"En espera: {correo.en_espera(conteos)}.")
+            return
+
+        self.detener = False
+        signal.signal(signal.SIGTERM, self._detener)
+        signal.signal(signal.SIGINT, self._detener)
+
+        self._mantenimiento(opts["retener_dias"])
+        enviados = fallidos = vueltas = 0
+        while not self.detener:
+            # Proceso largo: no quedarse con conexiones vencidas
+            close_old_connections()
+            lote = correo.tomar(opts["lote"])
+            if not lote:
+                if opts["una_vez"]:
+                    break
+                vueltas += 1
+                if vueltas % VUELTAS_MANTENIMIENTO == 0:
+                    self._mantenimiento(opts["retener_dias"])
+                time.sleep(opts["intervalo"])
+                continue
+
+            ok, mal = correo.enviar(lote)
+            enviados += ok
+            fallidos += mal
+            if mal:
+                self.stderr.write(f"{mal} de {len(lote)} mensajes no salieron; se reintentan mas tarde.")
+            if opts["verbosity"] > 1:
+                self.stdout.write(f"Lote de {len(lote)}: {ok} enviados.")
+
+        self.stdout.write(f"Enviados: {enviados}. Fallidos: {fallidos}. En espera: {correo.en_espera()}.")
+
+    def _detener(self, signum, frame):
+        # Termina el lote en curso y sale
+        self.detener = True
+
+    def _mantenimiento(self, retener_dias):
+        recuperados = correo.recuperar_colgados()
+        borrados = correo.purgar(retener_dias)
+        if recuperados or borrados:
+            self.stdout.write(f"Recuperados: {recuperados}. Purgados: {borrados}.")
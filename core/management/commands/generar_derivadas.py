@@ -0,0 +1,41 @@
+# core/management/commands/generar_derivadas.py
+"""
+Genera las derivadas (core.derivadas) de las imagenes que ya estaban subidas.
+
+    python manage.py generar_derivadas              # solo las que faltan o cambiaron
+    python manage.py generar_derivadas --forzar     # todas de nuevo (p. ej. si cambian ANCHOS)
+    python manage.py generar_derivadas --encolar    # dejarlas para el worker de la cola
+
+Las imagenes nuevas no necesitan esto: se generan solas al guardarse.
+"""
+from django.core.management.base import BaseCommand
+
+from core import derivadas
+
+
+class Command(BaseCommand):
+    help = "Genera versiones reducidas (WebP/JPEG) de las imagenes existentes."
+
+    def add_arguments(self, parser):
+        modo = parser.add_mutually_exclusive_group()
+        modo.add_argument("--forzar", action="store_true", help="Regenera aunque esten al dia.")
+        modo.add_argument("--encolar", action="store_true", help="Encola las que faltan en vez de generarlas aca.")
+
+    def handle(self, *args, **opts):
+        for clave, (modelo, campo) in derivadas.CAMPOS.items():
+            filas = modelo.objects.only("pk", campo, "derivadas").order_by("pk").iterator(chunk_size=500)
+            hechas = errores = 0
+            for obj in filas:
+                if not (opts["forzar"] or derivadas.desactualizadas(obj)):
+                    continue
+                if opts["encolar"]:
+                    derivadas.programar(obj)
+                    hechas += 1
+                    continue
+                try:
+                    derivadas.generar(clave, obj.pk, forzar=opts["forzar"])
+                    hechas += 1
+                except Exception as e:
+                    errores += 1
+                    self.stderr.write(f"{clave} #{obj.pk}: {e}")
+            self.stdout.write(f"{clave}: {hechas} procesadas, {errores} con error.")
@@ -0,0 +1,57 @@
+# core/management/commands/importar_publicaciones.py
+"""
+Importa publicaciones desde un archivo BibTeX o CSV (ver core.importacion).
+
+    python manage.py importar_publicaciones catalogo.bib
+    python manage.py importar_publicaciones lista.csv --usuario admin
+    python manage.py importar_publicaciones catalogo.bib --simular   # informa sin guardar
+
+El CSV necesita una columna ``titulo`` (o ``title``); las demas son
+opcionales: autores, anio, mes, fecha, resumen, url, doi.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core import importacion
+
+
+class Command(BaseCommand):
+    help = "Importa publicaciones y autores desde BibTeX o CSV, sin duplicar los existentes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("archivo", help="Ruta del .bib o .csv.")
+        parser.add_argument("--formato", choices=["bibtex", "csv"], help="Si no se indica, se deduce del archivo.")
+        parser.add_argument("--usuario", help="Usuario que queda como responsable de las publicaciones.")
+        parser.add_argument("--simular", action="store_true", help="Hace todo y al final lo deshace.")
+
+    def handle(self, *args, **opts):
+        user = None
+        if opts["usuario"]:
+            user = get_user_model().objects.filter(username=opts["usuario"]).first()
+            if user is None:
+                raise CommandError(f"No existe el usuario {opts['usuario']!r}.")
+
+        nombre = opts["archivo"]
+        if opts["formato"]:
+            nombre = f"entrada.{'bib' if opts['formato'] == 'bibtex' else 'csv'}"
+        try:
+            with open(opts["archivo"], "rb") as archivo:
+                resultado = importacion.importar(
+                    importacion.entradas(archivo, nombre), user=user, simular=opts["simular"],
+                )
+        except OSError as e:
+            raise CommandError(str(e))
+        except importacion.ImportacionError as e:
+            raise CommandError(str(e))
+
+        for error in resultado.errores:
+            self.stderr.write(error)
+        if resultado.total_errores > len(resultado.errores):
+            self.stderr.write(f"... y {resultado.total_errores - len(resultado.errores)} errores mas")
+        self.stdout.write(
+            f"Leidas: {resultado.leidas}. Creadas: {resultado.creadas}. "
+            f"Duplicadas: {resultado.duplicadas}. Con error: {resultado.total_errores}. "
+            f"Autores nuevos: {resultado.autores_nuevos}. Vinculos autor-publicacion: {resultado.vinculos}."
+        )
+        if opts["simular"]:
+            self.stdout.write("Simulacion: no se guardo nada.")
@@ -0,0 +1,64 @@
+# core/management/commands/limpiar_media.py
+"""
+Busca media huerfana y referencias rotas (ver core.limpieza).
+
+    python manage.py limpiar_media                  # solo informa, no borra nada
+    python manage.py limpiar_media --borrar         # borra los archivos huerfanos
+    python manage.py limpiar_media --horas 0 --hilos 16
+
+Huerfano: archivo del storage que ninguna fila referencia. Colgada: fila que
+apunta a un archivo que ya no esta (se informa, no se arregla sola).
+"""
+from django.core.management.base import BaseCommand
+
+from core import limpieza
+
+
+def _tamano(n):
+    for unidad in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unidad == "GB":
+            return f"{n:.0f} {unidad}" if unidad == "B" else f"{n:.1f} {unidad}"
+        n /= 1024
+
+
+class Command(BaseCommand):
+    help = "Informa (y con --borrar elimina) los archivos de media que ya no usa ninguna fila."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--borrar", action="store_true", help="Borra los huerfanos en vez de solo informarlos.")
+        parser.add_argument("--horas", type=float, default=limpieza.HORAS_GRACIA,
+                            help="No toca archivos modificados hace menos de estas horas.")
+        parser.add_argument("--hilos", type=int, default=limpieza.HILOS, help="Llamadas al storage en paralelo.")
+        parser.add_argument("--carpeta", default="", help="Recorre solo esta carpeta del storage.")
+
+    def handle(self, *args, **opts):
+        informe = limpieza.escanear(
+            carpeta=opts["carpeta"], horas=opts["horas"], hilos=opts["hilos"], reclamar=opts["borrar"],
+        )
+
+        self.stdout.write(f"Archivos en el storage: {informe.archivos}. Referencias en la base: {informe.referencias}.")
+        self.stdout.write(
+            f"Huerfanos: {informe.huerfanos} ({_tamano(informe.bytes_huerfanos)}). "
+            f"Sin referencia pero recientes o sin fecha (no se tocan): {informe.recientes}."
+        )
+        for nombre, tamano in informe.muestra_huerfanos:
+            self.stdout.write(f"  {nombre} ({_tamano(tamano or 0)})")
+        if informe.huerfanos > len(informe.muestra_huerfanos):
+            self.stdout.write(f"  ... y {informe.huerfanos - len(informe.muestra_huerfanos)} mas")
+
+        self.stdout.write(f"Referencias colgadas: {informe.colgadas}.")
+        for nombre, origen in informe.muestra_colgadas:
+            self.stdout.write(f"  {origen}: {nombre}")
+        if informe.colgadas > len(informe.muestra_colgadas):
+            self.stdout.write(f"  ... y {informe.colgadas - len(informe.muestra_colgadas)} mas")
+        self.stdout.write(f"Blobs indexados sin archivo: {informe.indice_roto}.")
+
+        if opts["borrar"]:
+            self.stdout.write(self.style.SUCCESS(
+                f"Borrados: {informe.borrados} ({_tamano(informe.bytes_borrados)}). "
+                f"Filas de BlobMedia sin archivo quitadas: {informe.indice_roto}."
+            ))
+            if informe.errores:
+                self.stderr.write(f"No se pudieron borrar: {informe.errores}.")
+        elif informe.huerfanos or informe.indice_roto:
+            self.stdout.write("Nada se borro. Correr con --borrar para liberar el espacio.")
@@ -0,0 +1,75 @@
+# core/management/commands/procesar_media.py
+"""
+Worker de la cola de media (ver core.cola).
+
+    python manage.py procesar_media               # corre hasta recibir SIGTERM/SIGINT
+    python manage.py procesar_media --una-vez     # vacia la cola y termina
+
+Toma los trabajos de a uno; con la cola vacia espera ``--intervalo``
+segundos. Cada tanto devuelve a la cola los trabajos colgados de un worker
+caido, borra los terminados hace mas de ``--retener-dias`` y descarta las
+subidas por partes abandonadas (core.subidas). Se pueden correr varios a la vez.
+"""
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core import cola, subidas
+from core.models import TrabajoMedia
+
+
+# Cada cuantas vueltas sin trabajo se hace el mantenimiento
+VUELTAS_MANTENIMIENTO = 30
+
+
+class Command(BaseCommand):
+    help = "Procesa los archivos subidos desde el panel que esperan en la cola de media."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--una-vez", action="store_true", help="Procesa lo pendiente y termina.")
+        parser.add_argument("--intervalo", type=float, default=2.0, help="Segundos de espera con la cola vacia.")
+        parser.add_argument("--retener-dias", type=int, default=7, help="Dias que se guardan los trabajos terminados.")
+
+    def handle(self, *args, **opts):
+        self.detener = False
+        signal.signal(signal.SIGTERM, self._detener)
+        signal.signal(signal.SIGINT, self._detener)
+
+        self._mantenimiento(opts["retener_dias"])
+        procesados = errores = vueltas = 0
+        while not self.detener:
+            # Proceso largo: no quedarse con conexiones vencidas
+            close_old_connections()
+            trabajo = cola.tomar()
+            if trabajo is None:
+                if opts["una_vez"]:
+                    break
+                vueltas += 1
+                if vueltas % VUELTAS_MANTENIMIENTO == 0:
+                    self._mantenimiento(opts["retener_dias"])
+                time.sleep(opts["intervalo"])
+                continue
+
+            estado = cola.procesar(trabajo)
+            if estado == TrabajoMedia.LISTO:
+                procesados += 1
+            elif estado == TrabajoMedia.ERROR:
+                errores += 1
+                self.stderr.write(f"Error en trabajo {trabajo.pk} ({trabajo.nombre_original})")
+            if opts["verbosity"] > 1:
+                self.stdout.write(f"{trabajo}: {estado}")
+
+        self.stdout.write(f"Procesados: {procesados}. Con error: {errores}.")
+
+    def _detener(self, signum, frame):
+        # Termina el trabajo en curso y sale
+        self.detener = True
+
+    def _mantenimiento(self, retener_dias):
+        recuperados = cola.recuperar_colgados()
+        borrados = cola.purgar(retener_dias)
+        vencidas = subidas.limpiar_vencidas()
+        if recuperados or borrados or vencidas:
+            self.stdout.write(f"Recuperados: {recuperados}. Purgados: {borrados}. Subidas vencidas: {vencidas}.")
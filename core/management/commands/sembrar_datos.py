@@ -0,0 +1,397 @@
+# core/management/commands/sembrar_datos.py
+"""
+Genera datos sinteticos para pruebas de carga y escala.
+
+    python manage.py sembrar_datos --equipo 5000 --publicaciones 50000
+    python manage.py sembrar_datos --escala 0.1 --semilla 7
+    python manage.py sembrar_datos --limpiar
+
+Todo se inserta con ``bulk_create`` por lotes dentro de una transaccion, asi
+que no corren las señales: los campos desnormalizados de busqueda se calculan
+al generar cada fila, y al final se escriben las filas FTS (SQLite) y se
+resuelven las portadas de eventos. Con la misma semilla y las mismas
+cantidades se generan siempre los mismos datos.
+
+Las filas quedan asociadas al usuario ``sintetico`` (inactivo); los autores y
+catalogos llevan la marca ``(sintetico)``. ``--limpiar`` borra todo eso.
+"""
+import io
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import busqueda, nombres, portadas
+from core.models import (
+    Autor, Equipo, EquipoInteres, EquipoUniversidad, Evento, EventoArchivo,
+    Investigacion, InvestigacionArchivo, InvestigacionFoto, InvestigacionIntegrante,
+    Nivel, Noticia, NoticiaImagen, Profesionalidad,
+    Publicacion, PublicacionArchivo, PublicacionAutor, PublicacionImagen,
+    PublicacionIntegrante, PublicacionVideo, TemaInteres, Universidad,
+)
+
+
+USUARIO_SINTETICO = "sintetico"
+MARCA = " (sintetico)"
+
+# Cantidades por defecto (se multiplican por --escala)
+CANTIDADES = {
+    "equipo": 500,
+    "autores": 1000,
+    "publicaciones": 5000,
+    "investigaciones": 500,
+    "noticias": 500,
+    "eventos": 200,
+}
+
+# Tope de ids por consulta al escribir el indice (limite de variables de SQLite)
+LOTE_INDICE = 500
+
+NOMBRES = [
+    "Ana", "Bruno", "Carla", "Diego", "Elena", "Facundo", "Gabriela", "Hernán", "Inés", "Joaquín",
+    "Lucía", "Martín", "Natalia", "Óscar", "Paula", "Ramiro", "Sofía", "Tomás", "Valeria", "Zoe",
+]
+APELLIDOS = [
+    "Álvarez", "Benítez", "Castro", "Domínguez", "Fernández", "García", "Giménez", "Herrera",
+    "López", "Martínez", "Núñez", "Pérez", "Quiroga", "Ramírez", "Sánchez", "Torres", "Vázquez",
+]
+PALABRAS = [
+    "evaluación", "impacto", "energía", "sostenible", "costera", "producción", "hortícola",
+    "riesgo", "ambiental", "cuenca", "territorio", "extensión", "comunidad", "suelo", "agua",
+    "modelo", "indicadores", "gestión", "residuos", "biodiversidad", "políticas", "cambio",
+    "climático", "urbano", "rural", "datos", "monitoreo", "calidad", "educación", "salud",
+]
+ROLES = ["Investigador", "Becario", "Director", "Codirector", "Técnico", "Tesista", "Colaborador"]
+TEMAS = [
+    "Economía ecológica", "Gestión costera", "Energías renovables", "Agroecología",
+    "Ordenamiento territorial", "Recursos hídricos", "Educación ambiental", "Residuos urbanos",
+    "Cambio climático", "Biodiversidad", "Salud ambiental", "Turismo sostenible",
+]
+UNIVERSIDADES = [
+    "Universidad Nacional de Mar del Plata", "Universidad de Buenos Aires",
+    "Universidad Nacional de La Plata", "Universidad Nacional del Sur",
+    "Universidad Nacional de Córdoba", "Universidad Nacional de Rosario",
+]
+NIVELES = ["Doctorado", "Maestría", "Grado", "Estudiante"]
+
+# Placeholders compartidos por todas las filas (se crean una sola vez)
+IMAGENES_PLACEHOLDER = 8
+PDF_PLACEHOLDER = (
+    b"%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+    b"2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n"
+    b"3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 200 200]>>endobj\n"
+    b"trailer<</Root 1 0 R>>\n%%EOF\n"
+)
+# Solo la caja ftyp: alcanza para que el archivo exista y tenga el tipo correcto
+MP4_PLACEHOLDER = b"\x00\x00\x00\x18ftypmp42\x00\x00\x00\x00mp42isom"
+
+
+class Command(BaseCommand):
+    help = "Genera datos sinteticos deterministas para pruebas de carga (o los borra con --limpiar)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--semilla", type=int, default=1, help="Semilla del generador (default: 1).")
+        parser.add_argument("--escala", type=float, default=1.0, help="Multiplica las cantidades por defecto.")
+        for nombre, cantidad in CANTIDADES.items():
+            parser.add_argument(f"--{nombre}", type=int, help=f"Cantidad de {nombre} (default: {cantidad} x escala).")
+        parser.add_argument("--lote", type=int, default=2000, help="Filas por INSERT (default: 2000).")
+        parser.add_argument("--sin-media", action="store_true", help="No escribir archivos placeholder en el storage.")
+        parser.add_argument("--limpiar", action="store_true", help="Borrar los datos sinteticos existentes y salir.")
+
+    def handle(self, *args, **opts):
+        if opts["limpiar"]:
+            self.limpiar()
+            return
+
+        self.rng = random.Random(opts["semilla"])
+        self.lote = opts["lote"]
+        cantidades = {
+            nombre: opts[nombre] if opts[nombre] is not None else int(cantidad * opts["escala"])
+            for nombre, cantidad in CANTIDADES.items()
+        }
+        self.media = self.crear_media(opts["sin_media"])
+
+        with transaction.atomic():
+            self.usuario = self.obtener_usuario()
+            self.crear_catalogos()
+            equipo = self.crear_equipo(cantidades["equipo"])
+            autores = self.crear_autores(cantidades["autores"])
+            publicaciones = self.crear_publicaciones(cantidades["publicaciones"], equipo, autores)
+            self.crear_investigaciones(cantidades["investigaciones"], equipo)
+            self.crear_noticias(cantidades["noticias"])
+            eventos = self.crear_eventos(cantidades["eventos"])
+
+            self.stdout.write("Escribiendo indices de busqueda y portadas...")
+            for objetos in _en_lotes(equipo, LOTE_INDICE):
+                busqueda.INDICE_EQUIPO.escribir_fts(objetos, [o.pk for o in objetos])
+            for objetos in _en_lotes(publicaciones, LOTE_INDICE):
+                busqueda.INDICE_PUBLICACIONES.escribir_fts(objetos, [o.pk for o in objetos])
+            for ids in _en_lotes(eventos, LOTE_INDICE):
+                portadas.resolver_eventos(ids)
+
+        nombres.invalidar("equipo")
+        nombres.invalidar("autor")
+        self.stdout.write(self.style.SUCCESS(
+            "Listo: " + ", ".join(f"{cantidad} {nombre}" for nombre, cantidad in cantidades.items())
+        ))
+
+    # ------------------ helpers ------------------
+
+    def insertar(self, model, objetos):
+        model.objects.bulk_create(objetos, batch_size=self.lote)
+
+    def insertar_con_pk(self, model, objetos, filtro):
+        """
+        Inserta y asigna el pk a cada objeto. No todos los backends devuelven
+        pks en ``bulk_create``, asi que se releen en orden de insercion.
+        """
+        self.insertar(model, objetos)
+        if objetos:
+            ids = list(model.objects.filter(**filtro).order_by("id").values_list("id", flat=True))
+            for objeto, pk in zip(objetos, ids[-len(objetos):]):
+                objeto.pk = pk
+        return objetos
+
+    def texto(self, minimo, maximo):
+        return " ".join(self.rng.choices(PALABRAS, k=self.rng.randint(minimo, maximo)))
+
+    def titulo(self):
+        return self.texto(3, 8).capitalize()[:200]
+
+    def fecha(self):
+        return date(2010, 1, 1) + timedelta(days=self.rng.randrange(16 * 365))
+
+    def nombre_persona(self):
+        return f"{self.rng.choice(NOMBRES)} {self.rng.choice(APELLIDOS)} {self.rng.choice(APELLIDOS)}"
+
+    def imagen(self):
+        return self.rng.choice(self.media["imagenes"])
+
+    # ------------------ media ------------------
+
+    def crear_media(self, sin_media):
+        """Unos pocos archivos chicos en el storage que comparten todas las filas."""
+        media = {
+            "imagenes": [f"sinteticos/imagen-{i}.png" for i in range(IMAGENES_PLACEHOLDER)],
+            "pdf": "sinteticos/documento.pdf",
+            "video": "sinteticos/video.mp4",
+        }
+        if sin_media:
+            return media
+
+        from PIL import Image
+
+        colores = random.Random(0)
+        for nombre in media["imagenes"]:
+            if default_storage.exists(nombre):
+                continue
+            color = tuple(colores.randrange(256) for _ in range(3))
+            buffer = io.BytesIO()
+            Image.new("RGB", (320, 200), color).save(buffer, format="PNG")
+            default_storage.save(nombre, ContentFile(buffer.getvalue()))
+        for nombre, contenido in ((media["pdf"], PDF_PLACEHOLDER), (media["video"], MP4_PLACEHOLDER)):
+            if not default_storage.exists(nombre):
+                default_storage.save(nombre, ContentFile(contenido))
+        return media
+
+    # ------------------ modelos ------------------
+
+    def obtener_usuario(self):
+        User = get_user_model()
+        usuario, creado = User.objects.get_or_create(
+            username=USUARIO_SINTETICO, defaults={"is_active": False, "first_name": "Datos", "last_name": "sinteticos"},
+        )
+        if creado:
+            usuario.set_unusable_password()
+            usuario.save(update_fields=["password"])
+        return usuario
+
+    def crear_catalogos(self):
+        Nivel.objects.bulk_create([Nivel(descripcion=n + MARCA) for n in NIVELES], ignore_conflicts=True)
+        TemaInteres.objects.bulk_create(
+            [TemaInteres(descripcion_interes=t + MARCA) for t in TEMAS], ignore_conflicts=True,
+        )
+        Universidad.objects.bulk_create(
+            [Universidad(descripcion_universidad=u + MARCA) for u in UNIVERSIDADES], ignore_conflicts=True,
+        )
+        self.niveles = list(Nivel.objects.filter(descripcion__endswith=MARCA).order_by("id"))
+        self.temas = list(TemaInteres.objects.filter(descripcion_interes__endswith=MARCA).order_by("id"))
+        self.universidades = list(Universidad.objects.filter(descripcion_universidad__endswith=MARCA).order_by("id"))
+
+    def crear_equipo(self, cantidad):
+        """Integrantes con roles, intereses y universidades; ``documento_busqueda`` ya armado."""
+        self.stdout.write(f"Equipo: {cantidad}")
+        personas, hijos = [], []
+        for _ in range(cantidad):
+            roles = [self.rng.choice(ROLES) for _ in range(self.rng.randint(1, 3))]
+            temas = self.rng.sample(self.temas, self.rng.randint(0, 4))
+            unis = self.rng.sample(self.universidades, self.rng.randint(0, 2))
+            # Mismo orden que core.busqueda._documentos_por_equipo
+            documento = [*roles, *(t.descripcion_interes for t in temas), *(u.descripcion_universidad for u in unis)]
+            personas.append(Equipo(
+                nombre=self.nombre_persona(),
+                descripcion=self.texto(10, 40),
+                foto=self.imagen(),
+                nivel=self.rng.choice(self.niveles),
+                documento_busqueda=" ".join(documento),
+                user=self.usuario,
+            ))
+            hijos.append((roles, temas, unis))
+        self.insertar_con_pk(Equipo, personas, {"user": self.usuario})
+
+        roles_filas, intereses, universidades = [], [], []
+        for persona, (roles, temas, unis) in zip(personas, hijos):
+            for orden, titulo in enumerate(roles, start=1):
+                roles_filas.append(Profesionalidad(equipo_id=persona.pk, titulo=titulo, orden=orden))
+            for orden, tema in enumerate(temas, start=1):
+                intereses.append(EquipoInteres(equipo_id=persona.pk, tema_interes=tema, orden=orden))
+            for orden, uni in enumerate(unis, start=1):
+                universidades.append(EquipoUniversidad(equipo_id=persona.pk, universidad=uni, orden=orden))
+        self.insertar(Profesionalidad, roles_filas)
+        self.insertar(EquipoInteres, intereses)
+        self.insertar(EquipoUniversidad, universidades)
+        return personas
+
+    def crear_autores(self, cantidad):
+        self.stdout.write(f"Autores: {cantidad}")
+        autores = [
+            Autor(nombre=self.nombre_persona(), afiliacion=self.rng.choice(UNIVERSIDADES) + MARCA)
+            for _ in range(cantidad)
+        ]
+        return self.insertar_con_pk(Autor, autores, {"afiliacion__endswith": MARCA})
+
+    def crear_publicaciones(self, cantidad, equipo, autores):
+        """Publicaciones con autores, integrantes y media; ``nombres_busqueda`` ya armado."""
+        self.stdout.write(f"Publicaciones: {cantidad}")
+        publicaciones, vinculos = [], []
+        for _ in range(cantidad):
+            pub_autores = self.rng.sample(autores, min(len(autores), self.rng.randint(1, 4)))
+            pub_integrantes = self.rng.sample(equipo, min(len(equipo), self.rng.randint(0, 4)))
+            # Mismo orden que core.busqueda._nombres_por_publicacion
+            nombres_pub = [a.nombre for a in pub_autores] + [i.nombre for i in pub_integrantes]
+            publicaciones.append(Publicacion(
+                titulo=self.titulo(),
+                autores=", ".join(self.nombre_persona() for _ in range(self.rng.randint(1, 3)))[:200],
+                resumen=self.texto(30, 120),
+                fecha=self.fecha(),
+                nombres_busqueda=" ".join(nombres_pub),
+                user=self.usuario,
+            ))
+            vinculos.append((pub_autores, pub_integrantes))
+        self.insertar_con_pk(Publicacion, publicaciones, {"user": self.usuario})
+
+        filas = {PublicacionAutor: [], PublicacionIntegrante: [], PublicacionImagen: [],
+                 PublicacionArchivo: [], PublicacionVideo: []}
+        for pub, (pub_autores, pub_integrantes) in zip(publicaciones, vinculos):
+            pk = pub.pk
+            for orden, autor in enumerate(pub_autores, start=1):
+                filas[PublicacionAutor].append(PublicacionAutor(publicacion_id=pk, autor_id=autor.pk, orden=orden))
+            for orden, integ in enumerate(pub_integrantes, start=1):
+                filas[PublicacionIntegrante].append(PublicacionIntegrante(publicacion_id=pk, integrante_id=integ.pk, orden=orden))
+            for orden in range(1, self.rng.randint(0, 3) + 1):
+                filas[PublicacionImagen].append(PublicacionImagen(publicacion_id=pk, imagen=self.imagen(), orden=orden))
+            for orden in range(1, self.rng.randint(0, 2) + 1):
+                filas[PublicacionArchivo].append(PublicacionArchivo(
+                    publicacion_id=pk, archivo=self.media["pdf"], nombre=f"Documento {orden}", orden=orden,
+                ))
+            if self.rng.random() < 0.2:
+                filas[PublicacionVideo].append(PublicacionVideo(publicacion_id=pk, video=self.media["video"], orden=1))
+        for model, objetos in filas.items():
+            self.insertar(model, objetos)
+        return publicaciones
+
+    def crear_investigaciones(self, cantidad, equipo):
+        self.stdout.write(f"Investigaciones: {cantidad}")
+        investigaciones = [
+            Investigacion(
+                titulo=self.titulo(),
+                descripcion=self.texto(40, 150),
+                fecha=self.fecha(),
+                imagen_portada=self.imagen() if self.rng.random() < 0.5 else None,
+                user=self.usuario,
+            )
+            for _ in range(cantidad)
+        ]
+        self.insertar_con_pk(Investigacion, investigaciones, {"user": self.usuario})
+
+        fotos, archivos, integrantes = [], [], []
+        for inv in investigaciones:
+            for orden in range(1, self.rng.randint(0, 4) + 1):
+                fotos.append(InvestigacionFoto(investigacion_id=inv.pk, foto=self.imagen(), orden=orden))
+            for orden in range(1, self.rng.randint(0, 2) + 1):
+                archivos.append(InvestigacionArchivo(
+                    investigacion_id=inv.pk, archivo=self.media["pdf"], nombre=f"Informe {orden}", orden=orden,
+                ))
+            for orden, integ in enumerate(self.rng.sample(equipo, min(len(equipo), self.rng.randint(1, 5))), start=1):
+                integrantes.append(InvestigacionIntegrante(
+                    investigacion_id=inv.pk, integrante_id=integ.pk, rol=self.rng.choice(ROLES), orden=orden,
+                ))
+        self.insertar(InvestigacionFoto, fotos)
+        self.insertar(InvestigacionArchivo, archivos)
+        self.insertar(InvestigacionIntegrante, integrantes)
+
+    def crear_noticias(self, cantidad):
+        self.stdout.write(f"Noticias: {cantidad}")
+        noticias = [
+            Noticia(
+                titulo=self.titulo(),
+                contenido=self.texto(40, 200),
+                fecha=self.fecha(),
+                imagen=self.imagen() if self.rng.random() < 0.7 else None,
+                user=self.usuario,
+            )
+            for _ in range(cantidad)
+        ]
+        self.insertar_con_pk(Noticia, noticias, {"user": self.usuario})
+        self.insertar(NoticiaImagen, [
+            NoticiaImagen(noticia_id=noticia.pk, imagen=self.imagen(), orden=orden)
+            for noticia in noticias
+            for orden in range(1, self.rng.randint(0, 3) + 1)
+        ])
+
+    def crear_eventos(self, cantidad):
+        """Eventos con archivos; devuelve los ids para resolver portadas al final."""
+        self.stdout.write(f"Eventos: {cantidad}")
+        eventos = []
+        for _ in range(cantidad):
+            inicio = self.fecha()
+            eventos.append(Evento(
+                nombre=self.titulo(),
+                descripcion=self.texto(20, 80),
+                fecha=inicio,
+                fecha_cierre=inicio + timedelta(days=self.rng.randint(0, 30)),
+                user=self.usuario,
+            ))
+        self.insertar_con_pk(Evento, eventos, {"user": self.usuario})
+
+        archivos = []
+        for evento in eventos:
+            for orden in range(1, self.rng.randint(0, 3) + 1):
+                nombre = self.imagen() if orden == 1 and self.rng.random() < 0.6 else self.media["pdf"]
+                archivos.append(EventoArchivo(evento_id=evento.pk, archivo=nombre, nombre=f"Archivo {orden}", orden=orden))
+        self.insertar(EventoArchivo, archivos)
+        return [evento.pk for evento in eventos]
+
+    # ------------------ limpieza ------------------
+
+    def limpiar(self):
+        User = get_user_model()
+        with transaction.atomic():
+            # Equipo, publicaciones, investigaciones, noticias y eventos caen en cascada con el usuario
+            borrados, _ = User.objects.filter(username=USUARIO_SINTETICO).delete()
+            borrados += Autor.objects.filter(afiliacion__endswith=MARCA).delete()[0]
+            borrados += Nivel.objects.filter(descripcion__endswith=MARCA).delete()[0]
+            borrados += TemaInteres.objects.filter(descripcion_interes__endswith=MARCA).delete()[0]
+            borrados += Universidad.objects.filter(descripcion_universidad__endswith=MARCA).delete()[0]
+        nombres.invalidar("equipo")
+        nombres.invalidar("autor")
+        self.stdout.write(self.style.SUCCESS(f"Borradas {borrados} filas sinteticas."))
+
+
+def _en_lotes(filas, tamano):
+    for inicio in range(0, len(filas), tamano):
+        yield filas[inicio:inicio + tamano]
@@ -0,0 +1,74 @@
+from django.db import migrations, models
+
+
+# Debe coincidir con el vector que arma core.busqueda con
+# INDICE_PUBLICACIONES.pesos_pg (aca sin calificar la tabla)
+PG_VECTOR = (
+    "(setweight(to_tsvector('spanish'::regconfig, coalesce(titulo, '')), 'A')"
+    " || setweight(to_tsvector('spanish'::regconfig, coalesce(autores, '')"
+    " || ' ' || coalesce(nombres_busqueda, '')), 'B')"
+    " || setweight(to_tsvector('spanish'::regconfig, coalesce(resumen, '')), 'C'))"
+)
+
+
+def crear_indice(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    Publicacion = apps.get_model('core', 'Publicacion')
+    PublicacionAutor = apps.get_model('core', 'PublicacionAutor')
+    PublicacionIntegrante = apps.get_model('core', 'PublicacionIntegrante')
+
+    # Poblar nombres_busqueda para las filas existentes
+    nombres = {}
+    for pa in PublicacionAutor.objects.select_related('autor__user').order_by('orden', 'id'):
+        autor = pa.autor
+        if autor.user_id:
+            nombre = (f"{autor.user.first_name} {autor.user.last_name}".strip() or autor.user.username)
+        else:
+            nombre = autor.nombre
+        nombres.setdefault(pa.publicacion_id, []).append(nombre)
+    for pub_id, nombre in PublicacionIntegrante.objects.order_by('orden', 'id').values_list('publicacion_id', 'integrante__nombre'):
+        nombres.setdefault(pub_id, []).append(nombre)
+    publicaciones = list(Publicacion.objects.all())
+    for pub in publicaciones:
+        pub.nombres_busqueda = " ".join(n for n in nombres.get(pub.pk, []) if n)
+    Publicacion.objects.bulk_update(publicaciones, ['nombres_busqueda'], batch_size=500)
+
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS cuerpo_publicacion_fts_idx ON cuerpo_publicacion USING GIN ({PG_VECTOR})"
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS cuerpo_publicacion_fts USING fts5("
+            "titulo, autores, nombres, resumen, "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(
+                "INSERT INTO cuerpo_publicacion_fts (rowid, titulo, autores, nombres, resumen) VALUES (%s, %s, %s, %s, %s)",
+                [(p.pk, p.titulo, p.autores, p.nombres_busqueda, p.resumen) for p in publicaciones],
+            )
+
+
+def borrar_indice(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS cuerpo_publicacion_fts_idx")
+    elif vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS cuerpo_publicacion_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_add_publicacion_integrante'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publicacion',
+            name='nombres_busqueda',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(crear_indice, borrar_indice),
+    ]
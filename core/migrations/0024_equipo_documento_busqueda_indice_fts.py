@@ -0,0 +1,71 @@
+from django.db import migrations, models
+
+
+# Debe coincidir con core.busqueda.INDICE_EQUIPO.vector_pg (sin calificar la tabla)
+PG_VECTOR = (
+    "(setweight(to_tsvector('spanish'::regconfig, coalesce(nombre, '')), 'A')"
+    " || setweight(to_tsvector('spanish'::regconfig, coalesce(documento_busqueda, '')), 'B'))"
+)
+
+
+def crear_indice(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    Equipo = apps.get_model('core', 'Equipo')
+    Profesionalidad = apps.get_model('core', 'Profesionalidad')
+    EquipoInteres = apps.get_model('core', 'EquipoInteres')
+    EquipoUniversidad = apps.get_model('core', 'EquipoUniversidad')
+
+    # Poblar documento_busqueda para las filas existentes
+    partes = {}
+    filas = (
+        Profesionalidad.objects.order_by('orden', 'id').values_list('equipo_id', 'titulo'),
+        EquipoInteres.objects.order_by('orden', 'id').values_list('equipo_id', 'tema_interes__descripcion_interes'),
+        EquipoUniversidad.objects.order_by('orden', 'id').values_list('equipo_id', 'universidad__descripcion_universidad'),
+    )
+    for qs in filas:
+        for equipo_id, texto in qs:
+            partes.setdefault(equipo_id, []).append(texto)
+    equipo = list(Equipo.objects.all())
+    for persona in equipo:
+        persona.documento_busqueda = " ".join(t for t in partes.get(persona.pk, []) if t)
+    Equipo.objects.bulk_update(equipo, ['documento_busqueda'], batch_size=500)
+
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS cuerpo_equipo_fts_idx ON cuerpo_equipo USING GIN ({PG_VECTOR})"
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS cuerpo_equipo_fts USING fts5("
+            "nombre, documento, "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(
+                "INSERT INTO cuerpo_equipo_fts (rowid, nombre, documento) VALUES (%s, %s, %s)",
+                [(p.pk, p.nombre, p.documento_busqueda) for p in equipo],
+            )
+
+
+def borrar_indice(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS cuerpo_equipo_fts_idx")
+    elif vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS cuerpo_equipo_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_publicacion_nombres_busqueda_indice_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipo',
+            name='documento_busqueda',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(crear_indice, borrar_indice),
+    ]
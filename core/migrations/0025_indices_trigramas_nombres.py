@@ -0,0 +1,45 @@
+from django.db import migrations
+
+
+# unaccent() no es IMMUTABLE; se envuelve para poder usarla en indices.
+PG_CREAR = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    "CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text "
+    "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT "
+    "AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$",
+    "CREATE INDEX IF NOT EXISTS cuerpo_equipo_nombre_trgm_idx "
+    "ON cuerpo_equipo USING GIN (f_unaccent(lower(nombre)) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS core_autor_nombre_trgm_idx "
+    "ON core_autor USING GIN (f_unaccent(lower(nombre)) gin_trgm_ops)",
+]
+
+PG_BORRAR = [
+    "DROP INDEX IF EXISTS core_autor_nombre_trgm_idx",
+    "DROP INDEX IF EXISTS cuerpo_equipo_nombre_trgm_idx",
+    "DROP FUNCTION IF EXISTS f_unaccent(text)",
+]
+
+
+def crear_indices(apps, schema_editor):
+    # En SQLite el indice de trigramas vive en memoria (core.nombres)
+    if schema_editor.connection.vendor == 'postgresql':
+        for sql in PG_CREAR:
+            schema_editor.execute(sql)
+
+
+def borrar_indices(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for sql in PG_BORRAR:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_equipo_documento_busqueda_indice_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices, borrar_indices),
+    ]
@@ -0,0 +1,53 @@
+from django.db import migrations, models
+
+
+# Mismo criterio que core.portadas.resolver_eventos
+EXTENSIONES_IMAGEN = (".jpg", ".jpeg", ".png", ".webp", ".gif")
+
+
+def _url(archivo):
+    try:
+        return archivo.url
+    except Exception:
+        return ""
+
+
+def resolver_portadas(apps, schema_editor):
+    Evento = apps.get_model('core', 'Evento')
+    eventos = list(Evento.objects.all())
+    for evento in eventos:
+        portada = _url(evento.imagen_portada) if evento.imagen_portada else ""
+        descargas = []
+        for a in evento.archivos.order_by('orden', 'id'):
+            if not a.archivo:
+                continue
+            url = _url(a.archivo)
+            if not url:
+                continue
+            descargas.append({"nombre": a.nombre or a.archivo.name, "url": url})
+            if not portada and a.archivo.name.lower().endswith(EXTENSIONES_IMAGEN):
+                portada = url
+        evento.portada_url = portada
+        evento.descargas = descargas
+    Evento.objects.bulk_update(eventos, ['portada_url', 'descargas'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_investigacion_fecha_actualizacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evento',
+            name='portada_url',
+            field=models.CharField(blank=True, default='', editable=False, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='evento',
+            name='descargas',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.RunPython(resolver_portadas, migrations.RunPython.noop),
+    ]
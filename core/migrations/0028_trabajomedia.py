@@ -0,0 +1,39 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0027_evento_portada_url_descargas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabajoMedia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('destino', models.CharField(max_length=50)),
+                ('objeto_id', models.PositiveIntegerField()),
+                ('orden', models.IntegerField(default=0)),
+                ('nombre', models.CharField(blank=True, max_length=200)),
+                ('nombre_original', models.CharField(max_length=255)),
+                ('contenido', models.BinaryField(blank=True)),
+                ('tamano', models.PositiveBigIntegerField(default=0)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('listo', 'Listo'), ('error', 'Error')], default='pendiente', max_length=20)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('iniciado', models.DateTimeField(blank=True, null=True)),
+                ('terminado', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(blank=True, db_column='id_user', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='trabajos_media', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'cuerpo_trabajo_media',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['estado', 'id'], name='cuerpo_trab_estado_idx'), models.Index(fields=['destino', 'objeto_id'], name='cuerpo_trab_destino_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0028_trabajomedia'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='investigacion',
+            name='derivadas',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='investigacionfoto',
+            name='derivadas',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='publicacionimagen',
+            name='derivadas',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='noticia',
+            name='derivadas',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='noticiaimagen',
+            name='derivadas',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='evento',
+            name='derivadas',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
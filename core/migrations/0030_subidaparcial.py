@@ -0,0 +1,37 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0029_derivadas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubidaParcial',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=32, unique=True)),
+                ('destino', models.CharField(max_length=50)),
+                ('objeto_id', models.PositiveIntegerField()),
+                ('nombre', models.CharField(max_length=255)),
+                ('tamano', models.PositiveBigIntegerField()),
+                ('tamano_parte', models.PositiveIntegerField()),
+                ('recibido', models.PositiveBigIntegerField(default=0)),
+                ('sha256', models.CharField(blank=True, max_length=64)),
+                ('reemplazar', models.BooleanField(default=False)),
+                ('estado', models.CharField(choices=[('abierta', 'Abierta'), ('completa', 'Completa'), ('error', 'Error')], default='abierta', max_length=20)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(blank=True, db_column='id_user', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='subidas_parciales', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'cuerpo_subida_parcial',
+                'ordering': ['-id'],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+import os
+import uuid
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+
+def contenido_a_archivos(apps, schema_editor):
+    # Lo que quedaba en la cola pasa de la base al storage de media, bajo
+    # cola/ (core.cola.PREFIJO), sin pasar por el storage deduplicado
+    TrabajoMedia = apps.get_model("core", "TrabajoMedia")
+    espera = getattr(default_storage, "interno", default_storage)
+    pendientes = TrabajoMedia.objects.exclude(contenido=b"").only("pk", "destino", "nombre_original")
+    for trabajo in pendientes.iterator(chunk_size=20):
+        contenido = TrabajoMedia.objects.filter(pk=trabajo.pk).values_list("contenido", flat=True)[0]
+        extension = os.path.splitext(trabajo.nombre_original)[1].lower()
+        ruta = espera.save(f"cola/{trabajo.destino}/{uuid.uuid4().hex}{extension}", ContentFile(bytes(contenido)))
+        TrabajoMedia.objects.filter(pk=trabajo.pk).update(ruta=ruta)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0033_fecha_actualizacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trabajomedia',
+            name='ruta',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.RunPython(contenido_a_archivos, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='trabajomedia',
+            name='contenido',
+        ),
+    ]
@@ -1,6 +1,7 @@
 ﻿from django.conf import settings
 from django.db import models
 from django.core.validators import RegexValidator
+from django.utils import timezone
 
 
 # ----------------- CATALOGOS -----------------
@@ -51,7 +52,11 @@ class Investigacion(models.Model):
     descripcion = models.TextField(blank=True)
     fecha = models.DateField(null=True, blank=True, verbose_name="Fecha de la investigacion")
     imagen_portada = models.ImageField(upload_to='investigaciones/portadas/', blank=True, null=True, verbose_name="Imagen de portada")
+    derivadas = models.JSONField(default=dict, blank=True, editable=False)  # core.derivadas
     video_portada = models.FileField(upload_to='investigaciones/videos/', blank=True, null=True, verbose_name="Video de portada", help_text="Archivo de video (MP4, WebM, etc.)")
+    # Se actualiza al guardar y cuando cambian fotos/archivos/integrantes (core.signals).
+    # Sirve de validador para ETag/Last-Modified (core.validadores).
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
 
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -87,6 +92,7 @@ class InvestigacionFoto(models.Model):
         db_column="investigacion_id"
     )
     foto = models.ImageField(upload_to='investigaciones/fotos/', verbose_name="Foto")
+    derivadas = models.JSONField(default=dict, blank=True, editable=False)  # core.derivadas
     orden = models.IntegerField(default=0)
 
     class Meta:
@@ -168,6 +174,13 @@ class Publicacion(models.Model):
     imagen = models.CharField(max_length=100, blank=True)     # texto/URL
     video = models.CharField(max_length=100, blank=True)      # texto/URL
 
+    # Nombres de Autor/Equipo vinculados, desnormalizados para el indice de busqueda
+    # (lo mantiene core.busqueda via señales; no se edita a mano)
+    nombres_busqueda = models.TextField(blank=True, default='', editable=False)
+    # Se actualiza al guardar y cuando cambian sus filas hijas, autores o
+    # integrantes (core.signals). Validador de ETag/Last-Modified (core.validadores).
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -228,6 +241,7 @@ class PublicacionImagen(models.Model):
         related_name="imagenes"
     )
     imagen = models.ImageField(upload_to='publicaciones/imagenes/', blank=True, null=True, verbose_name="Imagen")
+    derivadas = models.JSONField(default=dict, blank=True, editable=False)  # core.derivadas
     orden = models.IntegerField(default=0)
 
     class Meta:
@@ -305,7 +319,11 @@ class Noticia(models.Model):
     contenido = models.TextField(blank=True)
     fecha = models.DateField(null=True, blank=True, verbose_name="Fecha de la noticia")
     imagen = models.ImageField(upload_to='noticias/', blank=True, null=True, verbose_name="Imagen principal")
+    derivadas = models.JSONField(default=dict, blank=True, editable=False)  # core.derivadas
     video = models.FileField(upload_to='noticias/videos/', blank=True, null=True, verbose_name="Video", help_text="Archivo de video (MP4, WebM, etc.)")
+    # Se actualiza al guardar y cuando cambian sus imagenes (core.signals).
+    # Validador de ETag/Last-Modified (core.validadores).
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
 
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -331,6 +349,7 @@ class NoticiaImagen(models.Model):
         related_name="imagenes"
     )
     imagen = models.ImageField(upload_to='noticias/galeria/', blank=True, null=True, verbose_name="Imagen")
+    derivadas = models.JSONField(default=dict, blank=True, editable=False)  # core.derivadas
     orden = models.IntegerField(default=0)
 
     class Meta:
@@ -353,6 +372,15 @@ class Evento(models.Model):
     archivo = models.CharField(max_length=100, blank=True)
     fecha_cierre = models.DateField(null=True, blank=True)
 
+    # Portada y lista de descargas ({nombre, url}) ya resueltas contra el storage
+    # (las mantiene core.portadas via señales; no se editan a mano)
+    portada_url = models.CharField(max_length=500, blank=True, default='', editable=False)
+    descargas = models.JSONField(default=list, blank=True, editable=False)
+    derivadas = models.JSONField(default=dict, blank=True, editable=False)  # core.derivadas
+    # Se actualiza al guardar y cuando cambian sus archivos (core.signals).
+    # Validador de ETag/Last-Modified (core.validadores).
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -417,7 +445,14 @@ class Equipo(models.Model):
         verbose_name="Color de Perfil",
         help_text="Color en formato hexadecimal (ej. #1a4d2e) para la vista de perfil."
     )
-    
+
+    # Roles, temas de interes y universidades desnormalizados para el buscador
+    # del directorio (lo mantiene core.busqueda via señales; no se edita a mano)
+    documento_busqueda = models.TextField(blank=True, default='', editable=False)
+    # Se actualiza al guardar y cuando cambian sus roles, universidades,
+    # intereses o participaciones (core.signals). Validador de ETag/Last-Modified.
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
     nivel = models.ForeignKey(
         Nivel,
         on_delete=models.SET_NULL,
@@ -525,3 +560,167 @@ class Profesionalidad(models.Model):
     def __str__(self):
         return f"{self.equipo}: {self.titulo}"
 
+
+# ----------------- COLA DE MEDIA -----------------
+
+class TrabajoMedia(models.Model):
+    """
+    Archivo subido desde el panel que espera ser guardado en el storage.
+    La vista lo copia al storage de media, bajo ``cola/``, y deja aca la
+    ruta; el worker (``manage.py procesar_media``) lo guarda en su lugar
+    final y crea la fila hija (ver core.cola).
+    """
+    PENDIENTE = "pendiente"
+    PROCESANDO = "procesando"
+    LISTO = "listo"
+    ERROR = "error"
+    ESTADO_CHOICES = (
+        (PENDIENTE, "Pendiente"),
+        (PROCESANDO, "Procesando"),
+        (LISTO, "Listo"),
+        (ERROR, "Error"),
+    )
+
+    destino = models.CharField(max_length=50)        # clave de core.cola.DESTINOS
+    objeto_id = models.PositiveIntegerField()         # pk del padre (Noticia, Publicacion, ...)
+    orden = models.IntegerField(default=0)
+    nombre = models.CharField(max_length=200, blank=True)
+    nombre_original = models.CharField(max_length=255)
+    ruta = models.CharField(max_length=255, blank=True)  # en el storage, bajo cola/; se borra al terminar
+    tamano = models.PositiveBigIntegerField(default=0)
+
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default=PENDIENTE)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    creado = models.DateTimeField(auto_now_add=True)
+    iniciado = models.DateTimeField(null=True, blank=True)
+    terminado = models.DateTimeField(null=True, blank=True)
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name="trabajos_media",
+        db_column="id_user",
+        null=True, blank=True,
+    )
+
+    class Meta:
+        db_table = "cuerpo_trabajo_media"
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["estado", "id"], name="cuerpo_trab_estado_idx"),
+            models.Index(fields=["destino", "objeto_id"], name="cuerpo_trab_destino_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.destino} #{self.objeto_id}: {self.nombre_original} ({self.estado})"
+
+
+# ----------------- SUBIDAS POR PARTES -----------------
+
+class SubidaParcial(models.Model):
+    """
+    Subida reanudable de un archivo grande (videos, fotos de equipo). Las
+    partes se escriben a disco a medida que llegan (ver core.subidas); al
+    completar se verifica el tamaño (y el SHA-256 si vino) y el archivo se
+    adjunta al destino.
+    """
+    ABIERTA = "abierta"
+    COMPLETA = "completa"
+    ERROR = "error"
+    ESTADO_CHOICES = (
+        (ABIERTA, "Abierta"),
+        (COMPLETA, "Completa"),
+        (ERROR, "Error"),
+    )
+
+    token = models.CharField(max_length=32, unique=True)
+    destino = models.CharField(max_length=50)        # clave de core.subidas.DESTINOS
+    objeto_id = models.PositiveIntegerField()
+    nombre = models.CharField(max_length=255)
+    tamano = models.PositiveBigIntegerField()
+    tamano_parte = models.PositiveIntegerField()
+    recibido = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True)       # del archivo completo (opcional)
+    reemplazar = models.BooleanField(default=False)            # galerias: borra lo anterior al completar
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default=ABIERTA)
+    creado = models.DateTimeField(auto_now_add=True)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name="subidas_parciales",
+        db_column="id_user",
+        null=True, blank=True,
+    )
+
+    class Meta:
+        db_table = "cuerpo_subida_parcial"
+        ordering = ["-id"]
+
+    def __str__(self):
+        return f"{self.nombre} ({self.recibido}/{self.tamano})"
+
+
+# ----------------- MEDIA DEDUPLICADA -----------------
+
+class BlobMedia(models.Model):
+    """
+    Archivo unico guardado por core.almacenamiento: un registro por
+    contenido distinto (SHA-256), sin importar cuantas filas lo referencian.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    nombre = models.CharField(max_length=255)          # nombre en el storage (blobs/ab/<sha256>.ext)
+    tamano = models.PositiveBigIntegerField(default=0)
+    creado = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "cuerpo_blob_media"
+
+    def __str__(self):
+        return self.nombre
+
+
+# ----------------- CORREO SALIENTE -----------------
+
+class CorreoSaliente(models.Model):
+    """
+    Mensaje que espera ser enviado por SMTP. Las vistas solo lo guardan; el
+    worker (``manage.py enviar_correos``) lo manda con reintentos (ver core.correo).
+    """
+    PENDIENTE = "pendiente"
+    ENVIANDO = "enviando"
+    ENVIADO = "enviado"
+    ERROR = "error"
+    ESTADO_CHOICES = (
+        (PENDIENTE, "Pendiente"),
+        (ENVIANDO, "Enviando"),
+        (ENVIADO, "Enviado"),
+        (ERROR, "Error"),
+    )
+
+    asunto = models.CharField(max_length=255)
+    cuerpo = models.TextField()
+    remitente = models.CharField(max_length=254)
+    destinatarios = models.JSONField(default=list)
+    responder_a = models.CharField(max_length=254, blank=True)
+
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default=PENDIENTE)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    reclamo = models.CharField(max_length=32, blank=True)     # marca del worker que lo tomo
+    error = models.TextField(blank=True)
+    creado = models.DateTimeField(auto_now_add=True)
+    iniciado = models.DateTimeField(null=True, blank=True)
+    enviado = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "cuerpo_correo_saliente"
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["estado", "proximo_intento"], name="cuerpo_correo_estado_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.asunto} ({self.estado})"
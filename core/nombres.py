@@ -0,0 +1,174 @@
+# core/nombres.py
+"""
+Busqueda difusa de nombres de personas (Equipo y Autor).
+
+Los nombres se normalizan (sin tildes, minusculas) y se comparan por
+trigramas, como ``pg_trgm``:
+
+- Postgres: operador ``<%`` / ``word_similarity`` sobre
+  ``f_unaccent(lower(...))``, con indice GIN ``gin_trgm_ops`` (migracion 0025).
+- Otros motores (SQLite local): indice invertido de trigramas en memoria,
+  reconstruido cuando cambia un Equipo/Autor (ver ``invalidar``).
+
+``buscar_ids`` devuelve ids ordenados por similitud y es lo que usan el
+directorio publico, el admin y el selector de integrantes del panel.
+"""
+import time
+import unicodedata
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import connection
+
+from .models import Autor, Equipo
+
+
+# Igual al default de pg_trgm.word_similarity_threshold, asi ambos motores
+# devuelven resultados parecidos.
+UMBRAL = 0.6
+
+LIMITE = 50
+
+# Los indices en memoria se reconstruyen como maximo cada este tiempo aunque
+# no llegue la invalidacion (otros workers con cache local).
+MAX_EDAD_INDICE = 300
+
+
+def normalizar(texto):
+    """'  Martínez  PÉREZ' -> 'martinez perez'."""
+    texto = unicodedata.normalize("NFKD", texto or "")
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return " ".join("".join(c if c.isalnum() else " " for c in texto.lower()).split())
+
+
+def trigramas(texto):
+    """Trigramas al estilo pg_trgm: cada palabra con dos espacios delante y uno detras."""
+    resultado = set()
+    for palabra in normalizar(texto).split():
+        p = f"  {palabra} "
+        resultado.update(p[i:i + 3] for i in range(len(p) - 2))
+    return resultado
+
+
+class IndiceTrigramas:
+    """Indice invertido trigrama -> ids, para busquedas en memoria."""
+
+    def __init__(self, filas):
+        self.tamanos = {}
+        postings = {}
+        for pk, texto in filas:
+            tri = trigramas(texto)
+            if not tri:
+                continue
+            self.tamanos[pk] = len(tri)
+            for t in tri:
+                postings.setdefault(t, []).append(pk)
+        self.postings = postings
+
+    def buscar(self, q, umbral=UMBRAL, limite=LIMITE):
+        """
+        Similitud = fraccion de los trigramas de la consulta presentes en el
+        nombre (aproxima ``word_similarity``). Devuelve [(id, similitud)].
+        """
+        tri_q = trigramas(q)
+        if not tri_q:
+            return []
+        comunes = Counter()
+        for t in tri_q:
+            lista = self.postings.get(t)
+            if lista:
+                comunes.update(lista)
+        minimo = umbral * len(tri_q)
+        candidatos = [
+            (pk, n / len(tri_q), -self.tamanos[pk])
+            for pk, n in comunes.items() if n >= minimo
+        ]
+        # A igual similitud, primero los nombres mas cortos (mas especificos)
+        candidatos.sort(key=lambda c: (c[1], c[2]), reverse=True)
+        return [(pk, sim) for pk, sim, _ in candidatos[:limite]]
+
+
+# ------------------ Fuentes de nombres ------------------
+
+def _filas_equipo():
+    return Equipo.objects.values_list("id", "nombre").iterator()
+
+
+def _filas_autor():
+    for pk, nombre, first, last, username in Autor.objects.values_list(
+        "id", "nombre", "user__first_name", "user__last_name", "user__username"
+    ).iterator():
+        yield pk, " ".join(t for t in (nombre, first, last, username) if t)
+
+
+_FUENTES = {
+    "equipo": _filas_equipo,
+    "autor": _filas_autor,
+}
+
+# SQL de Postgres por tipo: debe usar las mismas expresiones que los indices de 0025
+_SQL_PG = {
+    "equipo": (
+        "SELECT id, word_similarity(f_unaccent(lower(%s)), f_unaccent(lower(nombre))) AS sim "
+        "FROM cuerpo_equipo WHERE f_unaccent(lower(%s)) <%% f_unaccent(lower(nombre)) "
+        "ORDER BY sim DESC, length(nombre) LIMIT %s"
+    ),
+    "autor": (
+        "SELECT id, max(sim) AS sim FROM ("
+        " SELECT id, word_similarity(f_unaccent(lower(%s)), f_unaccent(lower(nombre))) AS sim"
+        " FROM core_autor WHERE f_unaccent(lower(%s)) <%% f_unaccent(lower(nombre))"
+        " UNION ALL"
+        " SELECT a.id, word_similarity(f_unaccent(lower(%s)),"
+        "   f_unaccent(lower(u.first_name || ' ' || u.last_name || ' ' || u.username))) AS sim"
+        " FROM core_autor a JOIN auth_user u ON u.id = a.user_id"
+        ") t WHERE sim >= %s GROUP BY id ORDER BY sim DESC LIMIT %s"
+    ),
+}
+
+_indices = {}
+
+
+def _clave_version(tipo):
+    return f"nombres:version:{tipo}"
+
+
+def invalidar(tipo):
+    """Marca el indice en memoria de ``tipo`` como desactualizado."""
+    try:
+        cache.incr(_clave_version(tipo))
+    except ValueError:
+        cache.set(_clave_version(tipo), 1, None)
+
+
+def _indice(tipo):
+    version = cache.get(_clave_version(tipo), 0)
+    actual = _indices.get(tipo)
+    if actual is None or actual[0] != version or time.monotonic() - actual[1] > MAX_EDAD_INDICE:
+        actual = (version, time.monotonic(), IndiceTrigramas(_FUENTES[tipo]()))
+        _indices[tipo] = actual
+    return actual[2]
+
+
+def buscar(tipo, q, limite=LIMITE):
+    """[(id, similitud)] de ``tipo`` ('equipo' o 'autor'), de mayor a menor similitud."""
+    if not normalizar(q):
+        return []
+    if connection.vendor == "postgresql":
+        if tipo == "equipo":
+            params = [q, q, limite]
+        else:
+            params = [q, q, q, UMBRAL, limite]
+        with connection.cursor() as cursor:
+            cursor.execute(_SQL_PG[tipo], params)
+            return [(pk, float(sim)) for pk, sim in cursor.fetchall()]
+    return _indice(tipo).buscar(q, limite=limite)
+
+
+def buscar_ids(tipo, q, limite=LIMITE):
+    return [pk for pk, _ in buscar(tipo, q, limite)]
+
+
+def ordenar_por_ids(queryset, ids):
+    """Instancias de ``queryset`` con esos ids, en el mismo orden."""
+    por_id = queryset.in_bulk(ids)
+    return [por_id[pk] for pk in ids if pk in por_id]
@@ -0,0 +1,391 @@
+# core/paginas.py
+"""
+Cache de paginas completas para visitantes anonimos.
+
+Las vistas publicas (``inicio``, ``equipo``, ``publicaciones``, los
+detalles, ...) solo cambian cuando alguien edita desde el panel, pero
+repetian sus consultas y plantillas en cada visita. ``cachear`` guarda la
+respuesta entera por URL y la vuelve a servir sin tocar la base.
+
+Cada pagina se guarda con las *etiquetas* de lo que muestra: tipos
+(``"publicacion"``, ``"equipo"``) u objetos (``"publicacion:12"``). Cada
+etiqueta tiene una version en la cache; la pagina guarda las versiones que
+vio al renderizarse y solo se sirve si siguen siendo las actuales.
+Invalidar es subir la version (``invalidar``), sin buscar ni borrar claves:
+lo que deja de valer se reemplaza en la proxima visita o vence por timeout.
+
+Las señales de core.signals invalidan, al confirmar la transaccion, las
+etiquetas de cada fila que se guarda o borra segun ``DEPENDENCIAS`` (la de
+su tipo y la del objeto, o la del padre para las filas hijas). Lo que se
+escribe con ``update``/``bulk_*`` avisa a mano con ``invalidar_objeto``.
+
+La cache tiene que ser compartida entre procesos (``REDIS_URL`` en
+settings): la web, ``procesar_media`` y ``enviar_correos`` corren aparte y
+lo que invalida uno tiene que llegarle a los demas. Con la cache local de
+cada proceso (``LocMemCache``) ``cachear`` no guarda nada (``activa``), el
+chequeo ``core.W001`` lo avisa y ``manage.py cache_paginas`` no corre.
+
+No se cachea con sesion iniciada, con mensajes pendientes, ni una respuesta
+que no sea 200, que ponga cookies o que haya usado el token CSRF.
+
+Modo publico: un GET sin cookie de sesion ni de mensajes es de un anonimo
+seguro, asi que ``request.user`` se fija en ``AnonymousUser`` sin abrir la
+sesion. Sin sesion no hay ``Vary: Cookie`` ni ``Set-Cookie``, y la respuesta
+sale con ``Cache-Control: public, s-maxage=PAGINAS_S_MAXAGE`` para que la
+guarde un cache compartido (CDN, proxy); el navegador igual revalida
+(``max-age=0``). Los formularios publicos piden el token CSRF aparte
+(``core:csrf``). El CDN tiene que saltear su cache cuando viene la cookie
+de sesion: si no, un usuario logueado veria la version anonima. Lo que se
+edita en el panel puede tardar hasta ``s-maxage`` en verse detras del CDN.
+
+Regeneracion de a uno: cuando una pagina vence (se invalido una etiqueta o
+paso ``PAGINA_TIMEOUT``), todos los workers que la pedian la volvian a
+armar a la vez; en ``publicaciones`` y ``noticias`` eso son varias
+consultas por fila. Ahora el primero toma un candado en la cache
+(``cache.add``, atomico tambien en Redis) y la regenera; mientras tanto los
+demas sirven la copia vieja (``X-Cache: STALE``). El candado vence a los
+``PAGINAS_VENTANA_STALE`` segundos, que es lo maximo que se sirve una copia
+vieja si el worker que regenera se cae. Si no hay copia (primera visita o
+desalojada), los demas esperan hasta ``PAGINAS_ESPERA`` segundos a que
+aparezca antes de armarla por su cuenta.
+
+``contadores`` da los aciertos, fallos, copias viejas servidas y
+regeneraciones (compartidos entre procesos si la cache lo es); se ven con
+``manage.py cache_paginas --contadores``.
+"""
+import hashlib
+import threading
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.contrib.messages.storage.session import SessionStorage
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import parse_http_date_safe
+
+
+# Se invalida explicitamente; el timeout solo acota datos viejos si alguna
+# invalidacion se perdiera (p. ej. cache local con varios procesos).
+PAGINA_TIMEOUT = 60 * 60 * 24
+
+# Segundos que un cache compartido (CDN, proxy) guarda una pagina publica
+S_MAXAGE = settings.PAGINAS_S_MAXAGE
+
+# Segundos que dura el candado de regeneracion: tope para servir una copia
+# vieja. Tiene que ser mas que lo que tarda en armarse la pagina mas lenta.
+VENTANA_STALE = settings.PAGINAS_VENTANA_STALE
+
+# Segundos que se espera a que otro worker arme una pagina que no estaba
+ESPERA = settings.PAGINAS_ESPERA
+_PAUSA = 0.05
+
+# hit: copia vigente; miss: no habia copia; stale: se sirvio una copia vieja
+# mientras otro regeneraba; regeneracion: paginas armadas con el candado.
+CONTADORES = ("hit", "miss", "stale", "regeneracion")
+
+# Etiqueta que llevan todas las paginas: invalidarla vacia la cache entera
+TODAS = "todas"
+
+# Modelo -> [(etiqueta, atributo con el pk o None)]. Guardar o borrar una
+# fila invalida la etiqueta del tipo y, si hay atributo, la del objeto.
+DEPENDENCIAS = {
+    "core.Equipo": [("equipo", "pk")],
+    "core.Profesionalidad": [("equipo", "equipo_id")],
+    "core.EquipoInteres": [("equipo", "equipo_id")],
+    "core.EquipoUniversidad": [("equipo", "equipo_id")],
+    "core.Nivel": [("nivel", None)],
+    "core.TemaInteres": [("temainteres", None)],
+    "core.Universidad": [("universidad", None)],
+    "core.Noticia": [("noticia", "pk")],
+    "core.NoticiaImagen": [("noticia", "noticia_id")],
+    "core.Investigacion": [("investigacion", "pk")],
+    "core.InvestigacionFoto": [("investigacion", "investigacion_id")],
+    "core.InvestigacionArchivo": [("investigacion", "investigacion_id")],
+    # Las participaciones tambien se ven en el perfil del integrante
+    "core.InvestigacionIntegrante": [("investigacion", "investigacion_id"), ("equipo", "integrante_id")],
+    "core.Publicacion": [("publicacion", "pk")],
+    "core.PublicacionImagen": [("publicacion", "publicacion_id")],
+    "core.PublicacionVideo": [("publicacion", "publicacion_id")],
+    "core.PublicacionArchivo": [("publicacion", "publicacion_id")],
+    "core.PublicacionAutor": [("publicacion", "publicacion_id")],
+    "core.PublicacionIntegrante": [("publicacion", "publicacion_id"), ("equipo", "integrante_id")],
+    "core.Autor": [("autor", None)],
+    "core.Evento": [("evento", "pk")],
+    "core.EventoArchivo": [("evento", "evento_id")],
+    # Responsable de noticias e investigaciones
+    settings.AUTH_USER_MODEL: [("usuario", None)],
+}
+
+
+def compartida():
+    """True si la cache por defecto la ven todos los procesos (no es local ni nula)."""
+    return not isinstance(caches["default"], (LocMemCache, DummyCache))
+
+
+def activa():
+    """True si ``cachear`` guarda paginas (ver ``PAGINAS_CACHE_LOCAL`` en settings)."""
+    return compartida() or settings.PAGINAS_CACHE_LOCAL
+
+
+def _clave_etiqueta(etiqueta):
+    return f"paginas:etiqueta:{etiqueta}"
+
+
+def clave_pagina(url):
+    return "paginas:url:" + hashlib.md5(url.encode(), usedforsecurity=False).hexdigest()
+
+
+def etiquetas_de(instance):
+    """Etiquetas que invalida un cambio en ``instance`` (vacio si no es publica)."""
+    etiquetas = set()
+    for etiqueta, campo in DEPENDENCIAS.get(instance._meta.label, ()):
+        etiquetas.add(etiqueta)
+        pk = getattr(instance, campo) if campo else None
+        if pk:
+            etiquetas.add(f"{etiqueta}:{pk}")
+    return etiquetas
+
+
+def versiones(etiquetas):
+    """
+    ``{etiqueta: version}`` actual. Una etiqueta sin version (nueva, o
+    desalojada de la cache) arranca en la hora actual en nanosegundos, asi
+    nunca coincide con una version vista antes.
+    """
+    claves = {_clave_etiqueta(e): e for e in etiquetas}
+    encontradas = cache.get_many(claves)
+    for clave in claves.keys() - encontradas.keys():
+        cache.add(clave, time.time_ns(), None)
+        encontradas[clave] = cache.get(clave)
+    return {claves[c]: v for c, v in encontradas.items()}
+
+
+def _incrementar(etiquetas):
+    for etiqueta in etiquetas:
+        try:
+            cache.incr(_clave_etiqueta(etiqueta))
+        except ValueError:
+            cache.set(_clave_etiqueta(etiqueta), time.time_ns(), None)
+
+
+_pendientes = threading.local()
+
+
+def invalidar(*etiquetas):
+    """
+    Invalida las paginas con alguna de ``etiquetas`` al confirmar la
+    transaccion (antes, otra request podria volver a guardar datos viejos).
+    Las de una misma transaccion se juntan y se suben una sola vez.
+    """
+    lote = getattr(_pendientes, "lote", None)
+    if lote is None:
+        lote = _pendientes.lote = set()
+    lote.update(etiquetas)
+    transaction.on_commit(_ejecutar_pendientes)
+
+
+def _ejecutar_pendientes():
+    lote = getattr(_pendientes, "lote", None) or set()
+    _pendientes.lote = None
+    _incrementar(lote)
+
+
+def invalidar_objeto(instance):
+    etiquetas = etiquetas_de(instance)
+    if etiquetas:
+        invalidar(*etiquetas)
+
+
+def _publica(request):
+    """GET de un anonimo que no trae cookie de sesion ni de mensajes."""
+    return request.method in ("GET", "HEAD") and not (
+        settings.SESSION_COOKIE_NAME in request.COOKIES or CookieStorage.cookie_name in request.COOKIES
+    )
+
+
+def _cacheable(request):
+    if request.method not in ("GET", "HEAD"):
+        return False
+    if request.user.is_authenticated:
+        return False
+    # Un mensaje pendiente (messages) se mostraria en la pagina guardada
+    if CookieStorage.cookie_name in request.COOKIES:
+        return False
+    if settings.SESSION_COOKIE_NAME in request.COOKIES and request.session.get(SessionStorage.session_key):
+        return False
+    return True
+
+
+def _guardable(request, response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+        and "private" not in response.get("Cache-Control", "")
+        and "no-store" not in response.get("Cache-Control", "")
+    )
+
+
+def _condicional(request, response):
+    # La copia guardada tambien contesta If-None-Match/If-Modified-Since
+    if not (response.has_header("ETag") or response.has_header("Last-Modified")):
+        return response
+    return get_conditional_response(
+        request,
+        etag=response.get("ETag"),
+        last_modified=parse_http_date_safe(response.get("Last-Modified", "")),
+        response=response,
+    )
+
+
+def _compartible(request, response):
+    """Deja que un cache compartido guarde la respuesta de un GET publico."""
+    if not (response.status_code == 304 or _guardable(request, response)):
+        return response
+    control = response.get("Cache-Control", "")
+    patch_cache_control(response, public=True, s_maxage=S_MAXAGE)
+    if "max-age" not in control:
+        patch_cache_control(response, max_age=0)
+    return response
+
+
+def _clave_contador(nombre):
+    return f"paginas:contador:{nombre}"
+
+
+def _contar(nombre):
+    clave = _clave_contador(nombre)
+    try:
+        cache.incr(clave)
+    except ValueError:
+        if not cache.add(clave, 1, None):
+            cache.incr(clave)
+
+
+def contadores():
+    """``{nombre: cantidad}`` de ``CONTADORES`` desde el ultimo reinicio."""
+    claves = {_clave_contador(n): n for n in CONTADORES}
+    guardados = cache.get_many(claves)
+    return {nombre: guardados.get(clave, 0) for clave, nombre in claves.items()}
+
+
+def reiniciar_contadores():
+    cache.delete_many([_clave_contador(n) for n in CONTADORES])
+
+
+def _clave_candado(clave):
+    return clave + ":regenerando"
+
+
+def _tomar(clave):
+    """Marca propia si se consiguio el candado de ``clave``; None si lo tiene otro."""
+    marca = uuid.uuid4().hex
+    return marca if cache.add(_clave_candado(clave), marca, VENTANA_STALE) else None
+
+
+def _soltar(clave, marca):
+    # Solo si sigue siendo nuestro: si vencio, puede tenerlo otro worker
+    if cache.get(_clave_candado(clave)) == marca:
+        cache.delete(_clave_candado(clave))
+
+
+def _esperar(clave):
+    """La copia que guarde quien tiene el candado, o None si no llega a tiempo."""
+    limite = time.monotonic() + ESPERA
+    while time.monotonic() < limite:
+        time.sleep(_PAUSA)
+        encontradas = cache.get_many([clave, _clave_candado(clave)])
+        guardada = encontradas.get(clave)
+        if guardada and vigente(guardada):
+            return guardada
+        if _clave_candado(clave) not in encontradas:
+            # Termino sin guardar (p. ej. un 404) o se cayo
+            return None
+    return None
+
+
+def entrada(url):
+    """Lo guardado para ``url`` (absoluta) o None. Para inspeccionar la cache."""
+    return cache.get(clave_pagina(url))
+
+
+def vigente(guardada):
+    return (
+        bool(guardada)
+        and guardada.get("vence", 0) > time.time()
+        and versiones(guardada["versiones"]) == guardada["versiones"]
+    )
+
+
+def cachear(*etiquetas):
+    """
+    Decorador de vistas publicas. ``etiquetas`` son fijas (``"publicacion"``)
+    o llevan los argumentos de la URL (``"publicacion:{pk}"``).
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envuelta(request, *args, **kwargs):
+            publica = _publica(request)
+            if publica:
+                # Sin cookie de sesion es anonimo: no se abre la sesion
+                # (que agregaria Vary: Cookie)
+                request.user = AnonymousUser()
+            response = _servir(vista, etiquetas, request, *args, **kwargs)
+            return _compartible(request, response) if publica else response
+        return envuelta
+    return decorador
+
+
+def _servida(request, guardada, estado):
+    _contar(estado)
+    response = guardada["respuesta"]
+    response["X-Cache"] = estado.upper()
+    return _condicional(request, response)
+
+
+def _servir(vista, etiquetas, request, *args, **kwargs):
+    if not _cacheable(request) or not activa():
+        return vista(request, *args, **kwargs)
+
+    clave = clave_pagina(request.build_absolute_uri())
+    guardada = cache.get(clave)
+    if vigente(guardada):
+        return _servida(request, guardada, "hit")
+
+    marca = _tomar(clave)
+    if marca is None:
+        # Otro worker la esta regenerando
+        if guardada:
+            return _servida(request, guardada, "stale")
+        guardada = _esperar(clave)
+        if guardada:
+            return _servida(request, guardada, "hit")
+    if not guardada:
+        _contar("miss")
+
+    try:
+        # Versiones de antes de consultar: si algo cambia mientras se
+        # renderiza, la pagina se guarda ya vencida
+        vistas = versiones([TODAS] + [e.format(**kwargs) for e in etiquetas])
+        response = vista(request, *args, **kwargs)
+        if _guardable(request, response):
+            # La copia dura un poco mas que su vigencia para poder servirse
+            # vieja mientras se regenera
+            cache.set(clave, {
+                "versiones": vistas, "vence": time.time() + PAGINA_TIMEOUT, "respuesta": response,
+            }, PAGINA_TIMEOUT + VENTANA_STALE)
+            response["X-Cache"] = "MISS"
+            if marca:
+                _contar("regeneracion")
+        return response
+    finally:
+        if marca:
+            _soltar(clave, marca)
@@ -0,0 +1,106 @@
+# core/perfiles.py
+"""
+Perfil publico de los integrantes (``equipo_detalle``).
+
+``cargar_perfil`` trae al integrante y todas sus filas relacionadas, ya
+ordenadas, con una cantidad fija de consultas. El HTML del perfil se guarda
+en cache por integrante y se invalida desde core.signals cuando cambia el
+Equipo o cualquiera de sus filas intermedias. Como la cache de paginas, solo
+se usa si la cache es compartida (``paginas.activa``): con una cache local
+por proceso la invalidacion no llegaria a los demas workers.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
+
+from . import paginas
+from .models import (
+    Equipo, EquipoInteres, EquipoUniversidad, InvestigacionIntegrante,
+    Profesionalidad, PublicacionIntegrante,
+)
+
+
+# El perfil se invalida explicitamente; el timeout solo acota datos viejos
+# si alguna invalidacion se perdiera.
+PERFIL_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def clave_perfil(pk):
+    return f"equipo_perfil:{pk}"
+
+
+def cargar_perfil(pk):
+    """
+    Integrante + roles, universidades, intereses y participaciones en
+    6 consultas (1 + 5 prefetch), sin importar cuantas filas tenga cada seccion.
+    """
+    queryset = (
+        Equipo.objects
+        .select_related("nivel")
+        .prefetch_related(
+            Prefetch("profesionalidades", queryset=Profesionalidad.objects.order_by("orden", "id")),
+            Prefetch(
+                "equipo_universidades",
+                queryset=EquipoUniversidad.objects.select_related("universidad").order_by("orden", "id"),
+            ),
+            Prefetch(
+                "equipo_intereses",
+                queryset=EquipoInteres.objects.select_related("tema_interes").order_by("orden", "id"),
+            ),
+            Prefetch(
+                "investigacionintegrante_set",
+                queryset=(
+                    InvestigacionIntegrante.objects
+                    .select_related("investigacion")
+                    .only("id", "integrante_id", "rol", "investigacion__id", "investigacion__titulo", "investigacion__fecha")
+                    .order_by("-investigacion__fecha", "orden", "id")
+                ),
+                to_attr="participaciones_investigacion",
+            ),
+            Prefetch(
+                "publicacionintegrante_set",
+                queryset=(
+                    PublicacionIntegrante.objects
+                    .select_related("publicacion")
+                    .only("id", "integrante_id", "rol", "publicacion__id", "publicacion__titulo", "publicacion__fecha")
+                    .order_by("-publicacion__fecha", "orden", "id")
+                ),
+                to_attr="participaciones_publicacion",
+            ),
+        )
+    )
+    return get_object_or_404(queryset, pk=pk)
+
+
+def perfil_renderizado(request, pk):
+    """
+    Datos del perfil listos para ``equipo_detalle.html``: nombre y color (para
+    ``<title>`` y el CSS) y el HTML del cuerpo. Se sirve desde cache si existe
+    y la cache esta activa.
+    """
+    activa = paginas.activa()
+    clave = clave_perfil(pk)
+    perfil = cache.get(clave) if activa else None
+    if perfil is None:
+        persona = cargar_perfil(pk)
+        perfil = {
+            "pk": persona.pk,
+            "nombre": persona.nombre,
+            "color_perfil": persona.color_perfil,
+            "html": render_to_string("core/_equipo_perfil.html", {"persona": persona}, request),
+        }
+        if activa:
+            cache.set(clave, perfil, PERFIL_CACHE_TIMEOUT)
+    return perfil
+
+
+def invalidar_perfiles(pks):
+    """
+    Borra los perfiles cacheados al confirmar la transaccion, para que otra
+    request no vuelva a cachear datos previos al commit.
+    """
+    claves = [clave_perfil(pk) for pk in set(pks) if pk]
+    if claves:
+        transaction.on_commit(lambda: cache.delete_many(claves))
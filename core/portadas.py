@@ -0,0 +1,74 @@
+# core/portadas.py
+"""
+Portada y descargas de los Eventos, resueltas al guardar.
+
+Obtener ``.url`` de un archivo no es gratis con MediaCloudinaryStorage, asi
+que las URLs se calculan una vez cuando cambia el Evento o sus archivos
+(desde core.signals) y quedan guardadas en ``Evento.portada_url`` y
+``Evento.descargas``. El listado y el detalle las leen sin tocar el storage.
+"""
+import threading
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import paginas
+from .models import Evento
+
+
+EXTENSIONES_IMAGEN = (".jpg", ".jpeg", ".png", ".webp", ".gif")
+
+
+def _url(archivo):
+    try:
+        return archivo.url
+    except Exception:
+        return ""
+
+
+def resolver_eventos(ids):
+    """
+    Recalcula portada y descargas de los eventos dados. La portada es
+    ``imagen_portada`` si existe; si no, el primer archivo con extension de
+    imagen (el nombre se mira antes de pedir la URL).
+    """
+    eventos = Evento.objects.filter(pk__in=ids).prefetch_related("archivos")
+    for evento in eventos:
+        portada = _url(evento.imagen_portada) if evento.imagen_portada else ""
+        descargas = []
+        for a in evento.archivos.all():
+            if not a.archivo:
+                continue
+            url = _url(a.archivo)
+            if not url:
+                continue
+            descargas.append({"nombre": a.nombre or a.archivo.name, "url": url})
+            if not portada and a.archivo.name.lower().endswith(EXTENSIONES_IMAGEN):
+                portada = url
+        # update() no pasa por save(): la fecha del validador se sube aca
+        Evento.objects.filter(pk=evento.pk).update(
+            portada_url=portada, descargas=descargas, fecha_actualizacion=timezone.now(),
+        )
+        paginas.invalidar_objeto(evento)
+
+
+_pendientes = threading.local()
+
+
+def programar_resolucion(pk):
+    """
+    Igual que ``busqueda.programar_reindex``: junta los eventos tocados en la
+    transaccion y los resuelve una sola vez al confirmarla.
+    """
+    lote = getattr(_pendientes, "lote", None)
+    if lote is None:
+        lote = _pendientes.lote = set()
+    lote.add(pk)
+    transaction.on_commit(_ejecutar_pendientes)
+
+
+def _ejecutar_pendientes():
+    lote = getattr(_pendientes, "lote", None) or set()
+    _pendientes.lote = None
+    if lote:
+        resolver_eventos(lote)
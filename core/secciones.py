@@ -0,0 +1,129 @@
+# core/secciones.py
+"""
+Secciones dinamicas del integrante: roles (Profesionalidad), universidades y
+temas de interes, tal como llegan del formulario del panel.
+
+``guardar_secciones`` compara lo enviado con lo que ya existe y aplica solo
+los cambios (altas, modificaciones y bajas) con operaciones en bloque, dentro
+de una transaccion. Los catalogos (Universidad, TemaInteres) se resuelven con
+una consulta por seccion y se crean en bloque los que falten.
+"""
+from django.db import transaction
+
+from . import busqueda, paginas, perfiles, validadores
+from .models import Equipo, EquipoInteres, EquipoUniversidad, Profesionalidad, TemaInteres, Universidad
+
+
+def leer_secciones(post):
+    """
+    Filas enviadas por seccion como listas de ``(texto, descripcion)``, sin
+    las filas vacias. El orden de la lista es el orden que se guarda.
+    """
+    def filas(campo_texto, campo_descripcion):
+        textos = post.getlist(campo_texto)
+        descripciones = post.getlist(campo_descripcion)
+        resultado = []
+        for i, texto in enumerate(textos):
+            texto = (texto or "").strip()
+            if texto:
+                resultado.append((texto, descripciones[i] if i < len(descripciones) else ""))
+        return resultado
+
+    return {
+        "profesionalidades": filas("profesionalidad_titulo", "profesionalidad_descripcion"),
+        "universidades": filas("universidad_nombre", "universidad_descripcion"),
+        "intereses": filas("interes_nombre", "interes_descripcion"),
+    }
+
+
+def resolver_catalogo(model, campo, nombres):
+    """
+    ``{nombre: objeto}`` para los nombres dados: una consulta para los que ya
+    existen y un ``bulk_create`` para el resto (``ignore_conflicts`` cubre a
+    otra request que los haya creado en paralelo; por eso se releen).
+    """
+    nombres = set(nombres)
+    if not nombres:
+        return {}
+    existentes = model.objects.in_bulk(nombres, field_name=campo)
+    faltantes = nombres - existentes.keys()
+    if faltantes:
+        model.objects.bulk_create([model(**{campo: n}) for n in faltantes], ignore_conflicts=True)
+        existentes.update(model.objects.in_bulk(faltantes, field_name=campo))
+    return existentes
+
+
+def _aplicar(model, crear, actualizar, campos, borrar):
+    if borrar:
+        model.objects.filter(pk__in=borrar).delete()
+    if actualizar:
+        model.objects.bulk_update(actualizar, campos)
+    if crear:
+        model.objects.bulk_create(crear)
+    return bool(crear or actualizar or borrar)
+
+
+def _guardar_profesionalidades(equipo, filas):
+    # Los roles no tienen clave natural: se emparejan por posicion
+    existentes = list(Profesionalidad.objects.filter(equipo=equipo).order_by("orden", "id"))
+    crear, actualizar = [], []
+    for orden, (titulo, descripcion) in enumerate(filas, start=1):
+        if orden <= len(existentes):
+            fila = existentes[orden - 1]
+            if (fila.titulo, fila.descripcion, fila.orden) != (titulo, descripcion, orden):
+                fila.titulo, fila.descripcion, fila.orden = titulo, descripcion, orden
+                actualizar.append(fila)
+        else:
+            crear.append(Profesionalidad(equipo=equipo, titulo=titulo, descripcion=descripcion, orden=orden))
+    borrar = [fila.pk for fila in existentes[len(filas):]]
+    return _aplicar(Profesionalidad, crear, actualizar, ["titulo", "descripcion", "orden"], borrar)
+
+
+def _guardar_vinculos(equipo, filas, model, fk, catalogo, campo_catalogo):
+    # Universidades e intereses se emparejan por el item del catalogo
+    # (unique_together con el integrante); un nombre repetido vale una vez.
+    objetos = resolver_catalogo(catalogo, campo_catalogo, [nombre for nombre, _ in filas])
+    existentes = {getattr(v, f"{fk}_id"): v for v in model.objects.filter(equipo=equipo)}
+    crear, actualizar, vistos = [], [], set()
+    for nombre, descripcion in filas:
+        item = objetos[nombre]
+        if item.pk in vistos:
+            continue
+        vistos.add(item.pk)
+        orden = len(vistos)
+        fila = existentes.get(item.pk)
+        if fila is None:
+            crear.append(model(equipo=equipo, descripcion=descripcion, orden=orden, **{fk: item}))
+        elif (fila.descripcion, fila.orden) != (descripcion, orden):
+            fila.descripcion, fila.orden = descripcion, orden
+            actualizar.append(fila)
+    borrar = [fila.pk for pk, fila in existentes.items() if pk not in vistos]
+    return _aplicar(model, crear, actualizar, ["descripcion", "orden"], borrar)
+
+
+def guardar_secciones(equipo, secciones):
+    """
+    Sincroniza las tres secciones de ``equipo`` con ``secciones`` (ver
+    ``leer_secciones``). Devuelve True si hubo algun cambio.
+    """
+    with transaction.atomic():
+        cambios = [
+            _guardar_profesionalidades(equipo, secciones["profesionalidades"]),
+            _guardar_vinculos(
+                equipo, secciones["universidades"], EquipoUniversidad,
+                "universidad", Universidad, "descripcion_universidad",
+            ),
+            _guardar_vinculos(
+                equipo, secciones["intereses"], EquipoInteres,
+                "tema_interes", TemaInteres, "descripcion_interes",
+            ),
+        ]
+        # Las operaciones en bloque no disparan post_save: se avisa a mano
+        # al indice del directorio, a las caches del perfil y de paginas y a
+        # la fecha de actualizacion del integrante (ETag/Last-Modified).
+        if any(cambios):
+            busqueda.programar_reindex("equipo", equipo.pk)
+            perfiles.invalidar_perfiles([equipo.pk])
+            paginas.invalidar_objeto(equipo)
+            validadores.tocar(Equipo, pk=equipo.pk)
+    return any(cambios)
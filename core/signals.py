@@ -0,0 +1,265 @@
+# core/signals.py
+"""
+Señales del app core. Se conectan en ``CoreConfig.ready()``.
+"""
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import busqueda, derivadas, nombres, paginas, perfiles, portadas, validadores
+from .models import (
+    Autor, Equipo, EquipoInteres, EquipoUniversidad, Evento, EventoArchivo,
+    Investigacion, InvestigacionFoto, InvestigacionIntegrante,
+    Nivel, Noticia, NoticiaImagen, Profesionalidad, Publicacion, PublicacionAutor,
+    PublicacionImagen, PublicacionIntegrante, TemaInteres, Universidad,
+)
+
+
+# ------------------ Indice de busqueda de Publicaciones ------------------
+
+@receiver(post_save, sender=Publicacion)
+def publicacion_guardada(sender, instance, raw=False, **kwargs):
+    if not raw:
+        busqueda.programar_reindex("publicacion", instance.pk)
+
+
+@receiver(post_delete, sender=Publicacion)
+def publicacion_eliminada(sender, instance, **kwargs):
+    busqueda.INDICE_PUBLICACIONES.quitar([instance.pk])
+
+
+@receiver(post_save, sender=PublicacionAutor)
+@receiver(post_delete, sender=PublicacionAutor)
+@receiver(post_save, sender=PublicacionIntegrante)
+@receiver(post_delete, sender=PublicacionIntegrante)
+def vinculo_publicacion_cambiado(sender, instance, raw=False, **kwargs):
+    if not raw:
+        busqueda.programar_reindex("publicacion", instance.publicacion_id)
+
+
+@receiver(post_save, sender=Autor)
+def autor_guardado(sender, instance, raw=False, created=False, **kwargs):
+    if raw or created:
+        return
+    for pk in instance.publicaciones.values_list("pk", flat=True):
+        busqueda.programar_reindex("publicacion", pk)
+
+
+# ------------------ Indice de busqueda del directorio de Equipo ------------------
+
+@receiver(post_save, sender=Equipo)
+def equipo_guardado(sender, instance, raw=False, created=False, **kwargs):
+    if raw:
+        return
+    busqueda.programar_reindex("equipo", instance.pk)
+    if not created:
+        for pk in instance.publicaciones_participadas.values_list("pk", flat=True):
+            busqueda.programar_reindex("publicacion", pk)
+
+
+@receiver(post_delete, sender=Equipo)
+def equipo_eliminado(sender, instance, **kwargs):
+    busqueda.INDICE_EQUIPO.quitar([instance.pk])
+
+
+@receiver(post_save, sender=Profesionalidad)
+@receiver(post_delete, sender=Profesionalidad)
+@receiver(post_save, sender=EquipoInteres)
+@receiver(post_delete, sender=EquipoInteres)
+@receiver(post_save, sender=EquipoUniversidad)
+@receiver(post_delete, sender=EquipoUniversidad)
+def perfil_equipo_cambiado(sender, instance, raw=False, **kwargs):
+    if not raw:
+        busqueda.programar_reindex("equipo", instance.equipo_id)
+
+
+@receiver(post_save, sender=TemaInteres)
+def tema_interes_guardado(sender, instance, raw=False, created=False, **kwargs):
+    if raw or created:
+        return
+    for pk in instance.equipo_intereses.values_list("equipo_id", flat=True):
+        busqueda.programar_reindex("equipo", pk)
+
+
+@receiver(post_save, sender=Universidad)
+def universidad_guardada(sender, instance, raw=False, created=False, **kwargs):
+    if raw or created:
+        return
+    for pk in instance.equipo_universidades.values_list("equipo_id", flat=True):
+        busqueda.programar_reindex("equipo", pk)
+
+
+# ------------------ Indices de nombres (busqueda difusa) ------------------
+
+@receiver(post_save, sender=Equipo)
+@receiver(post_delete, sender=Equipo)
+def equipo_nombres_cambiados(sender, **kwargs):
+    nombres.invalidar("equipo")
+
+
+@receiver(post_save, sender=Autor)
+@receiver(post_delete, sender=Autor)
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def autor_nombres_cambiados(sender, update_fields=None, **kwargs):
+    # El login solo actualiza last_login; no cambia nombres
+    if update_fields and set(update_fields) == {"last_login"}:
+        return
+    nombres.invalidar("autor")
+
+
+# ------------------ Cache del perfil publico de Equipo ------------------
+
+@receiver(post_save, sender=Equipo)
+@receiver(post_delete, sender=Equipo)
+def equipo_perfil_cambiado(sender, instance, **kwargs):
+    perfiles.invalidar_perfiles([instance.pk])
+
+
+@receiver(post_save, sender=Profesionalidad)
+@receiver(post_delete, sender=Profesionalidad)
+@receiver(post_save, sender=EquipoInteres)
+@receiver(post_delete, sender=EquipoInteres)
+@receiver(post_save, sender=EquipoUniversidad)
+@receiver(post_delete, sender=EquipoUniversidad)
+def fila_perfil_cambiada(sender, instance, **kwargs):
+    perfiles.invalidar_perfiles([instance.equipo_id])
+
+
+@receiver(post_save, sender=InvestigacionIntegrante)
+@receiver(post_delete, sender=InvestigacionIntegrante)
+@receiver(post_save, sender=PublicacionIntegrante)
+@receiver(post_delete, sender=PublicacionIntegrante)
+def participacion_cambiada(sender, instance, **kwargs):
+    perfiles.invalidar_perfiles([instance.integrante_id])
+
+
+@receiver(post_save, sender=Investigacion)
+def investigacion_perfiles_cambiados(sender, instance, **kwargs):
+    # Titulo/fecha visibles en las participaciones de cada integrante
+    perfiles.invalidar_perfiles(
+        InvestigacionIntegrante.objects.filter(investigacion_id=instance.pk).values_list("integrante_id", flat=True)
+    )
+
+
+@receiver(post_save, sender=Publicacion)
+def publicacion_perfiles_cambiados(sender, instance, **kwargs):
+    perfiles.invalidar_perfiles(
+        PublicacionIntegrante.objects.filter(publicacion_id=instance.pk).values_list("integrante_id", flat=True)
+    )
+
+
+@receiver(post_save, sender=TemaInteres)
+def tema_interes_perfiles_cambiados(sender, instance, created=False, **kwargs):
+    if not created:
+        perfiles.invalidar_perfiles(instance.equipo_intereses.values_list("equipo_id", flat=True))
+
+
+@receiver(post_save, sender=Universidad)
+def universidad_perfiles_cambiados(sender, instance, created=False, **kwargs):
+    if not created:
+        perfiles.invalidar_perfiles(instance.equipo_universidades.values_list("equipo_id", flat=True))
+
+
+@receiver(post_save, sender=Nivel)
+def nivel_perfiles_cambiados(sender, instance, created=False, **kwargs):
+    if not created:
+        perfiles.invalidar_perfiles(instance.miembros.values_list("pk", flat=True))
+
+
+# ------------------ Fechas de actualizacion (ETag / Last-Modified) ------------------
+
+@receiver(post_save)
+@receiver(post_delete)
+def hijo_cambiado(sender, instance, raw=False, **kwargs):
+    # Sin sender: una sola funcion para todas las filas hijas de validadores.PADRES
+    if not raw and sender in validadores.PADRES:
+        validadores.tocar_padres(instance)
+
+
+@receiver(post_save, sender=Equipo)
+def equipo_contenidos_cambiados(sender, instance, raw=False, created=False, **kwargs):
+    # El nombre del integrante se muestra en investigaciones y publicaciones
+    if not (raw or created):
+        validadores.tocar(Investigacion, integrantes=instance)
+        validadores.tocar(Publicacion, integrantes=instance)
+
+
+@receiver(post_save, sender=Investigacion)
+def investigacion_integrantes_cambiados(sender, instance, raw=False, created=False, **kwargs):
+    # Titulo y fecha se muestran en el perfil de cada integrante
+    if not (raw or created):
+        validadores.tocar(Equipo, investigaciones_participadas=instance)
+
+
+@receiver(post_save, sender=Publicacion)
+def publicacion_integrantes_cambiados(sender, instance, raw=False, created=False, **kwargs):
+    if not (raw or created):
+        validadores.tocar(Equipo, publicaciones_participadas=instance)
+
+
+@receiver(post_save, sender=Autor)
+def autor_publicaciones_cambiadas(sender, instance, raw=False, created=False, **kwargs):
+    if not (raw or created):
+        validadores.tocar(Publicacion, autores_detalle=instance)
+
+
+@receiver(post_save, sender=Nivel)
+@receiver(post_save, sender=TemaInteres)
+@receiver(post_save, sender=Universidad)
+def catalogo_equipo_cambiado(sender, instance, raw=False, created=False, **kwargs):
+    # Nivel, intereses y universidades se muestran en el perfil
+    if raw or created:
+        return
+    campo = {Nivel: "nivel", TemaInteres: "intereses", Universidad: "universidades"}[sender]
+    validadores.tocar(Equipo, **{campo: instance})
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def usuario_contenidos_cambiados(sender, instance, raw=False, created=False, update_fields=None, **kwargs):
+    # El responsable se muestra en noticias e investigaciones; el login solo toca last_login
+    if raw or created or (update_fields and set(update_fields) == {"last_login"}):
+        return
+    validadores.tocar(Investigacion, user=instance)
+    validadores.tocar(Noticia, user=instance)
+
+
+# ------------------ Portada y descargas de Eventos ------------------
+
+@receiver(post_save, sender=Evento)
+def evento_guardado(sender, instance, raw=False, **kwargs):
+    if not raw:
+        portadas.programar_resolucion(instance.pk)
+
+
+@receiver(post_save, sender=EventoArchivo)
+@receiver(post_delete, sender=EventoArchivo)
+def evento_archivo_cambiado(sender, instance, raw=False, **kwargs):
+    if not raw:
+        portadas.programar_resolucion(instance.evento_id)
+
+
+# ------------------ Derivadas de imagenes (srcset) ------------------
+
+@receiver(post_save, sender=Noticia)
+@receiver(post_save, sender=NoticiaImagen)
+@receiver(post_save, sender=Investigacion)
+@receiver(post_save, sender=InvestigacionFoto)
+@receiver(post_save, sender=PublicacionImagen)
+@receiver(post_save, sender=Evento)
+def imagen_guardada(sender, instance, raw=False, **kwargs):
+    if not raw and derivadas.desactualizadas(instance):
+        derivadas.programar(instance)
+
+
+# ------------------ Cache de paginas publicas ------------------
+
+@receiver(post_save)
+@receiver(post_delete)
+def fila_publica_cambiada(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Sin sender: una sola funcion para todos los modelos de core.paginas.DEPENDENCIAS
+    if raw or sender._meta.label not in paginas.DEPENDENCIAS:
+        return
+    # El login solo actualiza last_login
+    if update_fields and set(update_fields) == {"last_login"}:
+        return
+    paginas.invalidar_objeto(instance)
@@ -0,0 +1,243 @@
+# core/subidas.py
+"""
+Subidas reanudables por partes para archivos grandes.
+
+El navegador abre una subida con el tamaño total (``iniciar``), manda
+partes de ``TAMANO_PARTE`` bytes en orden (``recibir_parte``), cada una con
+su SHA-256, y al final pide ``completar``: se verifica el tamaño (y el
+SHA-256 del archivo entero, si se envio al iniciar) y el archivo se adjunta
+al destino (``DESTINOS``). Si se corta la conexion, la subida sigue desde
+``SubidaParcial.recibido``.
+
+Las partes se escriben a disco en bloques de ``BLOQUE`` bytes, asi que la
+memoria usada por subida es constante sin importar el tamaño del archivo.
+"""
+import hashlib
+import os
+import re
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Equipo, Investigacion, Noticia, Publicacion, PublicacionVideo, SubidaParcial
+
+
+TAMANO_PARTE = 5 * 1024 * 1024
+BLOQUE = 64 * 1024
+
+# Subidas abiertas sin actividad por mas de esto se descartan
+HORAS_VIGENCIA = 24
+
+
+class SubidaError(Exception):
+    def __init__(self, mensaje, status=400):
+        super().__init__(mensaje)
+        self.status = status
+
+
+def guardar_foto_equipo(equipo, archivo):
+    """
+    Guarda ``archivo`` como foto de ``equipo`` en el storage por defecto
+    (Cloudinary o disco) y deja en ``equipo.foto`` la URL o la ruta. El
+    storage lo lee por partes: no se carga entero en memoria. No llama a save().
+    """
+    # El nombre final lo decide el storage (core.almacenamiento lo deriva del
+    # contenido), asi que no hace falta un sufijo aleatorio para no pisar otra foto.
+    ext = (archivo.name.split('.')[-1] or '').lower()
+    filename = f"{equipo.pk}_{equipo.nombre.replace(' ', '_')}.{ext}"
+    storage_path = default_storage.save(f"equipo_fotos/{filename}", archivo)
+
+    # Si hay CLOUDINARY_URL, usar URL absoluta; si no, guardar ruta relativa
+    equipo.foto = storage_path
+    if getattr(settings, 'CLOUDINARY_URL', None):
+        try:
+            equipo.foto = default_storage.url(storage_path)
+        except Exception:
+            pass
+
+
+def _adjuntar_campo(campo):
+    def adjuntar(obj, archivo, reemplazar):
+        getattr(obj, campo).save(archivo.name, archivo, save=True)
+    return adjuntar
+
+
+def _adjuntar_video_publicacion(publicacion, archivo, reemplazar):
+    # Igual que el formulario, se agrega al final; ``reemplazar`` borra antes los anteriores
+    if reemplazar:
+        PublicacionVideo.objects.filter(publicacion=publicacion).delete()
+    orden = PublicacionVideo.objects.filter(publicacion=publicacion).aggregate(m=Max("orden"))["m"] or 0
+    video = PublicacionVideo(publicacion=publicacion, orden=orden + 1)
+    video.video.save(archivo.name, archivo, save=True)
+
+
+def _adjuntar_foto_equipo(equipo, archivo, reemplazar):
+    guardar_foto_equipo(equipo, archivo)
+    equipo.save(update_fields=["foto"])
+
+
+# clave: (modelo destino, funcion que adjunta el archivo armado)
+DESTINOS = {
+    "noticia_video": (Noticia, _adjuntar_campo("video")),
+    "investigacion_video": (Investigacion, _adjuntar_campo("video_portada")),
+    "publicacion_video": (Publicacion, _adjuntar_video_publicacion),
+    "equipo_foto": (Equipo, _adjuntar_foto_equipo),
+}
+
+
+def _directorio():
+    directorio = Path(settings.SUBIDAS_DIR)
+    directorio.mkdir(parents=True, exist_ok=True)
+    return directorio
+
+
+def ruta(subida):
+    return _directorio() / f"{subida.token}.part"
+
+
+def _archivo_parcial(subida):
+    # El disco local puede haberse vaciado (reinicio del servidor)
+    archivo = ruta(subida)
+    if not archivo.exists():
+        _cerrar(subida, SubidaParcial.ERROR)
+        raise SubidaError("Las partes recibidas se perdieron; empezá la subida de nuevo.", status=410)
+    return archivo
+
+
+def iniciar(user, destino, objeto_id, nombre, tamano, sha256="", reemplazar=False):
+    if destino not in DESTINOS:
+        raise SubidaError("Destino desconocido.")
+    modelo, _ = DESTINOS[destino]
+    if not str(objeto_id).isdigit() or not modelo.objects.filter(pk=objeto_id).exists():
+        raise SubidaError("El registro de destino no existe.", status=404)
+    try:
+        tamano = int(tamano)
+    except (TypeError, ValueError):
+        raise SubidaError("Tamaño inválido.")
+    if not 0 < tamano <= settings.SUBIDAS_TAMANO_MAXIMO:
+        raise SubidaError("El archivo es demasiado grande.", status=413)
+    sha256 = (sha256 or "").lower()
+    if sha256 and not re.fullmatch(r"[0-9a-f]{64}", sha256):
+        raise SubidaError("SHA-256 inválido.")
+    nombre = os.path.basename(nombre or "").strip()[:255]
+    if not nombre:
+        raise SubidaError("Falta el nombre del archivo.")
+
+    subida = SubidaParcial.objects.create(
+        token=uuid.uuid4().hex,
+        destino=destino,
+        objeto_id=int(objeto_id),
+        nombre=nombre,
+        tamano=tamano,
+        tamano_parte=TAMANO_PARTE,
+        sha256=sha256,
+        reemplazar=bool(reemplazar),
+        user=user,
+    )
+    ruta(subida).touch()
+    return subida
+
+
+def estado_json(subida):
+    return {
+        "token": subida.token,
+        "nombre": subida.nombre,
+        "tamano": subida.tamano,
+        "tamano_parte": subida.tamano_parte,
+        "recibido": subida.recibido,
+        "estado": subida.estado,
+    }
+
+
+def recibir_parte(subida, inicio, largo, stream, sha256_parte=None):
+    """
+    Escribe la parte que empieza en ``inicio`` leyendo ``largo`` bytes de
+    ``stream`` por bloques. Las partes van en orden: una que no empieza en
+    ``subida.recibido`` se rechaza con 409 (el cliente retoma desde ahi).
+    Si la parte llega incompleta o no coincide su hash, se descarta.
+    """
+    if subida.estado != SubidaParcial.ABIERTA:
+        raise SubidaError("La subida ya está cerrada.", status=409)
+    if inicio != subida.recibido:
+        raise SubidaError("La parte no sigue a lo recibido.", status=409)
+    fin = inicio + largo
+    if largo <= 0 or fin > subida.tamano or (largo != subida.tamano_parte and fin != subida.tamano):
+        raise SubidaError("Tamaño de parte inválido.")
+
+    archivo = _archivo_parcial(subida)
+    digest = hashlib.sha256()
+    escritos = 0
+    with open(archivo, "r+b") as f:
+        f.seek(inicio)
+        while escritos < largo:
+            bloque = stream.read(min(BLOQUE, largo - escritos))
+            if not bloque:
+                break
+            f.write(bloque)
+            digest.update(bloque)
+            escritos += len(bloque)
+        if escritos != largo or (sha256_parte and digest.hexdigest() != sha256_parte.lower()):
+            f.truncate(inicio)
+            raise SubidaError("La parte llegó incompleta o dañada; reenviala.", status=422)
+
+    # Solo avanza si nadie avanzo antes (dos envios de la misma parte)
+    SubidaParcial.objects.filter(pk=subida.pk, recibido=inicio).update(
+        recibido=fin, actualizado=timezone.now(),
+    )
+    subida.recibido = fin
+    return subida
+
+
+def completar(subida):
+    """
+    Verifica el SHA-256 del archivo armado (si se envio) y lo adjunta al
+    destino. Si no coincide la subida queda en ERROR y hay que empezar de nuevo.
+    """
+    if subida.estado != SubidaParcial.ABIERTA:
+        raise SubidaError("La subida ya está cerrada.", status=409)
+    if subida.recibido != subida.tamano:
+        raise SubidaError("Todavía faltan partes.", status=409)
+
+    archivo = _archivo_parcial(subida)
+    if subida.sha256:
+        digest = hashlib.sha256()
+        with open(archivo, "rb") as f:
+            for bloque in iter(lambda: f.read(BLOQUE * 16), b""):
+                digest.update(bloque)
+        if digest.hexdigest() != subida.sha256:
+            _cerrar(subida, SubidaParcial.ERROR)
+            raise SubidaError("El SHA-256 no coincide; el archivo llegó dañado.", status=422)
+
+    modelo, adjuntar = DESTINOS[subida.destino]
+    obj = modelo.objects.filter(pk=subida.objeto_id).first()
+    if obj is None:
+        _cerrar(subida, SubidaParcial.ERROR)
+        raise SubidaError("El registro de destino ya no existe.", status=404)
+    with open(archivo, "rb") as f:
+        adjuntar(obj, File(f, name=subida.nombre), subida.reemplazar)
+    _cerrar(subida, SubidaParcial.COMPLETA)
+    return obj
+
+
+def _cerrar(subida, estado):
+    SubidaParcial.objects.filter(pk=subida.pk).update(estado=estado, actualizado=timezone.now())
+    subida.estado = estado
+    try:
+        ruta(subida).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def limpiar_vencidas(horas=HORAS_VIGENCIA):
+    """Descarta las subidas abiertas sin actividad y borra sus partes del disco."""
+    limite = timezone.now() - timedelta(hours=horas)
+    vencidas = list(SubidaParcial.objects.filter(estado=SubidaParcial.ABIERTA, actualizado__lt=limite))
+    for subida in vencidas:
+        _cerrar(subida, SubidaParcial.ERROR)
+    return len(vencidas)
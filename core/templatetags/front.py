@@ -0,0 +1,17 @@
+# core/templatetags/front.py
+"""
+``{% front_armado as armado %}``: si el paquete de core.front ya esta en
+static/. base.html enlaza ``front/giese.css`` y ``front/giese.js`` si lo
+esta, y las librerias de los CDN si no.
+"""
+from django import template
+
+from core import front
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def front_armado():
+    return front.armado()
@@ -0,0 +1,49 @@
+# core/templatetags/imagenes.py
+"""
+``{% imagen_responsive %}``: ``<img>`` con ``srcset`` armado desde las
+derivadas de core.derivadas (WebP en un ``<source>``, JPEG en el ``<img>``).
+
+    {% load imagenes %}
+    {% imagen_responsive foto sizes="(min-width: 992px) 33vw, 100vw" alt=inv.titulo loading="lazy" %}
+
+El primer argumento es la fila que tiene la imagen (Noticia, NoticiaImagen,
+InvestigacionFoto, ...). Los demas argumentos con nombre pasan como atributos
+del ``<img>`` (``class_`` para ``class``). ``src`` reemplaza la URL del
+original (p. ej. ``Evento.portada_url``, ya resuelta). Si todavia no hay
+derivadas sale un ``<img>`` comun con el original.
+"""
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from core import derivadas
+
+
+register = template.Library()
+
+
+def _srcset(lista):
+    return ", ".join(f"{url} {ancho}w" for ancho, url in lista)
+
+
+@register.simple_tag
+def imagen_responsive(obj, sizes="100vw", src=None, **atributos):
+    campo = derivadas.campo_de(obj)
+    archivo = getattr(obj, campo, None) if campo else None
+    if src is None:
+        src = archivo.url if archivo else ""
+    datos = derivadas.vigentes(obj)
+
+    attrs = {"src": src}
+    if datos.get("jpeg"):
+        attrs["srcset"] = _srcset(datos["jpeg"])
+        attrs["sizes"] = sizes
+    for nombre, valor in atributos.items():
+        attrs[nombre.rstrip("_").replace("_", "-")] = valor
+    img = format_html("<img{}>", format_html_join("", ' {}="{}"', attrs.items()))
+
+    if not datos.get("webp"):
+        return img
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">{}</picture>',
+        _srcset(datos["webp"]), sizes, img,
+    )
@@ -0,0 +1,1316 @@
+# core/tests.py
+"""
+Presupuesto de consultas por vista.
+
+Siembra un conjunto de datos sintetico, renderiza cada URL de core/urls.py y
+mide consultas, tiempo de SQL y tiempo total. Falla si una vista supera su
+presupuesto o si la cantidad de consultas crece al agregar filas (N+1).
+
+    python manage.py test core
+
+Con ``PRESUPUESTO_ESCALA`` se agranda el conjunto de datos (por defecto 1) y
+con ``PRESUPUESTO_REPORTE=1`` se imprime la tabla de mediciones.
+"""
+import hashlib
+import io
+import os
+import shutil
+import socketserver
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import Http404
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from . import busqueda, checks, cola, correo, derivadas, entrega, front, importacion, limpieza, nombres, paginas, perfiles, secciones, subidas
+from .models import (
+    Autor, BlobMedia, CorreoSaliente, Equipo, EquipoInteres, EquipoUniversidad, Evento, EventoArchivo,
+    Investigacion, InvestigacionArchivo, InvestigacionFoto, InvestigacionIntegrante,
+    Nivel, Noticia, NoticiaImagen, Profesionalidad,
+    Publicacion, PublicacionArchivo, PublicacionAutor, PublicacionImagen,
+    PublicacionIntegrante, PublicacionVideo, SubidaParcial, TemaInteres, TrabajoMedia, Universidad,
+)
+from .urls import urlpatterns
+
+
+ESCALA = max(1, int(os.environ.get("PRESUPUESTO_ESCALA", "1")))
+
+# Filas de cada modelo principal en la primera siembra y en la ampliacion
+FILAS_BASE = 15 * ESCALA
+FILAS_EXTRA = 30 * ESCALA
+
+# Hijos por fila (fotos, archivos, integrantes, ...) en cada siembra
+HIJOS = 3
+
+
+# (nombre de la url, argumentos, query string, requiere login, presupuesto)
+# Cada argumento ("equipo", "noticia", ...) se reemplaza por el pk del objeto
+# sembrado de ese tipo, que es el que recibe filas extra al ampliar, o por el
+# valor fijo de ``objetivos`` ("galeria", "subida").
+# Las vistas publicas con GET condicional suman la consulta del validador
+# (core.validadores), que en un 304 es la unica.
+VISTAS = [
+    ("inicio", (), "", False, 0),
+    ("equipo", (), "", False, 2),
+    ("equipo", (), "q=persona", False, 3),
+    ("equipo_detalle", ("equipo",), "", False, 7),
+    ("noticias", (), "", False, 3),
+    ("investigacion", (), "", False, 3),
+    ("investigacion_detalle", ("investigacion",), "", False, 5),
+    ("publicaciones", (), "", False, 6),
+    ("publicaciones", (), "q=estudio", False, 5),
+    ("publicaciones", (), "format=json", False, 5),
+    ("publicacion_detalle", ("publicacion",), "", False, 6),
+    ("publicacion_detalle", ("publicacion",), "format=json", False, 4),
+    ("publicaciones_modal", (), "ids={ids_publicaciones}", False, 3),
+    ("eventos", (), "", False, 2),
+    ("contacto", (), "", False, 0),
+    ("csrf", (), "", False, 0),
+    ("login", (), "", False, 0),
+    ("panel_equipo", (), "", True, 3),
+    ("equipo_buscar", (), "q=persona", True, 3),
+    ("equipo_add", (), "", True, 2),
+    ("equipo_edit", ("equipo",), "", True, 7),
+    ("equipo_delete", ("equipo",), "", True, 3),
+    ("panel_noticias", (), "", True, 4),
+    ("noticia_add", (), "", True, 2),
+    ("noticia_edit", ("noticia",), "", True, 4),
+    ("noticia_delete", ("noticia",), "", True, 3),
+    ("panel_investigacion", (), "", True, 3),
+    ("investigacion_add", (), "", True, 3),
+    ("investigacion_edit", ("investigacion",), "", True, 7),
+    ("investigacion_delete", ("investigacion",), "", True, 3),
+    ("panel_publicaciones", (), "", True, 4),
+    ("publicacion_add", (), "", True, 3),
+    ("publicaciones_importar", (), "", True, 2),
+    ("publicacion_edit", ("publicacion",), "", True, 8),
+    ("publicacion_delete", ("publicacion",), "", True, 3),
+    ("panel_eventos", (), "", True, 3),
+    ("evento_add", (), "", True, 2),
+    ("evento_edit", ("evento",), "", True, 4),
+    ("evento_delete", ("evento",), "", True, 3),
+    ("evento_detalle", ("evento",), "", True, 3),
+    ("panel_media", (), "", True, 5),
+    ("galeria", ("galeria", "noticia"), "", True, 4),
+    ("subida_parte", ("subida",), "", True, 3),
+]
+
+# Acciones del panel (POST/PUT): cambian datos, asi que se miden una sola vez,
+# en este orden, en ``test_presupuesto_acciones``. (nombre de la url, presupuesto)
+ACCIONES = [
+    ("subida_iniciar", 4),
+    ("subida_parte", 4),
+    ("subida_completar", 9),
+    ("galeria_ordenar", 9),
+    ("galeria_quitar", 7),
+    ("media_reintentar", 3),
+]
+
+# Rutas de core/urls.py que no se miden: ``logout`` cerraria la sesion del
+# cliente de las vistas del panel.
+SIN_MEDIR = {"logout"}
+
+
+def sembrar(cantidad, usuario, prefijo):
+    """Crea ``cantidad`` filas de cada modelo principal con sus hijos."""
+    nivel, _ = Nivel.objects.get_or_create(descripcion="Doctorado")
+    temas = [TemaInteres.objects.create(descripcion_interes=f"{prefijo} tema {i}") for i in range(HIJOS)]
+    universidades = [
+        Universidad.objects.create(descripcion_universidad=f"{prefijo} universidad {i}") for i in range(HIJOS)
+    ]
+
+    personas = []
+    for i in range(cantidad):
+        persona = Equipo.objects.create(nombre=f"Persona {prefijo} {i}", nivel=nivel, user=usuario)
+        personas.append(persona)
+        for j in range(HIJOS):
+            Profesionalidad.objects.create(equipo=persona, titulo=f"Rol {j}", orden=j)
+            EquipoInteres.objects.create(equipo=persona, tema_interes=temas[j], orden=j)
+            EquipoUniversidad.objects.create(equipo=persona, universidad=universidades[j], orden=j)
+
+    for i in range(cantidad):
+        noticia = Noticia.objects.create(titulo=f"Noticia {prefijo} {i}", contenido="Texto", user=usuario)
+        for j in range(HIJOS):
+            NoticiaImagen.objects.create(noticia=noticia, imagen=f"noticias/galeria/{prefijo}-{i}-{j}.jpg", orden=j)
+
+        investigacion = Investigacion.objects.create(titulo=f"Investigacion {prefijo} {i}", user=usuario)
+        publicacion = Publicacion.objects.create(
+            titulo=f"Estudio {prefijo} {i}", autores="Autores varios", resumen="Resumen", user=usuario,
+        )
+        autor = Autor.objects.create(nombre=f"Autor {prefijo} {i}")
+        PublicacionAutor.objects.create(publicacion=publicacion, autor=autor)
+        for j in range(HIJOS):
+            persona = personas[(i + j) % len(personas)]
+            InvestigacionFoto.objects.create(investigacion=investigacion, foto=f"investigaciones/fotos/{prefijo}-{i}-{j}.jpg", orden=j)
+            InvestigacionArchivo.objects.create(investigacion=investigacion, archivo=f"investigaciones/archivos/{prefijo}-{i}-{j}.pdf", orden=j)
+            InvestigacionIntegrante.objects.create(investigacion=investigacion, integrante=persona, orden=j)
+            PublicacionImagen.objects.create(publicacion=publicacion, imagen=f"publicaciones/imagenes/{prefijo}-{i}-{j}.jpg", orden=j)
+            PublicacionVideo.objects.create(publicacion=publicacion, video=f"publicaciones/videos/{prefijo}-{i}-{j}.mp4", orden=j)
+            PublicacionArchivo.objects.create(publicacion=publicacion, archivo=f"publicaciones/archivos/{prefijo}-{i}-{j}.pdf", orden=j)
+            PublicacionIntegrante.objects.create(publicacion=publicacion, integrante=persona, orden=j)
+
+        evento = Evento.objects.create(nombre=f"Evento {prefijo} {i}", user=usuario)
+        for j in range(HIJOS):
+            EventoArchivo.objects.create(evento=evento, archivo=f"eventos/archivos/{prefijo}-{i}-{j}.jpg", orden=j)
+        TrabajoMedia.objects.create(
+            destino="evento_archivo", objeto_id=evento.pk, nombre_original=f"{prefijo}-{i}.pdf",
+            ruta=f"cola/evento_archivo/{prefijo}-{i}.pdf", estado=TrabajoMedia.ERROR, user=usuario,
+        )
+
+
+def ampliar_objetivos(objetivos, usuario, prefijo):
+    """Agrega hijos a los objetos que miden las vistas de detalle."""
+    persona, investigacion, publicacion = objetivos["equipo"], objetivos["investigacion"], objetivos["publicacion"]
+    otros = list(Equipo.objects.exclude(pk=persona.pk)[:FILAS_EXTRA])
+    for j, otro in enumerate(otros):
+        orden = HIJOS + j
+        tema = TemaInteres.objects.create(descripcion_interes=f"{prefijo} extra tema {j}")
+        universidad = Universidad.objects.create(descripcion_universidad=f"{prefijo} extra universidad {j}")
+        Profesionalidad.objects.create(equipo=persona, titulo=f"Rol extra {j}", orden=orden)
+        EquipoInteres.objects.create(equipo=persona, tema_interes=tema, orden=orden)
+        EquipoUniversidad.objects.create(equipo=persona, universidad=universidad, orden=orden)
+        NoticiaImagen.objects.create(noticia=objetivos["noticia"], imagen=f"noticias/galeria/{prefijo}-x{j}.jpg", orden=orden)
+        InvestigacionFoto.objects.create(investigacion=investigacion, foto=f"investigaciones/fotos/{prefijo}-x{j}.jpg", orden=orden)
+        InvestigacionArchivo.objects.create(investigacion=investigacion, archivo=f"investigaciones/archivos/{prefijo}-x{j}.pdf", orden=orden)
+        InvestigacionIntegrante.objects.get_or_create(investigacion=investigacion, integrante=otro, defaults={"orden": orden})
+        PublicacionImagen.objects.create(publicacion=publicacion, imagen=f"publicaciones/imagenes/{prefijo}-x{j}.jpg", orden=orden)
+        PublicacionVideo.objects.create(publicacion=publicacion, video=f"publicaciones/videos/{prefijo}-x{j}.mp4", orden=orden)
+        PublicacionArchivo.objects.create(publicacion=publicacion, archivo=f"publicaciones/archivos/{prefijo}-x{j}.pdf", orden=orden)
+        PublicacionIntegrante.objects.get_or_create(publicacion=publicacion, integrante=otro, defaults={"orden": orden})
+        PublicacionAutor.objects.create(publicacion=publicacion, autor=Autor.objects.create(nombre=f"Autor {prefijo} x{j}"))
+        EventoArchivo.objects.create(evento=objetivos["evento"], archivo=f"eventos/archivos/{prefijo}-x{j}.pdf", orden=orden)
+
+
+# Storage local y sin manifest: las pruebas no dependen de collectstatic ni de Cloudinary
+STORAGES_PRUEBA = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+
+class MediaTemporal:
+    """Media (con la cola de media adentro) en una carpeta temporal que se borra al terminar."""
+
+    def setUp(self):
+        super().setUp()
+        carpeta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, carpeta, ignore_errors=True)
+        self.media_root = os.path.join(carpeta, "media")
+        self.cola_dir = os.path.join(self.media_root, cola.PREFIJO)
+        ajustes = override_settings(STORAGES=STORAGES_PRUEBA, MEDIA_ROOT=self.media_root)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def _en_cola(self):
+        return [os.path.join(raiz, n) for raiz, _, nombres in os.walk(self.cola_dir) for n in nombres]
+
+
+class PresupuestoConsultasTests(MediaTemporal, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = get_user_model().objects.create_user("panel", password="clave-de-prueba")
+        sembrar(FILAS_BASE, cls.usuario, "a")
+        cls.objetivos = {
+            "equipo": Equipo.objects.order_by("id").first(),
+            "noticia": Noticia.objects.order_by("id").first(),
+            "investigacion": Investigacion.objects.order_by("id").first(),
+            "publicacion": Publicacion.objects.order_by("id").first(),
+            "evento": Evento.objects.order_by("id").first(),
+            "galeria": "noticia_imagen",
+            # Sin partes recibidas: el GET solo lee la fila
+            "subida": SubidaParcial.objects.create(
+                token="0" * 32, destino="equipo_foto", objeto_id=1, nombre="foto.jpg",
+                tamano=10, tamano_parte=4, user=cls.usuario,
+            ).token,
+        }
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.usuario)
+        self.anonimo = self.client_class(HTTP_HOST="localhost")
+        self.client.defaults["HTTP_HOST"] = "localhost"
+
+    def _url(self, nombre, args, query):
+        valores = (self.objetivos[a] for a in args)
+        url = reverse(f"core:{nombre}", args=[getattr(v, "pk", v) for v in valores])
+        if query:
+            ids = ",".join(str(pk) for pk in Publicacion.objects.order_by("id").values_list("id", flat=True)[:20])
+            url += "?" + query.format(ids_publicaciones=ids)
+        return url
+
+    def _medir(self, nombre, args, query, login):
+        # Sin cache: se mide el peor caso (perfil sin cachear, indice difuso frio)
+        cache.clear()
+        cliente = self.client if login else self.anonimo
+        url = self._url(nombre, args, query)
+        inicio = time.perf_counter()
+        with CaptureQueriesContext(connection) as consultas:
+            response = cliente.get(url)
+            if hasattr(response, "render") and not response.is_rendered:
+                response.render()
+        total = time.perf_counter() - inicio
+        self.assertLess(response.status_code, 400, f"{url} respondio {response.status_code}")
+        sql = sum(float(q["time"]) for q in consultas.captured_queries)
+        return {"url": url, "consultas": len(consultas), "sql": sql, "total": total}
+
+    def test_presupuesto_y_crecimiento(self):
+        base = [self._medir(nombre, args, query, login) for nombre, args, query, login, _ in VISTAS]
+
+        sembrar(FILAS_EXTRA, self.usuario, "b")
+        ampliar_objetivos(self.objetivos, self.usuario, "b")
+        ampliado = [self._medir(nombre, args, query, login) for nombre, args, query, login, _ in VISTAS]
+
+        if os.environ.get("PRESUPUESTO_REPORTE"):
+            print(f"\n{'vista':<45} {'pres.':>5} {'cons.':>5} {'+filas':>6} {'sql ms':>8} {'total ms':>9}")
+            for vista, antes, despues in zip(VISTAS, base, ampliado):
+                print(
+                    f"{despues['url']:<45} {vista[4]:>5} {antes['consultas']:>5} {despues['consultas']:>6} "
+                    f"{despues['sql'] * 1000:>8.1f} {despues['total'] * 1000:>9.1f}"
+                )
+
+        for vista, antes, despues in zip(VISTAS, base, ampliado):
+            presupuesto = vista[4]
+            with self.subTest(url=despues["url"]):
+                self.assertLessEqual(
+                    despues["consultas"], presupuesto,
+                    f"{despues['url']}: {despues['consultas']} consultas, presupuesto {presupuesto}",
+                )
+                # Puede bajar (p. ej. la busqueda difusa no hace falta), nunca subir
+                self.assertLessEqual(
+                    despues["consultas"], antes["consultas"],
+                    f"{despues['url']}: las consultas crecen con las filas "
+                    f"({antes['consultas']} -> {despues['consultas']})",
+                )
+
+    def _accion(self, nombre, metodo, args=(), **kwargs):
+        presupuesto = dict(ACCIONES)[nombre]
+        url = reverse(f"core:{nombre}", args=args)
+        with CaptureQueriesContext(connection) as consultas:
+            response = getattr(self.client, metodo)(url, **kwargs)
+        self.assertLess(response.status_code, 400, f"{url} respondio {response.status_code}")
+        self.assertLessEqual(len(consultas), presupuesto, f"{url}: {len(consultas)} consultas, presupuesto {presupuesto}")
+        self.medidas.append(nombre)
+        return response
+
+    def test_presupuesto_acciones(self):
+        ajustes = override_settings(SUBIDAS_DIR=os.path.join(self.media_root, "subidas"))
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.medidas = []
+        contenido = b"0123456789"
+
+        token = self._accion("subida_iniciar", "post", data={
+            "destino": "equipo_foto", "objeto_id": self.objetivos["equipo"].pk,
+            "nombre": "foto.jpg", "tamano": len(contenido),
+        }).json()["token"]
+        self._accion(
+            "subida_parte", "put", [token], data=contenido, content_type="application/octet-stream",
+            headers={"Content-Range": f"bytes 0-{len(contenido) - 1}/{len(contenido)}"},
+        )
+        self.assertEqual(self._accion("subida_completar", "post", [token]).json()["estado"], SubidaParcial.COMPLETA)
+
+        noticia = self.objetivos["noticia"]
+        ids = list(NoticiaImagen.objects.filter(noticia=noticia).order_by("-orden").values_list("pk", flat=True))
+        self._accion("galeria_ordenar", "post", ["noticia_imagen", noticia.pk], data={"ids": ids})
+        self._accion("galeria_quitar", "post", ["noticia_imagen", noticia.pk, ids[0]])
+
+        trabajo = TrabajoMedia.objects.filter(estado=TrabajoMedia.ERROR).first()
+        self._accion("media_reintentar", "post", [trabajo.pk])
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.estado, TrabajoMedia.PENDIENTE)
+
+        self.assertEqual(self.medidas, [nombre for nombre, _ in ACCIONES])
+
+    def test_todas_las_urls_medidas(self):
+        nombres = {p.name for p in urlpatterns if p.name}
+        medidas = {v[0] for v in VISTAS} | {a[0] for a in ACCIONES} | SIN_MEDIR
+        self.assertEqual(nombres - medidas, set(), "Rutas de core/urls.py sin presupuesto en VISTAS o ACCIONES")
+
+
+class _SMTPDePrueba(socketserver.ThreadingTCPServer):
+    """Servidor SMTP minimo en un puerto local: cuenta conexiones y guarda los mensajes."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _SesionSMTP)
+        self.conexiones = 0
+        self.mensajes = []
+
+
+class _SesionSMTP(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.server.conexiones += 1
+        self.wfile.write(b"220 prueba\r\n")
+        while linea := self.rfile.readline():
+            comando = linea.strip().upper()
+            if comando == b"DATA":
+                self.wfile.write(b"354 fin con .\r\n")
+                datos = []
+                while (linea := self.rfile.readline()) not in (b".\r\n", b""):
+                    datos.append(linea)
+                self.server.mensajes.append(b"".join(datos))
+            elif comando == b"QUIT":
+                self.wfile.write(b"221 chau\r\n")
+                return
+            self.wfile.write(b"250 ok\r\n")
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend", EMAIL_USE_TLS=False)
+class BandejaCorreoTests(TestCase):
+
+    def setUp(self):
+        self.smtp = _SMTPDePrueba()
+        threading.Thread(target=self.smtp.serve_forever, daemon=True).start()
+        self.addCleanup(self.smtp.server_close)
+        self.addCleanup(self.smtp.shutdown)
+
+    def _puerto(self, puerto=None):
+        return override_settings(EMAIL_HOST="127.0.0.1", EMAIL_PORT=puerto or self.smtp.server_address[1])
+
+    def test_contacto_encola_sin_conectar(self):
+        datos = {"nombre": "Ana", "email": "ana@example.com", "mensaje": "Hola"}
+        with self._puerto():
+            response = self.client.post(reverse("core:contacto"), datos)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.smtp.conexiones, 0)
+        self.assertEqual(correo.en_espera(), 1)
+
+    def test_lote_por_una_conexion(self):
+        for i in range(5):
+            correo.encolar(f"Asunto {i}", "Cuerpo", ["destino@example.com"], responder_a="ana@example.com")
+        with self._puerto():
+            self.assertEqual(correo.enviar(correo.tomar()), (5, 0))
+        self.assertEqual(self.smtp.conexiones, 1)
+        self.assertEqual(len(self.smtp.mensajes), 5)
+        self.assertIn(b"Reply-To: ana@example.com", self.smtp.mensajes[0])
+        self.assertEqual(correo.resumen()[CorreoSaliente.ENVIADO], 5)
+        self.assertEqual(correo.tomar(), [])
+
+    def test_servidor_caido_reintenta_con_espera(self):
+        correo.encolar("Asunto", "Cuerpo", ["destino@example.com"])
+        puerto = self.smtp.server_address[1]
+        self.smtp.shutdown()
+        self.smtp.server_close()
+        with self._puerto(puerto):
+            self.assertEqual(correo.enviar(correo.tomar()), (0, 1))
+        pendiente = CorreoSaliente.objects.get()
+        self.assertEqual(pendiente.estado, CorreoSaliente.PENDIENTE)
+        self.assertEqual(pendiente.intentos, 1)
+        self.assertGreater(pendiente.proximo_intento, pendiente.creado)
+        # Hasta que pase la espera no se vuelve a tomar
+        self.assertEqual(correo.tomar(), [])
+
+    def test_colgado_sin_intentos_pasa_a_error(self):
+        for i in range(2):
+            correo.encolar(f"Asunto {i}", "Cuerpo", ["destino@example.com"])
+        self.assertEqual(len(correo.tomar()), 2)
+        hace_rato = timezone.now() - timedelta(minutes=correo.MINUTOS_COLGADO + 1)
+        CorreoSaliente.objects.update(iniciado=hace_rato)
+        CorreoSaliente.objects.filter(asunto="Asunto 0").update(intentos=correo.MAX_INTENTOS)
+
+        self.assertEqual(correo.recuperar_colgados(), 2)
+        estados = dict(CorreoSaliente.objects.values_list("asunto", "estado"))
+        self.assertEqual(estados, {"Asunto 0": CorreoSaliente.ERROR, "Asunto 1": CorreoSaliente.PENDIENTE})
+
+
+class ImportacionTests(TestCase):
+
+    def _entradas(self, texto, nombre):
+        return list(importacion.entradas(io.BytesIO(texto.encode("utf-8")), nombre))
+
+    def test_bibtex(self):
+        bib = """
+@string{rev = "Revista de " # "Ingeniería"}
+@comment{se ignora}
+@article{alvarez2020,
+  title = {Energ{\\'\\i}a solar en {\\'A}lvarez y Mu{\\~n}oz},
+  author = {Pérez, Juan and Ana {de la} Torre and others},
+  journal = rev,
+  year = 2020, month = mar,
+  abstract = {Primera linea
+              y segunda linea},
+  doi = {10.1000/xyz}
+}
+"""
+        [(numero, datos)] = self._entradas(bib, "lista.bib")
+        self.assertEqual(numero, 3)
+        self.assertEqual(datos["titulo"], "Energía solar en Álvarez y Muñoz")
+        self.assertEqual(datos["autores"], ["Juan Pérez", "Ana de la Torre"])
+        self.assertEqual(datos["fecha"], date(2020, 3, 1))
+        self.assertEqual(datos["resumen"], "Primera linea y segunda linea")
+        self.assertEqual(datos["archivo"], "https://doi.org/10.1000/xyz")
+
+    def test_concatenacion_de_macros(self):
+        bib = '@string{a = "Uno"}\n@string{b = a # " y " # {Dos}}\n@misc{k, title = b # " y Tres", year = "2021"}\n'
+        [(_, datos)] = self._entradas(bib, "x.bib")
+        self.assertEqual(datos["titulo"], "Uno y Dos y Tres")
+
+    def test_csv_punto_y_coma_y_tabulador(self):
+        for separador in (";", "\t"):
+            with self.subTest(separador=repr(separador)):
+                csv = separador.join(["Título", "Autores", "Año"]) + "\n"
+                csv += separador.join(["Redes, grafos", "Ana Gómez and Luis Paz", "2019"]) + "\n"
+                [(_, datos)] = self._entradas(csv, "lista.csv")
+                self.assertEqual(datos["titulo"], "Redes, grafos")
+                self.assertEqual(datos["autores"], ["Ana Gómez", "Luis Paz"])
+                self.assertEqual(datos["fecha"], date(2019, 1, 1))
+
+    def test_duplicados_por_titulo_y_anio(self):
+        Publicacion.objects.create(titulo="Energía Solar", fecha=date(2020, 1, 1))
+        entradas = [
+            (1, {"titulo": "energia  solar", "autores": [], "fecha": date(2020, 6, 1)}),
+            (2, {"titulo": "Energía solar", "autores": [], "fecha": date(2021, 1, 1)}),
+            (3, {"titulo": "ENERGIA SOLAR!", "autores": [], "fecha": date(2021, 5, 1)}),
+        ]
+        resultado = importacion.importar(entradas)
+        self.assertEqual((resultado.leidas, resultado.creadas, resultado.duplicadas), (3, 1, 2))
+        self.assertEqual(Publicacion.objects.count(), 2)
+
+    def test_autores_existentes_y_usuarios(self):
+        autor = Autor.objects.create(nombre="Juan Pérez")
+        usuario = get_user_model().objects.create_user("ana", first_name="Ana", last_name="Gómez")
+        entradas = [(1, {
+            "titulo": "Uno", "fecha": None,
+            "autores": ["Perez, Juan", "Gomez Ana", "Luis Paz", "Juan Perez"],
+        })]
+        resultado = importacion.importar(entradas)
+        self.assertEqual((resultado.autores_nuevos, resultado.vinculos), (2, 3))
+        publicacion = Publicacion.objects.get()
+        vinculados = [v.autor for v in PublicacionAutor.objects.filter(publicacion=publicacion).order_by("orden")]
+        self.assertEqual(vinculados[0], autor)
+        self.assertEqual(vinculados[1].user, usuario)
+        self.assertEqual(vinculados[2].nombre, "Luis Paz")
+        self.assertEqual(Autor.objects.count(), 3)
+
+    def test_escribe_fts(self):
+        importacion.importar([(1, {"titulo": "Biomasa forestal", "autores": ["Luis Paz"], "fecha": None})])
+        publicacion = Publicacion.objects.get()
+        self.assertEqual(publicacion.nombres_busqueda, "Luis Paz")
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT titulo, nombres FROM {busqueda.INDICE_PUBLICACIONES.tabla_fts} WHERE rowid = %s",
+                [publicacion.pk],
+            )
+            self.assertEqual(cursor.fetchone(), ("Biomasa forestal", "Luis Paz"))
+
+    def test_simular_no_guarda(self):
+        resultado = importacion.importar(
+            [(1, {"titulo": "Biomasa", "autores": ["Luis Paz"], "fecha": None})], simular=True,
+        )
+        self.assertEqual((resultado.creadas, resultado.autores_nuevos), (1, 1))
+        self.assertFalse(Publicacion.objects.exists())
+        self.assertFalse(Autor.objects.exists())
+
+
+class EntregaMediaTests(MediaTemporal, TestCase):
+
+    CONTENIDO = bytes(range(256)) * 4
+
+    def setUp(self):
+        super().setUp()
+        self.factory = RequestFactory()
+        self.nombre = self._archivo("videos/clip.mp4", self.CONTENIDO)
+
+    def _archivo(self, nombre, contenido):
+        ruta = os.path.join(self.media_root, nombre)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        with open(ruta, "wb") as f:
+            f.write(contenido)
+        return nombre
+
+    def _get(self, nombre=None, **cabeceras):
+        response = entrega.servir(self.factory.get("/media/", headers=cabeceras), nombre or self.nombre)
+        self.addCleanup(response.close)
+        return response
+
+    def test_rango(self):
+        casos = [
+            (None, 100, None),
+            ("bytes=0-9", 100, (0, 9)),
+            ("bytes=90-", 100, (90, 99)),
+            ("bytes=50-500", 100, (50, 99)),
+            ("bytes=-10", 100, (90, 99)),
+            ("bytes=-500", 100, (0, 99)),
+            ("bytes=0-1,5-6", 100, None),
+            ("items=0-9", 100, None),
+            ("bytes=500-10", 100, None),
+            ("bytes=100-", 100, False),
+            ("bytes=-0", 100, False),
+            ("bytes=0-9", 0, False),
+            ("bytes=-10", 0, False),
+        ]
+        for cabecera, tamano, esperado in casos:
+            with self.subTest(cabecera=cabecera, tamano=tamano):
+                self.assertEqual(entrega.rango(cabecera, tamano), esperado)
+
+    def test_parcial(self):
+        response = self._get(Range="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), self.CONTENIDO[10:20])
+        self.assertEqual(response["Content-Range"], f"bytes 10-19/{len(self.CONTENIDO)}")
+        self.assertEqual(response["Content-Length"], "10")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+
+        response = self._get(Range="bytes=-5")
+        self.assertEqual(b"".join(response.streaming_content), self.CONTENIDO[-5:])
+
+    def test_rango_imposible(self):
+        response = self._get(Range=f"bytes={len(self.CONTENIDO)}-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(self.CONTENIDO)}")
+
+    def test_if_range_desactualizado_manda_todo(self):
+        etag = self._get()["ETag"]
+        for if_range in ('"otra-version"', "Mon, 01 Jan 2001 00:00:00 GMT"):
+            with self.subTest(if_range=if_range):
+                response = self._get(Range="bytes=0-9", **{"If-Range": if_range})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(b"".join(response.streaming_content), self.CONTENIDO)
+        self.assertEqual(self._get(Range="bytes=0-9", **{"If-Range": etag}).status_code, 206)
+
+    def test_no_modificado(self):
+        etag = self._get()["ETag"]
+        response = self._get(**{"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertIn("must-revalidate", response["Cache-Control"])
+
+    def test_blob_inmutable(self):
+        sha = "ab" * 32
+        response = self._get(self._archivo(f"blobs/ab/{sha}.jpg", b"imagen"))
+        self.assertEqual(response["ETag"], f'"{sha}"')
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertIn(f"max-age={entrega.UN_ANIO}", response["Cache-Control"])
+
+    def test_delega_al_servidor_web(self):
+        with self.settings(MEDIA_ENVIO="x-accel-redirect", MEDIA_ENVIO_PREFIJO="/interna/"):
+            response = self._get(Range="bytes=0-9")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Accel-Redirect"], "/interna/videos/clip.mp4")
+        self.assertEqual(response.content, b"")
+
+        with self.settings(MEDIA_ENVIO="x-sendfile"):
+            response = self._get()
+        self.assertEqual(response["X-Sendfile"], os.path.join(self.media_root, self.nombre))
+
+    def test_fuera_de_media(self):
+        self._archivo("../secreto.txt", b"no")
+        for nombre in ("../secreto.txt", "videos/../../secreto.txt", "videos/no-existe.mp4"):
+            with self.subTest(nombre=nombre), self.assertRaises(Http404):
+                self._get(nombre)
+
+
+class LimpiezaMediaTests(MediaTemporal, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.storage = FileSystemStorage(location=self.media_root)
+        noticia = Noticia.objects.create(titulo="Noticia")
+        # update: sin señales, no se encolan derivadas de una imagen de prueba
+        Noticia.objects.filter(pk=noticia.pk).update(
+            imagen="noticias/portada.jpg", derivadas={"rutas": ["derivadas/noticias/portada-640.webp"]},
+        )
+        Equipo.objects.create(nombre="Persona", foto="equipo/persona.jpg")
+        self.usados = ["noticias/portada.jpg", "derivadas/noticias/portada-640.webp", "equipo/persona.jpg"]
+        for nombre in self.usados + ["viejo/huerfano.pdf"]:
+            self._archivo(nombre, horas=48)
+        self._archivo("nuevo/reciente.pdf", horas=1)
+
+    def _archivo(self, nombre, horas):
+        ruta = self.storage.path(nombre)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        with open(ruta, "wb") as f:
+            f.write(b"x" * 10)
+        antes = time.time() - horas * 3600
+        os.utime(ruta, (antes, antes))
+
+    def _existen(self):
+        return sorted(limpieza.listado(self.storage))
+
+    def test_informa_sin_borrar(self):
+        informe = limpieza.escanear(self.storage, hilos=2)
+        self.assertEqual((informe.archivos, informe.huerfanos, informe.recientes), (5, 1, 1))
+        self.assertEqual(informe.muestra_huerfanos, [("viejo/huerfano.pdf", 10)])
+        self.assertEqual((informe.borrados, informe.colgadas), (0, 0))
+        self.assertEqual(len(self._existen()), 5)
+
+    def test_reclamar_borra_solo_huerfanos_viejos(self):
+        informe = limpieza.escanear(self.storage, hilos=2, reclamar=True)
+        self.assertEqual((informe.borrados, informe.bytes_borrados, informe.errores), (1, 10, 0))
+        self.assertEqual(self._existen(), sorted(self.usados + ["nuevo/reciente.pdf"]))
+
+    def test_referencia_colgada(self):
+        os.remove(self.storage.path("equipo/persona.jpg"))
+        informe = limpieza.escanear(self.storage, hilos=2, reclamar=True)
+        self.assertEqual(informe.muestra_colgadas, [("equipo/persona.jpg", f"core.Equipo.foto#{Equipo.objects.get().pk}")])
+
+    def test_comando_sin_borrar(self):
+        salida = io.StringIO()
+        call_command("limpiar_media", "--hilos", "2", stdout=salida)
+        self.assertIn("viejo/huerfano.pdf", salida.getvalue())
+        self.assertIn("Nada se borro", salida.getvalue())
+        self.assertEqual(len(self._existen()), 5)
+
+        call_command("limpiar_media", "--borrar", "--horas", "0", stdout=io.StringIO())
+        self.assertEqual(self._existen(), sorted(self.usados))
+
+
+# Partes de 4 bytes: un archivo de 10 son tres partes (4, 4 y 2)
+@mock.patch.object(subidas, "TAMANO_PARTE", 4)
+class SubidasTests(MediaTemporal, TestCase):
+
+    CONTENIDO = b"0123456789"
+
+    def setUp(self):
+        super().setUp()
+        ajustes = override_settings(SUBIDAS_DIR=os.path.join(self.media_root, "subidas"))
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.user = get_user_model().objects.create_user("panel", password="clave-de-prueba")
+        self.client.force_login(self.user)
+        self.equipo = Equipo.objects.create(nombre="Persona")
+
+    def _iniciar(self, sha256=None):
+        response = self.client.post(reverse("core:subida_iniciar"), {
+            "destino": "equipo_foto", "objeto_id": self.equipo.pk, "nombre": "foto.jpg",
+            "tamano": len(self.CONTENIDO),
+            "sha256": hashlib.sha256(self.CONTENIDO).hexdigest() if sha256 is None else sha256,
+        })
+        self.assertEqual(response.status_code, 201)
+        return response.json()["token"]
+
+    def _parte(self, token, inicio, datos=None, sha256=None):
+        datos = self.CONTENIDO[inicio:inicio + 4] if datos is None else datos
+        cabeceras = {
+            "Content-Range": f"bytes {inicio}-{inicio + len(datos) - 1}/{len(self.CONTENIDO)}",
+            "X-Parte-SHA256": sha256 or hashlib.sha256(datos).hexdigest(),
+        }
+        return self.client.put(
+            reverse("core:subida_parte", args=[token]), datos,
+            content_type="application/octet-stream", headers=cabeceras,
+        )
+
+    def _completar(self, token):
+        return self.client.post(reverse("core:subida_completar", args=[token]))
+
+    def test_subida_completa(self):
+        token = self._iniciar()
+        for inicio in (0, 4, 8):
+            self.assertEqual(self._parte(token, inicio).json()["recibido"], min(inicio + 4, 10))
+        self.assertEqual(self._completar(token).json()["estado"], SubidaParcial.COMPLETA)
+        self.equipo.refresh_from_db()
+        with default_storage.open(self.equipo.foto) as f:
+            self.assertEqual(f.read(), self.CONTENIDO)
+        self.assertEqual(os.listdir(settings.SUBIDAS_DIR), [])
+
+    def test_parte_con_hash_distinto(self):
+        token = self._iniciar()
+        response = self._parte(token, 0, sha256="0" * 64)
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(response.json()["recibido"], 0)
+        self.assertEqual(self._parte(token, 0).json()["recibido"], 4)
+
+    def test_retoma_despues_de_una_parte_perdida(self):
+        token = self._iniciar()
+        self._parte(token, 0)
+        # La segunda no llego: la tercera se rechaza y el estado dice desde donde seguir
+        response = self._parte(token, 8)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["recibido"], 4)
+        self.assertEqual(self.client.get(reverse("core:subida_parte", args=[token])).json()["recibido"], 4)
+        self._parte(token, 4)
+        self._parte(token, 8)
+        self.assertEqual(self._completar(token).status_code, 200)
+
+    def test_parte_repetida_o_adelantada(self):
+        token = self._iniciar()
+        self._parte(token, 0)
+        self._parte(token, 4)
+        self.assertEqual(self._parte(token, 0).status_code, 409)
+        self.assertEqual(self._parte(token, 4).status_code, 409)
+        self.assertEqual(self._completar(token).status_code, 409)
+        self._parte(token, 8)
+        self.assertEqual(self._completar(token).status_code, 200)
+
+    def test_archivo_con_hash_distinto(self):
+        token = self._iniciar(sha256="0" * 64)
+        for inicio in (0, 4, 8):
+            self._parte(token, inicio)
+        self.assertEqual(self._completar(token).status_code, 422)
+        subida = SubidaParcial.objects.get(token=token)
+        self.assertEqual(subida.estado, SubidaParcial.ERROR)
+        self.assertFalse(subidas.ruta(subida).exists())
+        self.equipo.refresh_from_db()
+        self.assertEqual(self.equipo.foto, "")
+
+    def test_subida_de_otro_usuario(self):
+        token = self._iniciar()
+        for inicio in (0, 4, 8):
+            self._parte(token, inicio)
+        self.client.force_login(get_user_model().objects.create_user("otro", password="clave-de-prueba"))
+        self.assertEqual(self._parte(token, 0).status_code, 404)
+        self.assertEqual(self._completar(token).status_code, 404)
+        self.assertEqual(SubidaParcial.objects.get(token=token).estado, SubidaParcial.ABIERTA)
+
+
+class SeccionesTests(TestCase):
+
+    TABLAS = ("cuerpo_equipo_profesionalidad", "cuerpo_equipo_universidad", "cuerpo_equipo_interes")
+
+    def setUp(self):
+        self.equipo = Equipo.objects.create(nombre="Persona")
+        secciones.guardar_secciones(self.equipo, {
+            "profesionalidades": [("Docente", ""), ("Investigadora", "CONICET")],
+            "universidades": [("UNSa", "Grado"), ("UBA", "")],
+            "intereses": [("Energía", "")],
+        })
+
+    def _escrituras(self, datos):
+        with CaptureQueriesContext(connection) as consultas:
+            cambio = secciones.guardar_secciones(self.equipo, datos)
+        escrituras = [
+            q["sql"].split()[0] + " " + tabla
+            for q in consultas.captured_queries for tabla in self.TABLAS
+            if f'"{tabla}"' in q["sql"] and not q["sql"].startswith("SELECT")
+        ]
+        return cambio, sorted(escrituras)
+
+    def _filas(self):
+        return (
+            list(Profesionalidad.objects.filter(equipo=self.equipo).order_by("orden").values_list("titulo", "orden")),
+            list(EquipoUniversidad.objects.filter(equipo=self.equipo).order_by("orden")
+                 .values_list("universidad__descripcion_universidad", "descripcion", "orden")),
+            list(EquipoInteres.objects.filter(equipo=self.equipo).values_list("tema_interes__descripcion_interes", flat=True)),
+        )
+
+    def test_sin_cambios_no_escribe(self):
+        cambio, escrituras = self._escrituras({
+            "profesionalidades": [("Docente", ""), ("Investigadora", "CONICET")],
+            "universidades": [("UNSa", "Grado"), ("UBA", "")],
+            "intereses": [("Energía", "")],
+        })
+        self.assertFalse(cambio)
+        self.assertEqual(escrituras, [])
+
+    def test_altas_bajas_y_cambios(self):
+        vinculo_unsa = EquipoUniversidad.objects.get(universidad__descripcion_universidad="UNSa").pk
+        cambio, escrituras = self._escrituras({
+            "profesionalidades": [("Docente", "")],
+            "universidades": [("UNSa", "Posgrado"), ("UNT", ""), ("UNSa", "repetida")],
+            "intereses": [("Energía", "")],
+        })
+        self.assertTrue(cambio)
+        # Una escritura en bloque por tipo de cambio y tabla
+        self.assertEqual(escrituras, [
+            "DELETE cuerpo_equipo_profesionalidad",
+            "DELETE cuerpo_equipo_universidad",
+            "INSERT cuerpo_equipo_universidad",
+            "UPDATE cuerpo_equipo_universidad",
+        ])
+        self.assertEqual(self._filas(), (
+            [("Docente", 1)],
+            [("UNSa", "Posgrado", 1), ("UNT", "", 2)],
+            ["Energía"],
+        ))
+        # La fila que sigue es la misma, no una nueva
+        self.assertTrue(EquipoUniversidad.objects.filter(pk=vinculo_unsa).exists())
+
+    def test_vaciar(self):
+        secciones.guardar_secciones(self.equipo, {"profesionalidades": [], "universidades": [], "intereses": []})
+        self.assertEqual(self._filas(), ([], [], []))
+        # Los catalogos quedan para otros integrantes
+        self.assertEqual(Universidad.objects.count(), 2)
+
+
+class AlmacenamientoTests(MediaTemporal, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        storages = {
+            **STORAGES_PRUEBA,
+            "default": {
+                "BACKEND": "core.almacenamiento.AlmacenamientoDeduplicado",
+                "OPTIONS": {"options": {"location": self.media_root}},
+            },
+        }
+        ajustes = override_settings(STORAGES=storages)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.evento = Evento.objects.create(nombre="Jornada")
+
+    def _subir(self, nombre):
+        return EventoArchivo.objects.create(
+            evento=self.evento, archivo=SimpleUploadedFile(nombre, b"%PDF-1.4 programa"),
+        )
+
+    def test_mismo_contenido_un_blob(self):
+        uno, dos = self._subir("programa.pdf"), self._subir("Programa final.PDF")
+        self.assertEqual(uno.archivo.name, dos.archivo.name)
+        self.assertTrue(uno.archivo.name.startswith("blobs/"))
+        self.assertEqual(BlobMedia.objects.count(), 1)
+        self.assertEqual(len(list(limpieza.listado(default_storage))), 1)
+
+        # Borrar el archivo de una fila no se lo saca a la otra
+        uno.archivo.delete()
+        dos.refresh_from_db()
+        with dos.archivo.open() as f:
+            self.assertEqual(f.read(), b"%PDF-1.4 programa")
+        self.assertEqual(BlobMedia.objects.count(), 1)
+
+
+class GaleriasTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_user("panel", password="clave-de-prueba"))
+        self.noticia, otra = Noticia.objects.create(titulo="Una"), Noticia.objects.create(titulo="Otra")
+        # bulk_create: sin señales ni archivos, solo las filas a ordenar
+        self.items = NoticiaImagen.objects.bulk_create(NoticiaImagen(noticia=self.noticia, orden=i) for i in (1, 2, 3))
+        self.ajena = NoticiaImagen.objects.create(noticia=otra, orden=1)
+
+    def _ordenar(self, ids):
+        url = reverse("core:galeria_ordenar", args=["noticia_imagen", self.noticia.pk])
+        return self.client.post(url, {"ids": ids})
+
+    def _orden(self):
+        return list(NoticiaImagen.objects.filter(noticia=self.noticia).order_by("orden").values_list("pk", flat=True))
+
+    def test_reordenar(self):
+        uno, dos, tres = (i.pk for i in self.items)
+        response = self._ordenar([tres, uno])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["cambiados"], 3)
+        self.assertEqual(self._orden(), [tres, uno, dos])
+
+    def test_rechaza_ids_de_otra_galeria(self):
+        antes = self._orden()
+        for ids in ([self.ajena.pk, self.items[0].pk], [self.items[1].pk, self.items[1].pk]):
+            with self.subTest(ids=ids):
+                self.assertEqual(self._ordenar(ids).status_code, 400)
+        self.assertEqual(self._orden(), antes)
+        self.assertEqual(NoticiaImagen.objects.get(pk=self.ajena.pk).orden, 1)
+
+
+class ColaMediaTests(MediaTemporal, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.evento = Evento.objects.create(nombre="Jornada")
+
+    def _encolar(self, *contenidos):
+        archivos = [SimpleUploadedFile(f"doc{i}.pdf", c) for i, c in enumerate(contenidos)]
+        return cola.encolar("evento_archivo", self.evento, archivos, ["Programa"])
+
+    def test_encola_en_disco_y_el_worker_lo_borra(self):
+        self.assertEqual(self._encolar(b"%PDF-1 programa"), 1)
+        trabajo = TrabajoMedia.objects.get()
+        self.assertEqual(trabajo.tamano, 15)
+        # En el storage de media, que ve tambien el worker
+        self.assertTrue(trabajo.ruta.startswith("cola/evento_archivo/"))
+        [copia] = self._en_cola()
+        with open(copia, "rb") as f:
+            self.assertEqual(f.read(), b"%PDF-1 programa")
+
+        self.assertEqual(cola.procesar(cola.tomar()), TrabajoMedia.LISTO)
+        archivo = EventoArchivo.objects.get(evento=self.evento)
+        self.assertEqual((archivo.nombre, archivo.archivo.read()), ("Programa", b"%PDF-1 programa"))
+        self.assertEqual(TrabajoMedia.objects.get().ruta, "")
+        self.assertEqual(self._en_cola(), [])
+
+    def test_cancelar_borra_las_copias(self):
+        self._encolar(b"uno", b"dos")
+        self.assertEqual(cola.cancelar("evento_archivo", self.evento), 2)
+        self.assertEqual(self._en_cola(), [])
+
+    def test_limpieza_no_borra_lo_encolado(self):
+        self._encolar(b"uno")
+        informe = limpieza.escanear(horas=0, hilos=2, reclamar=True)
+        self.assertEqual((informe.archivos, informe.huerfanos, informe.borrados), (1, 0, 0))
+        self.assertEqual(len(self._en_cola()), 1)
+
+    def test_colgado_sin_intentos_pasa_a_error(self):
+        self._encolar(b"uno", b"dos")
+        cola.tomar(), cola.tomar()
+        hace_rato = timezone.now() - timedelta(minutes=cola.MINUTOS_COLGADO + 1)
+        TrabajoMedia.objects.update(iniciado=hace_rato)
+        TrabajoMedia.objects.filter(orden=1).update(intentos=cola.MAX_INTENTOS)
+
+        self.assertEqual(cola.recuperar_colgados(), 2)
+        estados = dict(TrabajoMedia.objects.values_list("orden", "estado"))
+        self.assertEqual(estados, {1: TrabajoMedia.ERROR, 2: TrabajoMedia.PENDIENTE})
+        # La copia sigue: se puede reintentar a mano
+        self.assertEqual(len(self._en_cola()), 2)
+        self.assertEqual(cola.reintentar(TrabajoMedia.objects.get(orden=1).pk), 1)
+
+
+
+class BusquedaTests(TestCase):
+    """Indice FTS5 (SQLite) de core.busqueda, mantenido por las signals."""
+
+    def setUp(self):
+        # Los reindex corren al confirmar la transaccion
+        with self.captureOnCommitCallbacks(execute=True):
+            self.beto = Equipo.objects.create(nombre="Beto Ruiz")
+            self.carla = Equipo.objects.create(nombre="Carla Sosa")
+            # Creada al final: el orden por relevancia no coincide con el de ids
+            self.ana = Equipo.objects.create(nombre="Ana Epidemiologia")
+            Profesionalidad.objects.create(equipo=self.beto, titulo="Investigador en epidemiologia")
+            self.tema = TemaInteres.objects.create(descripcion_interes="Ecologia de vectores")
+            EquipoInteres.objects.create(equipo=self.carla, tema_interes=self.tema)
+            universidad = Universidad.objects.create(descripcion_universidad="Universidad Nacional del Litoral")
+            EquipoUniversidad.objects.create(equipo=self.beto, universidad=universidad)
+
+    def _equipo(self, q):
+        return list(busqueda.buscar_equipo(Equipo.objects.all(), q))
+
+    def test_rol_interes_y_universidad(self):
+        self.assertEqual(self._equipo("investigador"), [self.beto])
+        self.assertEqual(self._equipo("vectores"), [self.carla])
+        self.assertEqual(self._equipo("litoral"), [self.beto])
+        # Cada palabra como prefijo y todas tienen que aparecer
+        self.assertEqual(self._equipo("nacion lit"), [self.beto])
+        self.assertEqual(self._equipo("litoral vectores"), [])
+
+    def test_cambiar_el_catalogo_reindexa(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tema.descripcion_interes = "Zoonosis"
+            self.tema.save()
+        self.assertEqual(self._equipo("vectores"), [])
+        self.assertEqual(self._equipo("zoonosis"), [self.carla])
+
+    def test_orden_por_relevancia(self):
+        # El nombre pesa mas que los roles: primero quien se llama asi
+        self.assertEqual(self._equipo("epidemiologia"), [self.ana, self.beto])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            en_resumen = Publicacion.objects.create(titulo="Informe anual", resumen="Dengue en la region")
+            en_titulo = Publicacion.objects.create(titulo="Dengue urbano", resumen="Vigilancia")
+            Publicacion.objects.create(titulo="Otra", resumen="Sin relacion")
+        resultados = busqueda.buscar_publicaciones(Publicacion.objects.all(), "dengue")
+        self.assertEqual(resultados.count(), 2)
+        self.assertEqual(list(resultados), [en_titulo, en_resumen])
+        self.assertEqual(resultados[0], en_titulo)
+
+        # Los filtros del queryset base se respetan sin romper el orden
+        filtrado = busqueda.buscar_publicaciones(Publicacion.objects.exclude(pk=en_titulo.pk), "dengue")
+        self.assertEqual(list(filtrado), [en_resumen])
+
+
+@override_settings(STORAGES=STORAGES_PRUEBA)
+class NombresTests(TestCase):
+
+    def setUp(self):
+        # El indice en memoria vive en el modulo: se arranca de cero en cada test
+        cache.clear()
+        nombres._indices.clear()
+        self.hernan = Equipo.objects.create(nombre="Hernán González")
+        self.maria = Equipo.objects.create(nombre="María Martínez")
+        self.hernando = Equipo.objects.create(nombre="Hernando Gómez")
+
+    def test_sin_tildes(self):
+        self.assertEqual(nombres.normalizar("  Martínez  PÉREZ"), "martinez perez")
+        self.assertEqual(nombres.buscar_ids("equipo", "hernan gonzalez"), [self.hernan.pk])
+        self.assertEqual(nombres.buscar_ids("equipo", "MARIA"), [self.maria.pk])
+        # A igual similitud, primero el nombre mas corto
+        self.assertEqual(nombres.buscar_ids("equipo", "Hernan"), [self.hernan.pk, self.hernando.pk])
+
+    def test_letras_traspuestas(self):
+        self.assertEqual(nombres.buscar_ids("equipo", "Hernan Gonzlaez"), [self.hernan.pk])
+        self.assertEqual(nombres.buscar_ids("equipo", "Maria Martniez"), [self.maria.pk])
+        self.assertEqual(nombres.buscar_ids("equipo", "Rodriguez"), [])
+
+    def test_renombrar_invalida_el_indice(self):
+        self.assertEqual(nombres.buscar_ids("equipo", "Maria Martinez"), [self.maria.pk])
+        self.maria.nombre = "Lucía Fernández"
+        self.maria.save()
+        self.assertEqual(nombres.buscar_ids("equipo", "Maria Martinez"), [])
+        self.assertEqual(nombres.buscar_ids("equipo", "Lucia Fernandez"), [self.maria.pk])
+
+        Autor.objects.create(user=get_user_model().objects.create_user("jperez", first_name="Juan", last_name="Pérez"))
+        self.assertEqual(len(nombres.buscar_ids("autor", "juan perez")), 1)
+
+    def test_admin_suma_los_parecidos(self):
+        modelo_admin = admin.site._registry[Equipo]
+        request = RequestFactory().get("/admin/core/equipo/", {"q": "Hernan Gonzlaez"})
+        request.user = get_user_model().objects.create_superuser("admin", password="clave-de-prueba")
+
+        # La busqueda estandar (icontains) no encuentra nada con el error de tipeo
+        resultado, _ = modelo_admin.get_search_results(request, Equipo.objects.all(), "Hernan Gonzlaez")
+        self.assertEqual(list(resultado), [self.hernan])
+
+        # Los parecidos salen del queryset recibido (filtros del changelist)
+        filtrado = Equipo.objects.exclude(pk=self.hernan.pk)
+        resultado, _ = modelo_admin.get_search_results(request, filtrado, "Hernan Gonzlaez")
+        self.assertFalse(resultado.exists())
+
+        self.client.force_login(request.user)
+        response = self.client.get("/admin/core/equipo/", {"q": "Hernan Gonzlaez"})
+        self.assertEqual(list(response.context["cl"].result_list), [self.hernan])
+
+
+def png(ancho, alto):
+    """PNG con transparencia (para probar el fondo del JPEG)."""
+    buf = io.BytesIO()
+    Image.new("RGBA", (ancho, alto), (200, 30, 30, 128)).save(buf, "PNG")
+    return buf.getvalue()
+
+
+class DerivadasTests(MediaTemporal, TestCase):
+
+    def _noticia(self, ancho, alto=None):
+        imagen = SimpleUploadedFile("foto.png", png(ancho, alto or ancho // 2), content_type="image/png")
+        return Noticia.objects.create(titulo="Noticia", imagen=imagen)
+
+    def test_anchos_y_formatos(self):
+        noticia = self._noticia(1100)
+        datos = derivadas.generar("noticia", noticia.pk)
+
+        # 1600 no se genera: no se agranda el original
+        self.assertEqual([a for a, _ in datos["webp"]], [320, 640, 1024])
+        self.assertEqual([a for a, _ in datos["jpeg"]], [320, 640, 1024])
+        self.assertEqual((datos["origen"], datos["ancho"], datos["alto"]), (noticia.imagen.name, 1100, 550))
+        for ruta in datos["rutas"]:
+            with self.subTest(ruta=ruta), default_storage.open(ruta) as f, Image.open(f) as img:
+                formato = "WEBP" if ruta.endswith(".webp") else "JPEG"
+                self.assertEqual(img.format, formato)
+                self.assertTrue(ruta.endswith(f"-{img.width}w.{formato.lower()}"))
+                self.assertEqual(img.height, round(550 * img.width / 1100))
+        noticia.refresh_from_db()
+        self.assertEqual(derivadas.vigentes(noticia), datos)
+
+    def test_imagen_chica_queda_en_su_ancho(self):
+        datos = derivadas.generar("noticia", self._noticia(200).pk)
+        self.assertEqual(datos["webp"], [[200, default_storage.url(datos["rutas"][0])]])
+        self.assertEqual([a for a, _ in datos["jpeg"]], [200])
+
+    def test_comando_solo_las_que_faltan(self):
+        noticias = {700: self._noticia(700), 400: self._noticia(400)}
+        call_command("generar_derivadas", stdout=io.StringIO())
+        # Solo anchos menores al original (el original mismo ya esta en src)
+        for ancho, esperados in ((700, [320, 640]), (400, [320])):
+            noticias[ancho].refresh_from_db()
+            self.assertEqual([a for a, _ in noticias[ancho].derivadas["jpeg"]], esperados)
+
+        salida = io.StringIO()
+        call_command("generar_derivadas", stdout=salida)
+        self.assertIn("noticia: 0 procesadas, 0 con error.", salida.getvalue())
+
+    def test_imagen_responsive(self):
+        noticia = self._noticia(700)
+        plantilla = Template(
+            '{% load imagenes %}'
+            '{% imagen_responsive noticia sizes="(min-width: 992px) 50vw, 100vw" alt="Foto" class_="img-fluid" %}'
+        )
+        # Sin derivadas: <img> comun con el original
+        html = plantilla.render(Context({"noticia": noticia}))
+        self.assertHTMLEqual(html, f'<img src="{noticia.imagen.url}" alt="Foto" class="img-fluid">')
+
+        derivadas.generar("noticia", noticia.pk)
+        noticia.refresh_from_db()
+        html = plantilla.render(Context({"noticia": noticia}))
+        base = default_storage.url(f"derivadas/{noticia.imagen.name[:-4]}")
+        sizes = "(min-width: 992px) 50vw, 100vw"
+        self.assertHTMLEqual(html, (
+            f'<picture><source type="image/webp" srcset="{base}-320w.webp 320w, {base}-640w.webp 640w" sizes="{sizes}">'
+            f'<img src="{noticia.imagen.url}" srcset="{base}-320w.jpeg 320w, {base}-640w.jpeg 640w" sizes="{sizes}"'
+            ' alt="Foto" class="img-fluid"></picture>'
+        ))
+
+        # Si la imagen cambia, las derivadas viejas no se usan
+        noticia.imagen.name = "noticias/otra.png"
+        self.assertNotIn("srcset", plantilla.render(Context({"noticia": noticia})))
+
+
+# Un solo proceso: la cache local alcanza
+@override_settings(STORAGES=STORAGES_PRUEBA, PAGINAS_CACHE_LOCAL=True)
+class CachePaginasTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client.defaults["HTTP_HOST"] = "localhost"
+        # Las invalidaciones corren al confirmar: se ejecutan aca y no en el test
+        with self.captureOnCommitCallbacks(execute=True):
+            self.uno = Publicacion.objects.create(titulo="Uno")
+            self.dos = Publicacion.objects.create(titulo="Dos")
+
+    def _get(self, url, consultas):
+        with self.assertNumQueries(consultas):
+            return self.client.get(url)
+
+    def test_anonimo_sirve_sin_consultas(self):
+        url = reverse("core:publicacion_detalle", args=[self.uno.pk])
+        self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+        self.assertEqual(self._get(url, 0)["X-Cache"], "HIT")
+
+    def test_guardar_invalida_solo_lo_afectado(self):
+        urls = [reverse("core:publicacion_detalle", args=[p.pk]) for p in (self.uno, self.dos)]
+        listado = reverse("core:publicaciones")
+        for url in urls + [listado]:
+            self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.uno.titulo = "Uno corregido"
+            self.uno.save()
+
+        self.assertContains(self.client.get(urls[0]), "Uno corregido")
+        self.assertEqual(self._get(urls[1], 0)["X-Cache"], "HIT")
+        self.assertContains(self.client.get(listado), "Uno corregido")
+
+    def test_regenera_uno_solo(self):
+        url = reverse("core:publicacion_detalle", args=[self.uno.pk])
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.uno.titulo = "Uno corregido"
+            self.uno.save()
+
+        # Otro worker tiene el candado: se sirve la copia vieja sin consultar
+        clave = paginas.clave_pagina(f"http://localhost{url}")
+        marca = paginas._tomar(clave)
+        response = self._get(url, 0)
+        self.assertEqual(response["X-Cache"], "STALE")
+        self.assertNotContains(response, "Uno corregido")
+
+        paginas._soltar(clave, marca)
+        self.assertContains(self.client.get(url), "Uno corregido")
+        conteos = paginas.contadores()
+        # La primera visita (miss) tambien se armo con el candado
+        self.assertEqual((conteos["miss"], conteos["stale"], conteos["regeneracion"]), (1, 1, 2))
+
+    def test_publica_sin_cookies(self):
+        for url in (reverse("core:publicaciones"), reverse("core:contacto")):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertFalse(response.cookies)
+                self.assertFalse(response.has_header("Vary"))
+                self.assertIn(f"s-maxage={paginas.S_MAXAGE}", response["Cache-Control"])
+        # El token del formulario de contacto se pide aparte
+        self.assertIn("csrftoken", self.client.get(reverse("core:csrf")).cookies)
+
+    def test_con_sesion_no_cachea(self):
+        self.client.force_login(get_user_model().objects.create_user("panel", password="clave-de-prueba"))
+        url = reverse("core:publicaciones")
+        self.client.get(url)
+        self.assertNotIn("X-Cache", self.client.get(url))
+        self.assertIsNone(paginas.entrada(f"http://localhost{url}"))
+
+    @override_settings(PAGINAS_CACHE_LOCAL=False)
+    def test_cache_local_apagada(self):
+        url = reverse("core:publicaciones")
+        self.client.get(url)
+        self.assertNotIn("X-Cache", self.client.get(url))
+        self.assertEqual([e.id for e in checks.cache_compartida(None)], ["core.W001"])
+        with self.assertRaises(CommandError):
+            call_command("cache_paginas", "--todo")
+
+    def test_perfil_cacheado_solo_si_la_cache_esta_activa(self):
+        persona = Equipo.objects.create(nombre="Persona")
+        request = RequestFactory().get("/")
+        perfiles.perfil_renderizado(request, persona.pk)
+        with self.assertNumQueries(0):
+            perfiles.perfil_renderizado(request, persona.pk)
+
+        # Con cache local por proceso se arma en cada pedido y no queda guardado
+        cache.clear()
+        with override_settings(PAGINAS_CACHE_LOCAL=False):
+            perfiles.perfil_renderizado(request, persona.pk)
+            self.assertIsNone(cache.get(perfiles.clave_perfil(persona.pk)))
+
+
+@override_settings(STORAGES=STORAGES_PRUEBA)
+class GetCondicionalTests(TestCase):
+
+    def setUp(self):
+        # Sin la cache de paginas, para medir solo el validador
+        cache.clear()
+        self.publicacion = Publicacion.objects.create(titulo="Uno")
+
+    def _validar(self, url, etag, consultas):
+        cache.clear()
+        with self.assertNumQueries(consultas):
+            return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_listado_responde_304(self):
+        url = reverse("core:publicaciones")
+        response = self.client.get(url)
+        self.assertIn("ETag", response)
+        self.assertIn("Last-Modified", response)
+        self.assertEqual(self._validar(url, response["ETag"], 1).status_code, 304)
+
+        Publicacion.objects.create(titulo="Dos")
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 200)
+
+    def test_hija_cambia_el_detalle(self):
+        url = reverse("core:publicacion_detalle", args=[self.publicacion.pk])
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self._validar(url, etag, 1).status_code, 304)
+
+        PublicacionVideo.objects.create(publicacion=self.publicacion)
+        cache.clear()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class FrontTests(TestCase):
+
+    def test_purgar(self):
+        css = """/*! Lib | MIT */
+        .btn, .nada > .btn { color : red }
+        .nada { color: blue }
+        .alert-success { color: green }
+        a:not(.nada) .btn { margin: 0 }
+        @media (min-width: 576px) { .nada { a: b } .btn { b: c } }
+        @media print { .nada { a: b } }
+        .anim { animation-name: bounce }
+        @keyframes bounce { from { top: 0 } to { top: 1px } }
+        @keyframes flash { from { opacity: 0 } to { opacity: 1 } }
+        """
+        self.assertEqual(front.purgar(css, {"btn", "anim"}, ("alert-",)), (
+            "/*! Lib | MIT */\n"
+            ".btn{color:red}.alert-success{color:green}a:not(.nada) .btn{margin:0}"
+            "@media (min-width: 576px){.btn{b:c}}.anim{animation-name:bounce}"
+            "@keyframes bounce{from{top:0}to{top:1px}}"
+        ))
+
+    def test_clases_armadas_en_plantillas(self):
+        # alert-{{ message.tags }} en core/_messages.html
+        tokens, prefijos = front.usadas()
+        self.assertIn("alert-", prefijos)
+        self.assertIn("navbar-brand", tokens)
+
+    def test_purgar_bootstrap(self):
+        # La hoja fijada en front/vendor/, purgada con las clases del sitio
+        datos = (front.VENDOR / "bootstrap.min.css").read_bytes()
+        self.assertTrue(front._integridad(datos, front.FUENTES["bootstrap.min.css"][1]))
+        css = front.purgar(datos.decode("utf-8"), *front.usadas())
+        self.assertLess(len(css), len(datos) / 2)
+        self.assertTrue(css.startswith('@charset "UTF-8";\n/*!\n * Bootstrap  v5.3.2'))
+        for selector in (
+            ".navbar-expand-lg .navbar-collapse{display:flex!important",
+            ".collapse:not(.show){display:none}",
+            ".collapsing{",
+            ".navbar-toggler{",
+            ".alert-success{",
+            ".alert-danger{",
+            ".alert-warning{",
+            ".alert-info{",
+        ):
+            with self.subTest(selector=selector):
+                self.assertIn(selector, css)
+        # Componentes que el sitio no usa
+        for clase in (".toast-header", ".offcanvas-header", ".placeholder-wave"):
+            self.assertNotIn(clase, css)
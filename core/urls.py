@@ -14,9 +14,11 @@ urlpatterns = [
     path("investigacion/<int:pk>/", views.investigacion_detalle, name="investigacion_detalle"),
     path("publicaciones/", views.publicaciones, name="publicaciones"),
     path("publicaciones/<int:pk>/", views.publicacion_detalle, name="publicacion_detalle"),
+    path("publicaciones/api/modal/", views.publicaciones_modal, name="publicaciones_modal"),
     path("eventos/", views.eventos, name="eventos"),
     path("eventos/<int:pk>/", views.evento_detalle, name="evento_detalle"),
     path("contacto/", views.contacto, name="contacto"),
+    path("csrf/", views.csrf, name="csrf"),
 
     # auth
     path("login/", views.login_view, name="login"),
@@ -24,6 +26,7 @@ urlpatterns = [
 
     # panel equipo
     path("panel/equipo/", views.panel_equipo, name="panel_equipo"),
+    path("panel/equipo/buscar/", views.equipo_buscar, name="equipo_buscar"),
     path("panel/equipo/add/", views.equipo_add, name="equipo_add"),
     path("panel/equipo/<int:pk>/edit/", views.equipo_edit, name="equipo_edit"),
     path("panel/equipo/<int:pk>/delete/", views.equipo_delete, name="equipo_delete"),
@@ -43,6 +46,7 @@ urlpatterns = [
     # panel publicaciones
     path("panel/publicaciones/", views.panel_publicaciones, name="panel_publicaciones"),
     path("panel/publicaciones/add/", views.publicacion_add, name="publicacion_add"),
+    path("panel/publicaciones/importar/", views.publicaciones_importar, name="publicaciones_importar"),
     path("panel/publicaciones/<int:pk>/edit/", views.publicacion_edit, name="publicacion_edit"),
     path("panel/publicaciones/<int:pk>/delete/", views.publicacion_delete, name="publicacion_delete"),
 
@@ -52,5 +56,19 @@ urlpatterns = [
     path("panel/eventos/<int:pk>/edit/", views.evento_edit, name="evento_edit"),
     path("panel/eventos/<int:pk>/delete/", views.evento_delete, name="evento_delete"),
     path("panel/eventos/<int:pk>/", views.evento_detalle, name="evento_detalle"),
+
+    # panel cola de media
+    path("panel/media/", views.panel_media, name="panel_media"),
+    path("panel/media/<int:pk>/reintentar/", views.media_reintentar, name="media_reintentar"),
+
+    # subidas reanudables por partes
+    path("panel/subidas/", views.subida_iniciar, name="subida_iniciar"),
+    path("panel/subidas/<str:token>/", views.subida_parte, name="subida_parte"),
+    path("panel/subidas/<str:token>/completar/", views.subida_completar, name="subida_completar"),
+
+    # galerias: agregar, quitar y ordenar items sin volver a subir todo
+    path("panel/galerias/<str:destino>/<int:pk>/", views.galeria, name="galeria"),
+    path("panel/galerias/<str:destino>/<int:pk>/ordenar/", views.galeria_ordenar, name="galeria_ordenar"),
+    path("panel/galerias/<str:destino>/<int:pk>/<int:item>/eliminar/", views.galeria_quitar, name="galeria_quitar"),
 ]
 
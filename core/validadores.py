@@ -0,0 +1,148 @@
+# core/validadores.py
+"""
+Validadores para GET condicional (ETag / Last-Modified).
+
+Se usan con ``condicional`` (``django.views.decorators.http.condition``): si
+el navegador o el proxy ya tienen la version vigente, la vista responde 304
+sin consultar las relaciones ni renderizar la plantilla.
+
+Cada contenido (Equipo, Noticia, Investigacion, Publicacion, Evento) tiene
+``fecha_actualizacion``. La sube ``save()``; core.signals la sube en el
+padre cuando cambia una fila hija (``PADRES``) o algo que el padre muestra
+(el nombre de un integrante, de un autor, del responsable). Con eso:
+
+- un detalle se valida con la fecha de su fila (``detalle``);
+- un listado, con ``Max(fecha_actualizacion)`` y ``Count`` de la tabla en
+  una sola consulta (``listado``). Borrar una fila no mueve el maximo pero
+  si la cantidad, que va en el ETag: los navegadores mandan If-None-Match
+  junto con If-Modified-Since y el ETag tiene prioridad.
+"""
+from functools import wraps
+
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .models import (
+    Equipo, EquipoInteres, EquipoUniversidad, Evento, EventoArchivo,
+    Investigacion, InvestigacionArchivo, InvestigacionFoto, InvestigacionIntegrante,
+    Noticia, NoticiaImagen, Profesionalidad, Publicacion, PublicacionArchivo,
+    PublicacionAutor, PublicacionImagen, PublicacionIntegrante, PublicacionVideo,
+)
+
+
+# Fila hija -> [(modelo que la muestra, atributo con su pk)]
+PADRES = {
+    NoticiaImagen: [(Noticia, "noticia_id")],
+    InvestigacionFoto: [(Investigacion, "investigacion_id")],
+    InvestigacionArchivo: [(Investigacion, "investigacion_id")],
+    # Las participaciones tambien se ven en el perfil del integrante
+    InvestigacionIntegrante: [(Investigacion, "investigacion_id"), (Equipo, "integrante_id")],
+    PublicacionImagen: [(Publicacion, "publicacion_id")],
+    PublicacionVideo: [(Publicacion, "publicacion_id")],
+    PublicacionArchivo: [(Publicacion, "publicacion_id")],
+    PublicacionAutor: [(Publicacion, "publicacion_id")],
+    PublicacionIntegrante: [(Publicacion, "publicacion_id"), (Equipo, "integrante_id")],
+    EventoArchivo: [(Evento, "evento_id")],
+    Profesionalidad: [(Equipo, "equipo_id")],
+    EquipoInteres: [(Equipo, "equipo_id")],
+    EquipoUniversidad: [(Equipo, "equipo_id")],
+}
+
+
+def tocar(modelo, **filtro):
+    """Sube ``fecha_actualizacion`` de las filas de ``modelo`` que cumplen ``filtro``."""
+    # update() no dispara señales ni vuelve a pasar por save()
+    return modelo.objects.filter(**filtro).update(fecha_actualizacion=timezone.now())
+
+
+def tocar_padres(instance):
+    """Sube la fecha de los padres de una fila hija (ver ``PADRES``)."""
+    for modelo, campo in PADRES.get(type(instance), ()):
+        pk = getattr(instance, campo)
+        if pk:
+            tocar(modelo, pk=pk)
+
+
+def _memo(request, clave, calcular):
+    # condition() llama por separado a etag_func y last_modified_func;
+    # se guarda en la request para hacer una sola consulta.
+    marcas = request.__dict__.setdefault("_marcas_validadores", {})
+    if clave not in marcas:
+        marcas[clave] = calcular()
+    return marcas[clave]
+
+
+def _usuario(request):
+    # La barra de navegacion cambia si hay sesion iniciada
+    return request.user.pk if request.user.is_authenticated else 0
+
+
+def _micro(fecha):
+    return int(fecha.timestamp() * 1_000_000) if fecha else 0
+
+
+def detalle(modelo, prefijo):
+    """``etag_func``/``last_modified_func`` para ``condition`` en el detalle de ``modelo``."""
+    def marca(request, pk):
+        return _memo(request, (prefijo, pk), lambda: (
+            modelo.objects.filter(pk=pk).values_list("fecha_actualizacion", flat=True).first()
+        ))
+
+    def last_modified(request, pk, **kwargs):
+        return marca(request, pk)
+
+    def etag(request, pk, **kwargs):
+        fecha = marca(request, pk)
+        if fecha is None:
+            return None
+        return f"{prefijo}-{pk}-{_micro(fecha)}-{_usuario(request)}"
+
+    return {"etag_func": etag, "last_modified_func": last_modified}
+
+
+def listado(modelo, prefijo):
+    """``etag_func``/``last_modified_func`` para ``condition`` en un listado de ``modelo``."""
+    def marca(request):
+        return _memo(request, prefijo, lambda: (
+            modelo.objects.order_by().aggregate(ultima=Max("fecha_actualizacion"), total=Count("id"))
+        ))
+
+    def last_modified(request, *args, **kwargs):
+        return marca(request)["ultima"]
+
+    def etag(request, *args, **kwargs):
+        datos = marca(request)
+        return f"{prefijo}-{datos['total']}-{_micro(datos['ultima'])}-{_usuario(request)}"
+
+    return {"etag_func": etag, "last_modified_func": last_modified}
+
+
+def condicional(validador):
+    """
+    ``condition`` con ``validador`` (de ``detalle``/``listado``). La respuesta
+    (200 o 304) sale con ``max-age=0, must-revalidate``: sin eso el navegador
+    podria reusarla sin preguntar, estimando la frescura por Last-Modified.
+    """
+    def decorador(vista):
+        con_validador = condition(**validador)(vista)
+
+        @wraps(vista)
+        def envuelta(request, *args, **kwargs):
+            response = con_validador(request, *args, **kwargs)
+            if not response.has_header("Cache-Control"):
+                patch_cache_control(response, max_age=0, must_revalidate=True)
+            return response
+        return envuelta
+    return decorador
+
+
+EQUIPO = listado(Equipo, "equipo")
+EQUIPO_DETALLE = detalle(Equipo, "eq")
+NOTICIAS = listado(Noticia, "noticias")
+INVESTIGACIONES = listado(Investigacion, "investigaciones")
+INVESTIGACION_DETALLE = detalle(Investigacion, "inv")
+PUBLICACIONES = listado(Publicacion, "publicaciones")
+PUBLICACION_DETALLE = detalle(Publicacion, "pub")
+EVENTOS = listado(Evento, "eventos")
@@ -1,17 +1,33 @@
+import hashlib
+import re
+
+from django.http import JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.utils.safestring import mark_safe
+from django.middleware.csrf import get_token
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_http_methods, require_POST
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login, logout
 from django.contrib import messages
-from django.db import models
+from django.db import models, transaction
 
 from .models import (
-    Equipo, Noticia, NoticiaImagen, 
-    Investigacion, InvestigacionFoto, InvestigacionArchivo, InvestigacionIntegrante,
-    Publicacion, PublicacionImagen, PublicacionVideo, PublicacionArchivo, PublicacionIntegrante, Evento, EventoArchivo,
-    Universidad, TemaInteres, Profesionalidad, EquipoUniversidad, EquipoInteres
+    Equipo, Noticia,
+    Investigacion, InvestigacionIntegrante,
+    Publicacion, PublicacionIntegrante, Evento,
+    TrabajoMedia, SubidaParcial
 )
 from .forms import EquipoForm, CustomLoginForm, NoticiaForm, InvestigacionForm, PublicacionForm
+from . import busqueda, cola, consultas, correo, entrega, galerias, importacion, nombres, paginas, perfiles, secciones, subidas, validadores
+
+# Segundos que el navegador reutiliza la API del modal sin revalidar
+PUBLICACIONES_MODAL_MAX_AGE = 300
 
+@paginas.cachear()
 def inicio(request):
     quienes_somos = (
         "Somos GIESE, un grupo de investigacion y extension de la "
@@ -20,29 +36,45 @@ def inicio(request):
     return render(request, "core/inicio.html", {"quienes_somos": quienes_somos})
 
 
+@paginas.cachear("equipo", "nivel", "temainteres", "universidad")
+@validadores.condicional(validadores.EQUIPO)
 def equipo(request):
     q = request.GET.get("q", "").strip()
     
     equipo_qs = Equipo.objects.all().order_by("nombre")
 
     if q:
-        # Simplificar la búsqueda para evitar errores con relaciones
-        equipo_qs = equipo_qs.filter(nombre__icontains=q)
+        # Un solo lookup sobre el documento desnormalizado (nombre, roles,
+        # temas de interés y universidades), sin joins ni distinct()
+        resultados = list(busqueda.buscar_equipo(equipo_qs, q))
+
+        # Completar con nombres parecidos (tildes, errores de tipeo)
+        vistos = {p.pk for p in resultados}
+        similares = [pk for pk in nombres.buscar_ids("equipo", q) if pk not in vistos]
+        if similares:
+            resultados += nombres.ordenar_por_ids(equipo_qs, similares)
+        equipo_qs = resultados
 
     return render(request, "core/equipo.html", {"equipo_completo": equipo_qs})
 
 
+@paginas.cachear("equipo:{pk}", "nivel", "temainteres", "universidad", "investigacion", "publicacion")
+@validadores.condicional(validadores.EQUIPO_DETALLE)
 def equipo_detalle(request, pk):
-    persona = get_object_or_404(Equipo, pk=pk)
+    # Perfil armado en pocas consultas y cacheado por integrante (core.perfiles)
+    perfil = perfiles.perfil_renderizado(request, pk)
     context = {
-        'persona': persona
+        'persona': perfil,
+        'perfil_html': mark_safe(perfil["html"]),
     }
     return render(request, "core/equipo_detalle.html", context)
 
 
+@paginas.cachear("noticia", "usuario")
+@validadores.condicional(validadores.NOTICIAS)
 def noticias(request):
     # Usamos prefetch_related para optimizar la consulta de imágenes
-    noticias_list = Noticia.objects.order_by("-fecha").prefetch_related('imagenes')
+    noticias_list = Noticia.objects.order_by("-fecha").select_related('user').prefetch_related('imagenes')
     
     # Para cada noticia, creamos una lista unificada de imágenes
     for noticia in noticias_list:
@@ -51,10 +83,9 @@ def noticias(request):
         
         # 1. Añadir la imagen principal si existe
         if noticia.imagen:
-            # Creamos un objeto simple que tenga un atributo 'imagen'
-            # para que la plantilla lo pueda usar igual que a las imágenes adicionales.
-            main_image_wrapper = type('obj', (object,), {'imagen': noticia.imagen})
-            unified_images.append(main_image_wrapper)
+            # La noticia misma tiene 'imagen' (y sus derivadas), asi que la
+            # plantilla la usa igual que a las imágenes adicionales.
+            unified_images.append(noticia)
             
         # 2. Añadir las imágenes adicionales
         # noticia.imagenes.all() ya devuelve objetos NoticiaImagen que tienen el atributo 'imagen'
@@ -66,77 +97,129 @@ def noticias(request):
     return render(request, "core/noticias.html", {"noticias": noticias_list})
 
 
+@paginas.cachear("investigacion", "equipo", "usuario")
+@validadores.condicional(validadores.INVESTIGACIONES)
 def investigacion(request):
-    investigaciones = Investigacion.objects.order_by("-fecha")
+    investigaciones = consultas.investigaciones_listado()
     return render(request, "core/investigacion.html", {"investigaciones": investigaciones})
 
 
+@paginas.cachear("investigacion:{pk}", "equipo", "usuario")
+@validadores.condicional(validadores.INVESTIGACION_DETALLE)
 def investigacion_detalle(request, pk):
-    investigacion = get_object_or_404(Investigacion, pk=pk)
+    investigacion = get_object_or_404(consultas.investigacion_detalle(), pk=pk)
     context = {
         'investigacion': investigacion
     }
     return render(request, "core/investigacion_detalle.html", context)
 
 
+@paginas.cachear("publicacion", "equipo", "autor")
+@validadores.condicional(validadores.PUBLICACIONES)
 def publicaciones(request):
-    publicaciones = Publicacion.objects.order_by("-fecha")
-    return render(request, "core/publicaciones.html", {"publicaciones": publicaciones})
+    publicaciones_qs = consultas.publicaciones_listado()
+
+    # Filtro por año resuelto en el servidor (la pagina solo trae una porcion)
+    anio = request.GET.get("anio", "").strip()
+    if anio.isdigit():
+        publicaciones_qs = publicaciones_qs.filter(fecha__year=int(anio))
+    else:
+        anio = ""
 
+    # Busqueda de texto completo (indice GIN en Postgres / FTS5 en SQLite)
+    q = request.GET.get("q", "").strip()
+    if q:
+        publicaciones_qs = busqueda.buscar_publicaciones(publicaciones_qs, q)
+
+    page_obj = consultas.paginar(publicaciones_qs, request.GET.get("page"))
+
+    if request.GET.get("format") == "json":
+        return JsonResponse({
+            "q": q,
+            "anio": anio,
+            "page": page_obj.number,
+            "num_pages": page_obj.paginator.num_pages,
+            "count": page_obj.paginator.count,
+            "results": [
+                {
+                    "id": p.pk,
+                    "titulo": p.titulo,
+                    "autores": p.autores,
+                    "fecha": p.fecha.isoformat() if p.fecha else None,
+                    "url": reverse("core:publicacion_detalle", args=[p.pk]),
+                    "imagen": p.primera_imagen[0].imagen.url if p.primera_imagen and p.primera_imagen[0].imagen else "",
+                    "integrantes": [i.integrante.nombre for i in p.integrantes_preview],
+                }
+                for p in page_obj.object_list
+            ],
+        })
 
+    context = {
+        "publicaciones": page_obj.object_list,
+        "page_obj": page_obj,
+        "q": q,
+        "anio": anio,
+    }
+    # Solo el fragmento de resultados (lo pide el buscador via fetch)
+    if request.GET.get("partial"):
+        return render(request, "core/_publicaciones_resultados.html", context)
+
+    context["years"] = consultas.publicaciones_anios()
+    return render(request, "core/publicaciones.html", context)
+
+
+@paginas.cachear("publicacion:{pk}", "equipo", "autor")
+@validadores.condicional(validadores.PUBLICACION_DETALLE)
 def publicacion_detalle(request, pk):
-    publicacion = get_object_or_404(Publicacion, pk=pk)
-    
     # Si es una petición JSON (para el modal)
     if request.GET.get('format') == 'json' or request.path.endswith('/json/'):
-        from django.http import JsonResponse
-        integrantes_data = []
-        for integ in publicacion.publicacionintegrante_set.all():
-            integrantes_data.append({
-                'nombre': integ.integrante.nombre,
-                'rol': integ.rol,
-                'id': integ.integrante.pk
-            })
-        
-        imagen_url = ''
-        if publicacion.imagenes.all():
-            primera_imagen = publicacion.imagenes.first()
-            if primera_imagen and primera_imagen.imagen:
-                imagen_url = primera_imagen.imagen.url
-        
-        return JsonResponse({
-            'id': publicacion.pk,
-            'titulo': publicacion.titulo,
-            'autores': publicacion.autores,
-            'resumen': publicacion.resumen,
-            'fecha': publicacion.fecha.strftime('%d %b %Y') if publicacion.fecha else 'Sin fecha',
-            'imagen': imagen_url,
-            'archivos': publicacion.archivos.count(),
-            'videos': publicacion.videos.count(),
-            'integrantes': integrantes_data
-        })
-    
+        publicacion = get_object_or_404(consultas.publicaciones_modal([pk]))
+        return JsonResponse(consultas.publicacion_modal_json(publicacion))
+
+    publicacion = get_object_or_404(consultas.publicacion_detalle(), pk=pk)
     return render(request, "core/publicacion_detalle.html", {"publicacion": publicacion})
 
 
+@paginas.cachear("publicacion", "equipo", "autor")
+def publicaciones_modal(request):
+    """
+    API del modal: ``?ids=3,5,8`` devuelve esas publicaciones en una sola
+    llamada, en el orden pedido (los ids inexistentes se omiten).
+    Responde con ETag para que el navegador revalide con un 304.
+    """
+    ids = []
+    for parte in (request.GET.get('ids') or '').split(','):
+        parte = parte.strip()
+        if parte.isdigit() and int(parte) not in ids:
+            ids.append(int(parte))
+    if not ids:
+        return JsonResponse({'error': 'Indicá al menos un id en ?ids='}, status=400)
+    if len(ids) > consultas.PUBLICACIONES_POR_LOTE:
+        return JsonResponse(
+            {'error': f'Máximo {consultas.PUBLICACIONES_POR_LOTE} publicaciones por llamada'},
+            status=400,
+        )
+
+    encontradas = consultas.publicaciones_modal(ids).in_bulk()
+    resultados = [consultas.publicacion_modal_json(encontradas[pk]) for pk in ids if pk in encontradas]
+    response = JsonResponse({'results': resultados})
+
+    # El ETag sale del propio cuerpo: cualquier cambio visible lo invalida
+    etag = quote_etag(hashlib.md5(response.content, usedforsecurity=False).hexdigest())
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=PUBLICACIONES_MODAL_MAX_AGE)
+    return get_conditional_response(request, etag=etag, response=response)
+
+
+@paginas.cachear("evento")
+@validadores.condicional(validadores.EVENTOS)
 def eventos(request):
-    eventos = Evento.objects.order_by("-fecha").prefetch_related("archivos")
-    # compute cover image from first image-like related file
-    for e in eventos:
-        cover = None
-        for a in e.archivos.all():
-            try:
-                url = a.archivo.url
-            except Exception:
-                url = ""
-            lower = (url or "").lower()
-            if lower.endswith((".jpg", ".jpeg", ".png", ".webp", ".gif")):
-                cover = url
-                break
-        e.cover_url = cover
+    # Portada y descargas ya vienen resueltas en la fila (core.portadas)
+    eventos = Evento.objects.order_by("-fecha")
     return render(request, "core/eventos.html", {"eventos": eventos})
 
 
+@paginas.cachear()
 def contacto(request):
     if request.method == "POST":
         nombre = (request.POST.get("nombre") or "").strip()
@@ -147,28 +230,33 @@ def contacto(request):
             messages.error(request, "CompletÃ¡ todos los campos.")
             return render(request, "core/contacto.html", {"form_data": request.POST})
 
-        from django.core.mail import send_mail
-        from django.conf import settings
-
-        subject = f"Nuevo mensaje de contacto - {nombre}"
-        body = (
-            f"Nombre: {nombre}\n"
-            f"Email: {email}\n\n"
-            f"Mensaje:\n{mensaje}"
+        # Se guarda en la bandeja de salida y lo manda el worker (core.correo):
+        # la respuesta no espera al servidor SMTP y el mensaje no se pierde si falla
+        correo.encolar(
+            asunto=f"Nuevo mensaje de contacto - {nombre}",
+            cuerpo=(
+                f"Nombre: {nombre}\n"
+                f"Email: {email}\n\n"
+                f"Mensaje:\n{mensaje}"
+            ),
+            destinatarios=["gieseunmdp@gmail.com"],
+            responder_a=email,
         )
-        recipient = ["gieseunmdp@gmail.com"]
-        sender = getattr(settings, "DEFAULT_FROM_EMAIL", email or "no-reply@example.com")
-        try:
-            send_mail(subject, body, sender, recipient, fail_silently=False)
-            messages.success(request, "Tu mensaje fue enviado. Â¡Gracias por contactarnos!")
-            return redirect("core:contacto")
-        except Exception as e:
-            messages.error(request, f"No se pudo enviar el mensaje: {e}")
-            return render(request, "core/contacto.html", {"form_data": request.POST})
+        messages.success(request, "Tu mensaje fue enviado. ¡Gracias por contactarnos!")
+        return redirect("core:contacto")
 
     return render(request, "core/contacto.html")
 
 
+@never_cache
+def csrf(request):
+    """
+    Token CSRF para los formularios de las paginas publicas, que se sirven
+    sin cookies (ver core.paginas): el formulario lo pide al usarse.
+    """
+    return JsonResponse({"token": get_token(request)})
+
+
 # ------------------ AutenticaciÃ³n ------------------
 
 def _redirect_after_login(request, fallback="core:panel_equipo"):
@@ -204,14 +292,200 @@ def logout_view(request):
     return redirect("core:login")
 
 
+# ------------------ Media en disco ------------------
+
+@require_http_methods(["GET", "HEAD"])
+def servir_media(request, ruta):
+    return entrega.servir(request, ruta)
+
+
+# ------------------ Panel: cola de media ------------------
+
+def _avisar_encolados(request, cantidad):
+    if cantidad:
+        messages.info(
+            request,
+            mark_safe(
+                f"{cantidad} archivo(s) se están procesando en segundo plano. "
+                f'<a href="{reverse("core:panel_media")}">Ver progreso</a>.'
+            ),
+        )
+
+
+@login_required
+def panel_media(request):
+    conteos = cola.resumen()
+    return render(request, "core/panel_media.html", {
+        "trabajos": cola.recientes(),
+        "conteos": conteos,
+        "en_curso": conteos[TrabajoMedia.PENDIENTE] + conteos[TrabajoMedia.PROCESANDO],
+        "correos": correo.resumen(),
+    })
+
+
+@login_required
+def media_reintentar(request, pk):
+    if request.method == "POST":
+        if cola.reintentar(pk):
+            messages.success(request, "El archivo volvió a la cola.")
+        else:
+            messages.error(request, "Ese archivo no se puede reintentar.")
+    return redirect("core:panel_media")
+
+
+# ------------------ Panel: subidas reanudables por partes ------------------
+
+def _error_json(e):
+    return JsonResponse({'error': str(e)}, status=e.status)
+
+
+@login_required
+@require_POST
+def subida_iniciar(request):
+    """
+    Abre una subida: ``destino``, ``objeto_id``, ``nombre``, ``tamano`` y
+    opcionalmente ``sha256`` (del archivo entero) y ``reemplazar``.
+    """
+    try:
+        subida = subidas.iniciar(
+            request.user,
+            request.POST.get('destino'),
+            request.POST.get('objeto_id'),
+            request.POST.get('nombre'),
+            request.POST.get('tamano'),
+            request.POST.get('sha256', ''),
+            request.POST.get('reemplazar') == '1',
+        )
+    except subidas.SubidaError as e:
+        return _error_json(e)
+    return JsonResponse(subidas.estado_json(subida), status=201)
+
+
+_CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+@login_required
+@require_http_methods(["GET", "PUT"])
+def subida_parte(request, token):
+    """
+    GET: estado de la subida (para retomar). PUT: una parte en el cuerpo, con
+    ``Content-Range: bytes inicio-fin/total`` y opcionalmente
+    ``X-Parte-SHA256``. El cuerpo se lee por bloques, nunca entero.
+    """
+    subida = get_object_or_404(SubidaParcial, token=token, user=request.user)
+    if request.method == "PUT":
+        rango = _CONTENT_RANGE.match(request.headers.get('Content-Range', ''))
+        if not rango or int(rango.group(3)) != subida.tamano:
+            return JsonResponse({'error': 'Falta un Content-Range válido.'}, status=400)
+        inicio, fin = int(rango.group(1)), int(rango.group(2))
+        try:
+            subidas.recibir_parte(
+                subida, inicio, fin - inicio + 1, request, request.headers.get('X-Parte-SHA256'),
+            )
+        except subidas.SubidaError as e:
+            # Con el estado actual el cliente sabe desde donde retomar
+            return JsonResponse({'error': str(e), **subidas.estado_json(subida)}, status=e.status)
+    return JsonResponse(subidas.estado_json(subida))
+
+
+@login_required
+@require_POST
+def subida_completar(request, token):
+    subida = get_object_or_404(SubidaParcial, token=token, user=request.user)
+    try:
+        subidas.completar(subida)
+    except subidas.SubidaError as e:
+        return _error_json(e)
+    return JsonResponse(subidas.estado_json(subida))
+
+
+# ------------------ Panel: edicion por item de galerias ------------------
+
+def _galeria(clave, pk):
+    return get_object_or_404(galerias.destino(clave).padre, pk=pk)
+
+
+def _ids(request):
+    try:
+        return [int(v) for v in request.POST.getlist('ids') if v]
+    except ValueError:
+        raise galerias.GaleriaError("Lista de ids inválida.")
+
+
+def _respuesta_galeria(clave, objeto, status=200, **extra):
+    return JsonResponse({'items': galerias.listar(clave, objeto), **extra}, status=status)
+
+
+@login_required
+@require_http_methods(["GET", "POST"])
+def galeria(request, destino, pk):
+    """
+    GET: items de la galeria en orden. POST: agrega al final los archivos de
+    ``archivos`` (con ``nombre`` paralelo si el destino lo usa); van a la cola.
+    """
+    try:
+        objeto = _galeria(destino, pk)
+        if request.method == "POST":
+            encolados = galerias.agregar(
+                destino, objeto, request.FILES.getlist('archivos'),
+                request.POST.getlist('nombre'), user=request.user,
+            )
+            return _respuesta_galeria(destino, objeto, status=202, encolados=encolados)
+    except galerias.GaleriaError as e:
+        return _error_json(e)
+    return _respuesta_galeria(destino, objeto)
+
+
+@login_required
+@require_POST
+def galeria_ordenar(request, destino, pk):
+    """Recibe ``ids`` en el orden nuevo; solo se actualizan las filas que cambian."""
+    try:
+        objeto = _galeria(destino, pk)
+        cambiados = galerias.reordenar(destino, objeto, _ids(request))
+    except galerias.GaleriaError as e:
+        return _error_json(e)
+    return _respuesta_galeria(destino, objeto, cambiados=cambiados)
+
+
+@login_required
+@require_POST
+def galeria_quitar(request, destino, pk, item):
+    try:
+        objeto = _galeria(destino, pk)
+        if not galerias.quitar(destino, objeto, [item]):
+            return JsonResponse({'error': 'Ese item no está en la galería.'}, status=404)
+    except galerias.GaleriaError as e:
+        return _error_json(e)
+    return _respuesta_galeria(destino, objeto)
+
+
 # ------------------ Panel / CRUD: Equipo ------------------
 
 @login_required
 def panel_equipo(request):
-    equipo_qs = Equipo.objects.order_by("nombre")
+    equipo_qs = Equipo.objects.order_by("nombre").select_related("nivel")
     return render(request, "core/panel_equipo_list.html", {"equipo": equipo_qs})
 
 
+@login_required
+def equipo_buscar(request):
+    """
+    JSON para los selectores de integrantes del panel: nombres parecidos a
+    ``q`` (sin importar tildes ni pequeños errores), de mayor a menor similitud.
+    """
+    q = request.GET.get("q", "").strip()
+    resultados = nombres.buscar("equipo", q, limite=20)
+    por_id = Equipo.objects.only("id", "nombre").in_bulk([pk for pk, _ in resultados])
+    return JsonResponse({
+        "q": q,
+        "results": [
+            {"id": pk, "nombre": por_id[pk].nombre, "similitud": round(sim, 3)}
+            for pk, sim in resultados if pk in por_id
+        ],
+    })
+
+
 @login_required
 def equipo_add(request):
     # Si el mÃ©todo es POST, procesamos el formulario. Si es GET, creamos uno vacÃ­o.
@@ -219,88 +493,21 @@ def equipo_add(request):
         form = EquipoForm(request.POST, request.FILES)
         if form.is_valid():
             try:
-                obj = form.save()
+                with transaction.atomic():
+                    obj = form.save()
 
-                # --- LÃ³gica para guardar campos dinÃ¡micos ---
-
-                # 1. Guardar Profesionalidades (Roles)
-                titulos = request.POST.getlist('profesionalidad_titulo')
-                descripciones_prof = request.POST.getlist('profesionalidad_descripcion')
-                
-                Profesionalidad.objects.filter(equipo=obj).delete() # Limpiar roles antiguos
-                for i, titulo in enumerate(titulos):
-                    if titulo:
-                        Profesionalidad.objects.create(
-                            equipo=obj,
-                            titulo=titulo,
-                            descripcion=descripciones_prof[i],
-                            orden=i + 1
-                        )
-
-                # 2. Guardar Universidades
-                universidad_nombres = request.POST.getlist('universidad_nombre')
-                descripciones_uni = request.POST.getlist('universidad_descripcion')
-
-                EquipoUniversidad.objects.filter(equipo=obj).delete() # Limpiar universidades antiguas
-                for i, nombre_uni in enumerate(universidad_nombres):
-                    if nombre_uni:
-                        # Busca o crea la universidad y obtÃ©n el objeto
-                        universidad_obj, created = Universidad.objects.get_or_create(
-                            descripcion_universidad=nombre_uni.strip()
-                        )
-                        EquipoUniversidad.objects.create(
-                            equipo=obj,
-                            universidad=universidad_obj,
-                            descripcion=descripciones_uni[i],
-                            orden=i + 1
-                        )
+                    # Roles, universidades e intereses: solo los cambios, en bloque
+                    secciones.guardar_secciones(obj, secciones.leer_secciones(request.POST))
 
-                # 3. Guardar Temas de InterÃ©s
-                interes_nombres = request.POST.getlist('interes_nombre')
-                descripciones_interes = request.POST.getlist('interes_descripcion')
+                    if not obj.user_id:
+                        obj.user = request.user
 
-                EquipoInteres.objects.filter(equipo=obj).delete() # Limpiar intereses antiguos
-                for i, nombre_interes in enumerate(interes_nombres):
-                    if nombre_interes:
-                        # Busca o crea el tema de interÃ©s y obtÃ©n el objeto
-                        interes_obj, created = TemaInteres.objects.get_or_create(
-                            descripcion_interes=nombre_interes.strip()
-                        )
-                        EquipoInteres.objects.create(
-                            equipo=obj,
-                            tema_interes=interes_obj,
-                            descripcion=descripciones_interes[i],
-                            orden=i + 1
-                        )
-
-                if not obj.user_id:
-                    obj.user = request.user
-                
-                # Manejar la foto si subieron un archivo (usar default_storage para soportar Cloudinary o FS)
-                foto_archivo = form.cleaned_data.get('foto_archivo')
-                if foto_archivo:
-                    import uuid
-                    from django.conf import settings
-                    from django.core.files.storage import default_storage
-                    from django.core.files.base import ContentFile
-
-                    ext = (foto_archivo.name.split('.')[-1] or '').lower()
-                    filename = f"{obj.pk}_{obj.nombre.replace(' ', '_')}_{uuid.uuid4().hex[:8]}.{ext}"
-                    storage_path = f"equipo_fotos/{filename}"
-
-                    # Guardar usando el storage por defecto
-                    default_storage.save(storage_path, ContentFile(foto_archivo.read()))
-
-                    # Si hay CLOUDINARY_URL, usar URL absoluta; si no, guardar ruta relativa
-                    if getattr(settings, 'CLOUDINARY_URL', None):
-                        try:
-                            obj.foto = default_storage.url(storage_path)
-                        except Exception:
-                            obj.foto = storage_path
-                    else:
-                        obj.foto = storage_path
-                # Guardar cambios en el objeto (user/foto u otros campos)
-                obj.save()
+                    # Manejar la foto si subieron un archivo (usar default_storage para soportar Cloudinary o FS)
+                    foto_archivo = form.cleaned_data.get('foto_archivo')
+                    if foto_archivo:
+                        subidas.guardar_foto_equipo(obj, foto_archivo)
+                    # Guardar cambios en el objeto (user/foto u otros campos)
+                    obj.save()
                 
                 messages.success(request, f"âœ… Integrante {obj.nombre} agregado correctamente al equipo.")
                 return redirect("core:panel_equipo")
@@ -343,93 +550,30 @@ def equipo_edit(request, pk):
         form = EquipoForm(request.POST, request.FILES, instance=persona)
         if form.is_valid(): # Si el formulario es válido, se guarda
             try:
-                # Preservar foto si no se sube nueva ni se provee URL
-                old_foto = persona.foto
-                obj = form.save(commit=False)
-
-                # --- LÃ³gica para guardar campos dinÃ¡micos ---
-
-                # 1. Guardar Profesionalidades (Roles)
-                titulos = request.POST.getlist('profesionalidad_titulo')
-                descripciones_prof = request.POST.getlist('profesionalidad_descripcion')
-                
-                Profesionalidad.objects.filter(equipo=obj).delete() # Limpiar roles antiguos
-                for i, titulo in enumerate(titulos):
-                    if titulo:
-                        Profesionalidad.objects.create(
-                            equipo=obj,
-                            titulo=titulo,
-                            descripcion=descripciones_prof[i],
-                            orden=i + 1
-                        )
-
-                # 2. Guardar Universidades
-                universidad_nombres = request.POST.getlist('universidad_nombre')
-                descripciones_uni = request.POST.getlist('universidad_descripcion')
-
-                EquipoUniversidad.objects.filter(equipo=obj).delete() # Limpiar universidades antiguas
-                for i, nombre_uni in enumerate(universidad_nombres):
-                    if nombre_uni:
-                        universidad_obj, created = Universidad.objects.get_or_create(
-                            descripcion_universidad=nombre_uni.strip()
-                        )
-                        EquipoUniversidad.objects.create(
-                            equipo=obj,
-                            universidad=universidad_obj,
-                            descripcion=descripciones_uni[i],
-                            orden=i + 1
-                        )
-
-                # 3. Guardar Temas de InterÃ©s
-                interes_nombres = request.POST.getlist('interes_nombre')
-                descripciones_interes = request.POST.getlist('interes_descripcion')
-
-                EquipoInteres.objects.filter(equipo=obj).delete() # Limpiar intereses antiguos
-                for i, nombre_interes in enumerate(interes_nombres):
-                    if nombre_interes:
-                        interes_obj, created = TemaInteres.objects.get_or_create(
-                            descripcion_interes=nombre_interes.strip()
-                        )
-                        EquipoInteres.objects.create(
-                            equipo=obj,
-                            tema_interes=interes_obj,
-                            descripcion=descripciones_interes[i],
-                            orden=i + 1
-                        )
-
-                if not obj.user_id:
-                    obj.user = request.user
-                    obj.save(update_fields=["user"])
-                
-                # Manejar la foto si subieron un archivo nuevo (usar default_storage)
-                foto_archivo = form.cleaned_data.get('foto_archivo')
-                if foto_archivo:
-                    import uuid
-                    from django.conf import settings
-                    from django.core.files.storage import default_storage
-                    from django.core.files.base import ContentFile
-
-                    ext = (foto_archivo.name.split('.')[-1] or '').lower()
-                    filename = f"{obj.pk}_{obj.nombre.replace(' ', '_')}_{uuid.uuid4().hex[:8]}.{ext}"
-                    storage_path = f"equipo_fotos/{filename}"
-
-                    default_storage.save(storage_path, ContentFile(foto_archivo.read()))
-
-                    if getattr(settings, 'CLOUDINARY_URL', None):
-                        try:
-                            obj.foto = default_storage.url(storage_path)
-                        except Exception:
-                            obj.foto = storage_path
+                with transaction.atomic():
+                    # Preservar foto si no se sube nueva ni se provee URL
+                    old_foto = persona.foto
+                    obj = form.save(commit=False)
+
+                    # Roles, universidades e intereses: solo los cambios, en bloque
+                    secciones.guardar_secciones(obj, secciones.leer_secciones(request.POST))
+
+                    if not obj.user_id:
+                        obj.user = request.user
+                        obj.save(update_fields=["user"])
+
+                    # Manejar la foto si subieron un archivo nuevo (usar default_storage)
+                    foto_archivo = form.cleaned_data.get('foto_archivo')
+                    if foto_archivo:
+                        subidas.guardar_foto_equipo(obj, foto_archivo)
                     else:
-                        obj.foto = storage_path
-                else:
-                    # Si no subieron archivo y el campo URL quedó vacío, preservar la foto anterior
-                    nueva_url = (form.cleaned_data.get('foto') or '').strip()
-                    if not nueva_url:
-                        obj.foto = old_foto
-
-                # Guardar cambios del objeto (incluye otros campos editados)
-                obj.save()
+                        # Si no subieron archivo y el campo URL quedó vacío, preservar la foto anterior
+                        nueva_url = (form.cleaned_data.get('foto') or '').strip()
+                        if not nueva_url:
+                            obj.foto = old_foto
+
+                    # Guardar cambios del objeto (incluye otros campos editados)
+                    obj.save()
                 
                 messages.success(request, f"✅ Información de {obj.nombre} actualizada correctamente.")
                 return redirect("core:panel_equipo")
@@ -451,11 +595,11 @@ def equipo_edit(request, pk):
         prof_list = [(p.titulo, (p.descripcion or "")) for p in persona.profesionalidades.order_by('orden', 'id')]
         uni_list = [
             (eu.universidad.descripcion_universidad, (eu.descripcion or ""))
-            for eu in persona.equipo_universidades.order_by('orden', 'id')
+            for eu in persona.equipo_universidades.select_related('universidad').order_by('orden', 'id')
         ]
         interes_list = [
             (ei.tema_interes.descripcion_interes, (ei.descripcion or ""))
-            for ei in persona.equipo_intereses.order_by('orden', 'id')
+            for ei in persona.equipo_intereses.select_related('tema_interes').order_by('orden', 'id')
         ]
         dynamic_data = {
             'profesionalidades': prof_list or [("", "")],
@@ -487,7 +631,7 @@ def equipo_delete(request, pk):
 
 @login_required
 def panel_noticias(request):
-    noticias = Noticia.objects.order_by("-fecha")
+    noticias = Noticia.objects.order_by("-fecha").select_related("user").prefetch_related("imagenes")
     return render(request, "core/panel_noticias.html", {"noticias": noticias})
 
 
@@ -503,17 +647,12 @@ def noticia_add(request):
                 obj.save()
                 
                 # Guardar imÃ¡genes adicionales (archivos subidos)
-                imagenes_files = request.FILES.getlist('imagenes_adicionales')
-                NoticiaImagen.objects.filter(noticia=obj).delete()  # Limpiar imÃ¡genes antiguas
-                for i, img_file in enumerate(imagenes_files):
-                    if img_file:
-                        NoticiaImagen.objects.create(
-                            noticia=obj,
-                            imagen=img_file,
-                            orden=i + 1
-                        )
+                encolados = cola.encolar(
+                    "noticia_imagen", obj, request.FILES.getlist('imagenes_adicionales'), user=request.user,
+                )
                 
                 messages.success(request, "Noticia agregada correctamente.")
+                _avisar_encolados(request, encolados)
                 return redirect("core:panel_noticias")
             except Exception as e:
                 messages.error(request, f"Error al agregar la noticia: {str(e)}")
@@ -540,18 +679,13 @@ def noticia_edit(request, pk):
                 
                 # Guardar imÃ¡genes adicionales (archivos subidos)
                 imagenes_files = request.FILES.getlist('imagenes_adicionales')
+                encolados = 0
                 if imagenes_files:
-                    # Solo limpiar si se subieron nuevas imÃ¡genes
-                    NoticiaImagen.objects.filter(noticia=obj).delete()
-                    for i, img_file in enumerate(imagenes_files):
-                        if img_file:
-                            NoticiaImagen.objects.create(
-                                noticia=obj,
-                                imagen=img_file,
-                                orden=i + 1
-                            )
+                    # Se agregan al final; quitar y ordenar se hace por item (core.galerias)
+                    encolados = galerias.agregar("noticia_imagen", obj, imagenes_files, user=request.user)
                 
                 messages.success(request, "Noticia actualizada correctamente.")
+                _avisar_encolados(request, encolados)
                 return redirect("core:panel_noticias")
             except Exception as e:
                 messages.error(request, f"Error al actualizar la noticia: {str(e)}")
@@ -579,7 +713,7 @@ def noticia_delete(request, pk):
 
 @login_required
 def panel_investigacion(request):
-    investigaciones = Investigacion.objects.order_by("-fecha")
+    investigaciones = Investigacion.objects.order_by("-fecha").annotate(total_archivos=models.Count("archivos"))
     return render(request, "core/panel_investigacion.html", {"investigaciones": investigaciones})
 
 
@@ -594,28 +728,14 @@ def investigacion_add(request):
                     obj.user = request.user
                 obj.save()
                 
-                # Guardar fotos
-                fotos_files = request.FILES.getlist('fotos')
-                for i, foto_file in enumerate(fotos_files):
-                    if foto_file:
-                        InvestigacionFoto.objects.create(
-                            investigacion=obj,
-                            foto=foto_file,
-                            orden=i + 1
-                        )
-                
-                # Guardar archivos (PDFs, etc.)
-                archivos_files = request.FILES.getlist('archivos')
-                archivos_nombres = request.POST.getlist('archivo_nombre')
-                for i, archivo_file in enumerate(archivos_files):
-                    if archivo_file:
-                        nombre = archivos_nombres[i] if i < len(archivos_nombres) else archivo_file.name
-                        InvestigacionArchivo.objects.create(
-                            investigacion=obj,
-                            archivo=archivo_file,
-                            nombre=nombre,
-                            orden=i + 1
-                        )
+                # Fotos y archivos (PDFs, etc.) van a la cola de media
+                encolados = cola.encolar(
+                    "investigacion_foto", obj, request.FILES.getlist('fotos'), user=request.user,
+                )
+                encolados += cola.encolar(
+                    "investigacion_archivo", obj, request.FILES.getlist('archivos'),
+                    request.POST.getlist('archivo_nombre'), user=request.user,
+                )
                 
                 # Guardar integrantes
                 integrantes_ids = request.POST.getlist('integrante_id')
@@ -631,6 +751,7 @@ def investigacion_add(request):
                         )
                 
                 messages.success(request, "Investigación agregada correctamente.")
+                _avisar_encolados(request, encolados)
                 return redirect("core:panel_investigacion")
             except Exception as e:
                 messages.error(request, f"Error al agregar la investigación: {str(e)}")
@@ -649,7 +770,9 @@ def investigacion_add(request):
 
 @login_required
 def investigacion_edit(request, pk):
-    investigacion = get_object_or_404(Investigacion, pk=pk)
+    # En GET se precargan fotos/archivos/integrantes que muestra el formulario
+    queryset = consultas.investigacion_detalle() if request.method == "GET" else Investigacion.objects
+    investigacion = get_object_or_404(queryset, pk=pk)
     if request.method == "POST":
         form = InvestigacionForm(request.POST, request.FILES, instance=investigacion)
         if form.is_valid():
@@ -659,32 +782,19 @@ def investigacion_edit(request, pk):
                     obj.user = request.user
                 obj.save()
                 
-                # Guardar fotos nuevas
+                # Fotos nuevas: se agregan al final de las actuales y van a la cola
+                encolados = 0
                 fotos_files = request.FILES.getlist('fotos')
                 if fotos_files:
-                    InvestigacionFoto.objects.filter(investigacion=obj).delete()
-                    for i, foto_file in enumerate(fotos_files):
-                        if foto_file:
-                            InvestigacionFoto.objects.create(
-                                investigacion=obj,
-                                foto=foto_file,
-                                orden=i + 1
-                            )
+                    encolados += galerias.agregar("investigacion_foto", obj, fotos_files, user=request.user)
                 
-                # Guardar archivos nuevos
+                # Archivos nuevos
                 archivos_files = request.FILES.getlist('archivos')
-                archivos_nombres = request.POST.getlist('archivo_nombre')
                 if archivos_files:
-                    InvestigacionArchivo.objects.filter(investigacion=obj).delete()
-                    for i, archivo_file in enumerate(archivos_files):
-                        if archivo_file:
-                            nombre = archivos_nombres[i] if i < len(archivos_nombres) else archivo_file.name
-                            InvestigacionArchivo.objects.create(
-                                investigacion=obj,
-                                archivo=archivo_file,
-                                nombre=nombre,
-                                orden=i + 1
-                            )
+                    encolados += galerias.agregar(
+                        "investigacion_archivo", obj, archivos_files,
+                        request.POST.getlist('archivo_nombre'), user=request.user,
+                    )
                 
                 # Actualizar integrantes
                 integrantes_ids = request.POST.getlist('integrante_id')
@@ -701,6 +811,7 @@ def investigacion_edit(request, pk):
                         )
                 
                 messages.success(request, "Investigación actualizada correctamente.")
+                _avisar_encolados(request, encolados)
                 return redirect("core:panel_investigacion")
             except Exception as e:
                 messages.error(request, f"Error al actualizar la investigación: {str(e)}")
@@ -732,10 +843,36 @@ def investigacion_delete(request, pk):
 
 @login_required
 def panel_publicaciones(request):
-    publicaciones = Publicacion.objects.order_by("-fecha")
+    publicaciones = consultas.publicaciones_panel()
     return render(request, "core/panel_publicaciones.html", {"publicaciones": publicaciones})
 
 
+@login_required
+def publicaciones_importar(request):
+    """Carga masiva desde un .bib o .csv (core.importacion)."""
+    resultado = None
+    if request.method == "POST":
+        archivo = request.FILES.get("archivo")
+        if not archivo:
+            messages.error(request, "Elegí un archivo .bib o .csv.")
+        else:
+            try:
+                resultado = importacion.importar(
+                    importacion.entradas(archivo.file, archivo.name),
+                    user=request.user,
+                    simular=bool(request.POST.get("simular")),
+                )
+            except importacion.ImportacionError as e:
+                messages.error(request, str(e))
+            else:
+                if resultado.creadas and not request.POST.get("simular"):
+                    messages.success(request, f"Se importaron {resultado.creadas} publicaciones.")
+    return render(request, "core/publicaciones_importar.html", {
+        "resultado": resultado,
+        "simulado": bool(request.POST.get("simular")),
+    })
+
+
 @login_required
 def publicacion_add(request):
     if request.method == "POST":
@@ -747,38 +884,17 @@ def publicacion_add(request):
                     publicacion.user = request.user
                 publicacion.save()
 
-                # Guardar imágenes
-                imagenes_files = request.FILES.getlist('imagenes')
-                for i, img in enumerate(imagenes_files):
-                    if img:
-                        PublicacionImagen.objects.create(
-                            publicacion=publicacion,
-                            imagen=img,
-                            orden=i + 1
-                        )
-
-                # Guardar videos
-                videos_files = request.FILES.getlist('videos')
-                for i, vid in enumerate(videos_files):
-                    if vid:
-                        PublicacionVideo.objects.create(
-                            publicacion=publicacion,
-                            video=vid,
-                            orden=i + 1
-                        )
-
-                # Guardar archivos descargables
-                archivos_files = request.FILES.getlist('archivos')
-                archivos_nombres = request.POST.getlist('archivo_nombre')
-                for i, f in enumerate(archivos_files):
-                    if f:
-                        nombre = archivos_nombres[i] if i < len(archivos_nombres) else f.name
-                        PublicacionArchivo.objects.create(
-                            publicacion=publicacion,
-                            archivo=f,
-                            nombre=nombre,
-                            orden=i + 1
-                        )
+                # Imágenes, videos y archivos descargables van a la cola de media
+                encolados = cola.encolar(
+                    "publicacion_imagen", publicacion, request.FILES.getlist('imagenes'), user=request.user,
+                )
+                encolados += cola.encolar(
+                    "publicacion_video", publicacion, request.FILES.getlist('videos'), user=request.user,
+                )
+                encolados += cola.encolar(
+                    "publicacion_archivo", publicacion, request.FILES.getlist('archivos'),
+                    request.POST.getlist('archivo_nombre'), user=request.user,
+                )
 
                 # Guardar integrantes
                 integrantes_ids = request.POST.getlist('integrante_id')
@@ -794,6 +910,7 @@ def publicacion_add(request):
                         )
 
                 messages.success(request, "Publicación agregada correctamente.")
+                _avisar_encolados(request, encolados)
                 return redirect("core:panel_publicaciones")
             except Exception as e:
                 messages.error(request, f"Error al agregar la publicación: {str(e)}")
@@ -812,7 +929,9 @@ def publicacion_add(request):
 
 @login_required
 def publicacion_edit(request, pk):
-    publicacion = get_object_or_404(Publicacion, pk=pk)
+    # En GET se precargan imagenes/videos/archivos/integrantes que muestra el formulario
+    queryset = consultas.publicacion_detalle() if request.method == "GET" else Publicacion.objects
+    publicacion = get_object_or_404(queryset, pk=pk)
     if request.method == "POST":
         form = PublicacionForm(request.POST, instance=publicacion)
         if form.is_valid():
@@ -822,44 +941,22 @@ def publicacion_edit(request, pk):
                     pub.user = request.user
                 pub.save()
 
-                # Reemplazar imágenes si subieron nuevas
+                # Imágenes, videos y archivos nuevos se agregan al final (se guardan desde la cola)
+                encolados = 0
                 imagenes_files = request.FILES.getlist('imagenes')
                 if imagenes_files:
-                    PublicacionImagen.objects.filter(publicacion=pub).delete()
-                    for i, img in enumerate(imagenes_files):
-                        if img:
-                            PublicacionImagen.objects.create(
-                                publicacion=pub,
-                                imagen=img,
-                                orden=i + 1
-                            )
-
-                # Reemplazar videos si subieron nuevos
+                    encolados += galerias.agregar("publicacion_imagen", pub, imagenes_files, user=request.user)
+
                 videos_files = request.FILES.getlist('videos')
                 if videos_files:
-                    PublicacionVideo.objects.filter(publicacion=pub).delete()
-                    for i, vid in enumerate(videos_files):
-                        if vid:
-                            PublicacionVideo.objects.create(
-                                publicacion=pub,
-                                video=vid,
-                                orden=i + 1
-                            )
-
-                # Reemplazar archivos si subieron nuevos
+                    encolados += galerias.agregar("publicacion_video", pub, videos_files, user=request.user)
+
                 archivos_files = request.FILES.getlist('archivos')
-                archivos_nombres = request.POST.getlist('archivo_nombre')
                 if archivos_files:
-                    PublicacionArchivo.objects.filter(publicacion=pub).delete()
-                    for i, f in enumerate(archivos_files):
-                        if f:
-                            nombre = archivos_nombres[i] if i < len(archivos_nombres) else f.name
-                            PublicacionArchivo.objects.create(
-                                publicacion=pub,
-                                archivo=f,
-                                nombre=nombre,
-                                orden=i + 1
-                            )
+                    encolados += galerias.agregar(
+                        "publicacion_archivo", pub, archivos_files,
+                        request.POST.getlist('archivo_nombre'), user=request.user,
+                    )
 
                 # Actualizar integrantes
                 integrantes_ids = request.POST.getlist('integrante_id')
@@ -876,6 +973,7 @@ def publicacion_edit(request, pk):
                         )
 
                 messages.success(request, "Publicación actualizada correctamente.")
+                _avisar_encolados(request, encolados)
                 return redirect("core:panel_publicaciones")
             except Exception as e:
                 messages.error(request, f"Error al actualizar la publicación: {str(e)}")
@@ -917,25 +1015,21 @@ def evento_add(request):
         form = EventoForm(request.POST, request.FILES)
         if form.is_valid():
             try:
-                obj = form.save(commit=False)
-                if not obj.user_id:
-                    obj.user = request.user
-                obj.save()
-
-                # Archivos múltiples
-                archivos_files = request.FILES.getlist('archivos')
-                archivos_nombres = request.POST.getlist('archivo_nombre')
-                for i, f in enumerate(archivos_files):
-                    if f:
-                        nombre = archivos_nombres[i] if i < len(archivos_nombres) else f.name
-                        EventoArchivo.objects.create(
-                            evento=obj,
-                            archivo=f,
-                            nombre=nombre,
-                            orden=i + 1
-                        )
+                # Todo junto: la portada y las descargas se resuelven una vez al confirmar
+                with transaction.atomic():
+                    obj = form.save(commit=False)
+                    if not obj.user_id:
+                        obj.user = request.user
+                    obj.save()
+
+                    # Archivos múltiples: los guarda el worker de la cola de media
+                    encolados = cola.encolar(
+                        "evento_archivo", obj, request.FILES.getlist('archivos'),
+                        request.POST.getlist('archivo_nombre'), user=request.user,
+                    )
 
                 messages.success(request, "Evento agregado correctamente.")
+                _avisar_encolados(request, encolados)
                 return redirect("core:panel_eventos")
             except Exception as e:
                 messages.error(request, f"Error al agregar: {e}")
@@ -952,27 +1046,24 @@ def evento_edit(request, pk):
         form = EventoForm(request.POST, request.FILES, instance=evento)
         if form.is_valid():
             try:
-                obj = form.save(commit=False)
-                if not obj.user_id:
-                    obj.user = request.user
-                obj.save()
-
-                # Si se suben nuevos archivos, reemplazar los existentes.
-                archivos_files = request.FILES.getlist('archivos')
-                archivos_nombres = request.POST.getlist('archivo_nombre')
-                if archivos_files:
-                    EventoArchivo.objects.filter(evento=obj).delete()
-                    for i, f in enumerate(archivos_files):
-                        if f:
-                            nombre = archivos_nombres[i] if i < len(archivos_nombres) else f.name
-                            EventoArchivo.objects.create(
-                                evento=obj,
-                                archivo=f,
-                                nombre=nombre,
-                                orden=i + 1
-                            )
+                # Todo junto: la portada y las descargas se resuelven una vez al confirmar
+                with transaction.atomic():
+                    obj = form.save(commit=False)
+                    if not obj.user_id:
+                        obj.user = request.user
+                    obj.save()
+
+                    # Los archivos nuevos se agregan despues de los existentes.
+                    encolados = 0
+                    archivos_files = request.FILES.getlist('archivos')
+                    if archivos_files:
+                        encolados = galerias.agregar(
+                            "evento_archivo", obj, archivos_files,
+                            request.POST.getlist('archivo_nombre'), user=request.user,
+                        )
 
                 messages.success(request, "Evento actualizado correctamente.")
+                _avisar_encolados(request, encolados)
                 return redirect("core:panel_eventos")
             except Exception as e:
                 messages.error(request, f"Error al actualizar: {e}")
@@ -993,17 +1084,6 @@ def evento_delete(request, pk):
 
 @login_required
 def evento_detalle(request, pk):
-    evento = get_object_or_404(Evento.objects.prefetch_related("archivos"), pk=pk)
-    cover = None
-    for a in evento.archivos.all():
-        try:
-            url = a.archivo.url
-        except Exception:
-            url = ""
-        lower = (url or "").lower()
-        if lower.endswith((".jpg", ".jpeg", ".png", ".webp", ".gif")):
-            cover = url
-            break
-    evento.cover_url = cover
+    evento = get_object_or_404(Evento, pk=pk)
     return render(request, "core/evento_detalle.html", {"evento": evento})
 
@@ -1,5 +1,6 @@
 # giese_site/settings.py
 import os
+import tempfile
 from pathlib import Path
 
 # ========== Carga .env (no rompe si falta) ==========
@@ -127,6 +128,8 @@ STORAGES = {
             "base_url": "/media/",
         },
     },
+    # Nombres con el hash del contenido (WhiteNoise los marca immutable, ver core.front) y
+    # copias .gz/.br precomprimidas (.br requiere el paquete Brotli)
     "staticfiles": {
         "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
     },
@@ -136,6 +139,11 @@ STORAGES = {
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Subidas reanudables por partes (core.subidas): las partes se juntan en disco
+# local y el archivo se borra al adjuntarlo al storage.
+SUBIDAS_DIR = Path(os.getenv("SUBIDAS_DIR") or Path(tempfile.gettempdir()) / "giese_subidas")
+SUBIDAS_TAMANO_MAXIMO = int(os.getenv("SUBIDAS_TAMANO_MAXIMO", 2 * 1024 ** 3))  # 2 GB
+
 # Si hay CLOUDINARY_URL en el entorno (Render), usar Cloudinary para MEDIA.
 if os.getenv("CLOUDINARY_URL"):
     STORAGES["default"] = {
@@ -143,6 +151,25 @@ if os.getenv("CLOUDINARY_URL"):
     }
     # (STATIC sigue con WhiteNoise; no uses Cloudinary para static)
 
+# Con media en disco, Django la sirve en MEDIA_URL (core.entrega) con Range y
+# caché. Detrás de nginx conviene MEDIA_ENVIO=x-accel-redirect y una location
+# "internal" en MEDIA_ENVIO_PREFIJO que apunte a MEDIA_ROOT; con Apache o
+# lighttpd, MEDIA_ENVIO=x-sendfile. Vacío: Django transmite el archivo.
+MEDIA_LOCAL = not os.getenv("CLOUDINARY_URL")
+MEDIA_ENVIO = os.getenv("MEDIA_ENVIO", "").lower()
+MEDIA_ENVIO_PREFIJO = os.getenv("MEDIA_ENVIO_PREFIJO", "/media-interna/")
+
+# Media deduplicada por contenido (core.almacenamiento) sobre el storage de arriba:
+# cada archivo distinto se guarda una vez, con un nombre derivado de su SHA-256.
+if os.getenv("MEDIA_DEDUPLICADA", "1") == "1":
+    STORAGES["default"] = {
+        "BACKEND": "core.almacenamiento.AlmacenamientoDeduplicado",
+        "OPTIONS": {
+            "backend": STORAGES["default"]["BACKEND"],
+            "options": STORAGES["default"].get("OPTIONS", {}),
+        },
+    }
+
 # ========== Proxy/Seguridad detrás de Render ==========
 SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
 
@@ -153,6 +180,47 @@ CSRF_TRUSTED_ORIGINS = [
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# ========== Cache ==========
+# Sin REDIS_URL cada proceso tiene su propia cache en memoria. Con varios
+# procesos (gunicorn + workers) hace falta una compartida para que las
+# invalidaciones lleguen a todos: sin ella la cache de páginas
+# (core.paginas) queda apagada. En produccion REDIS_URL es obligatoria (ver
+# README, "Despliegue"); RedisCache usa el paquete "redis" de requirements.txt.
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        },
+    }
+
+# Páginas públicas para anónimos (core.paginas): salen sin cookies y con
+# "Cache-Control: public, s-maxage" para el CDN. El CDN debe saltear su caché
+# si el pedido trae la cookie de sesión (SESSION_COOKIE_NAME).
+PAGINAS_S_MAXAGE = int(os.getenv("PAGINAS_S_MAXAGE", "300"))
+# Prende la cache de páginas aunque la cache sea local al proceso. Solo
+# sirve con un único proceso que además hace todas las escrituras (pruebas).
+PAGINAS_CACHE_LOCAL = os.getenv("PAGINAS_CACHE_LOCAL", "0") == "1"
+# Una página vencida la regenera un solo worker; los demás sirven la copia
+# vieja hasta PAGINAS_VENTANA_STALE segundos, o esperan hasta PAGINAS_ESPERA
+# segundos si no había copia (core.paginas).
+PAGINAS_VENTANA_STALE = int(os.getenv("PAGINAS_VENTANA_STALE", "30"))
+PAGINAS_ESPERA = float(os.getenv("PAGINAS_ESPERA", "2"))
+
+# ========== Correo ==========
+# El formulario de contacto deja los mensajes en la base (core.correo) y los
+# manda el worker "python manage.py enviar_correos", con una conexión SMTP por
+# lote y reintentos. Para probar sin un servidor real alcanza con un SMTP local
+# de prueba (p. ej. "python -m aiosmtpd -n -l localhost:1025") y EMAIL_PORT=1025.
+EMAIL_HOST = os.getenv("EMAIL_HOST", "localhost")
+EMAIL_PORT = int(os.getenv("EMAIL_PORT", "25"))
+EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "")
+EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
+EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "0") == "1"
+EMAIL_USE_SSL = os.getenv("EMAIL_USE_SSL", "0") == "1"
+EMAIL_TIMEOUT = int(os.getenv("EMAIL_TIMEOUT", "30"))
+DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "webmaster@localhost")
+
 # ========== Auth redirects ==========
 LOGIN_URL = "core:login"
 LOGIN_REDIRECT_URL = "core:panel_equipo"